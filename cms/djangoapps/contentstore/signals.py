@@ -6,6 +6,7 @@ from django.dispatch import receiver
 
 from xmodule.modulestore.django import SignalHandler
 from contentstore.courseware_index import CoursewareSearchIndexer, LibrarySearchIndexer
+from openedx.core.djangoapps.content.publish_handlers import schedule_publish_handler
 
 
 @receiver(SignalHandler.course_published)
@@ -16,7 +17,8 @@ def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=
     # import here, because signal is registered at startup, but items in tasks are not yet able to be loaded
     from .tasks import update_search_index
     if CoursewareSearchIndexer.indexing_is_enabled():
-        update_search_index.delay(unicode(course_key), datetime.now(UTC).isoformat())
+        # The course is indexed once for all the publishes made within a few seconds of each other.
+        schedule_publish_handler(update_search_index, course_key, datetime.now(UTC).isoformat())
 
 
 @receiver(SignalHandler.library_updated)
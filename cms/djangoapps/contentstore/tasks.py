@@ -18,6 +18,8 @@ from xmodule.course_module import CourseFields
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
 
+from openedx.core.djangoapps.content.publish_handlers import publish_handler_task
+
 LOGGER = get_task_logger(__name__)
 FULL_COURSE_REINDEX_THRESHOLD = 1
 
@@ -91,7 +93,7 @@ def _parse_time(time_isoformat):
     ).replace(tzinfo=UTC)
 
 
-@task()
+@publish_handler_task(name=u'contentstore.tasks.update_search_index')
 def update_search_index(course_id, triggered_time_isoformat):
     """ Updates course search index. """
     try:
@@ -443,8 +443,8 @@ def _save_xblock(user, xblock, data=None, children_strings=None, metadata=None,
             # this is error could occur in modulestores (such as Draft) that do not support atomic write-transactions
             old_children = set(xblock.children) - set(children)
             if any(
-                    store.get_parent_location(old_child) == xblock.location
-                    for old_child in old_children
+                    parent_location == xblock.location
+                    for parent_location in store.get_parent_locations(old_children).itervalues()
             ):
                 # since children are moved as part of a single transaction, orphans should not be created
                 return JsonResponse({"error": "Invalid data, possibly caused by concurrent authors."}, 400)
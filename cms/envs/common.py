@@ -271,6 +271,7 @@ MIDDLEWARE_CLASSES = (
     # Instead of AuthenticationMiddleware, we use a cache-backed version
     'cache_toolbox.middleware.CacheBackedAuthenticationMiddleware',
     'student.middleware.UserStandingMiddleware',
+    'student.middleware.EnrollmentsCacheMiddleware',
     'contentserver.middleware.StaticContentServer',
     'crum.CurrentRequestUserMiddleware',
 
@@ -358,6 +359,25 @@ MODULESTORE = {
     }
 }
 
+# Number of split modulestore structures kept in each process's structure cache (0 disables it).
+# Structures are immutable, so they are also shared through the 'course_structure_cache' django cache
+# if one is configured.
+SPLIT_STRUCTURE_CACHE_SIZE = 1000
+
+# Caching of the assets served by contentserver.middleware.StaticContentServer.
+STATIC_CONTENT_CACHE = {
+    # Assets smaller than this many bytes are cached whole in the default cache.
+    'MAX_IN_MEMORY_SIZE': 1024 * 1024,
+    # Larger ones, up to this size, are cached in chunks of CHUNK_SIZE bytes in the
+    # 'static_asset_chunks' django cache, if one is configured.
+    'MAX_CHUNKED_SIZE': 100 * 1024 * 1024,
+    'CHUNK_SIZE': 512 * 1024,
+    # A directory in which to keep local copies of the chunked assets, or None for none,
+    # and the most bytes it may hold.
+    'DISK_DIRECTORY': None,
+    'DISK_MAX_SIZE': 1024 * 1024 * 1024,
+}
+
 ############################ DJANGO_BUILTINS ################################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -641,6 +661,15 @@ CELERY_QUEUES = {
     DEFAULT_PRIORITY_QUEUE: {}
 }
 
+# Course publish handlers (course structure, course overview, search index...)
+# run this many seconds after the first publish of a course, once for all the
+# publishes made meanwhile; see openedx.core.djangoapps.content.publish_handlers.
+COURSE_PUBLISH_HANDLERS = {
+    'DELAY': 30,
+    # How long a handler may hold the lock of a course, in seconds.
+    'LOCK_TIMEOUT': 15 * 60,
+}
+
 
 ############################## Video ##########################################
 
@@ -744,6 +773,7 @@ INSTALLED_APPS = (
     'edx_jsme',    # Molecular Structure
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
 )
 
 
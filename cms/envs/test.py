@@ -134,6 +134,9 @@ DATABASES = {
 LMS_BASE = "localhost:8000"
 FEATURES['PREVIEW_LMS_BASE'] = "preview"
 
+# Keep mongo query counts in tests independent of test ordering
+SPLIT_STRUCTURE_CACHE_SIZE = 0
+
 CACHES = {
     # This is the cache used for most things. Askbot will not work without a
     # functioning cache -- it relies on caching to load its settings in places.
@@ -166,6 +169,16 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     },
+    'static_asset_chunks': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'static_asset_chunks',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
+    'course_enrollments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course_enrollments',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
 
 }
 
@@ -0,0 +1,301 @@
+"""
+Caching of assets too large to be cached whole.
+
+Such an asset is cached as a `ChunkedStaticContent`, which holds only its
+metadata.  Its data is read, in order of preference, from a copy on local
+disk (if settings.STATIC_CONTENT_CACHE['DISK_DIRECTORY'] is set), from the
+'static_asset_chunks' django cache in CHUNK_SIZE pieces (if that cache is
+configured), or from the contentstore, which fills the other two.  The chunks
+are never put in the default cache, which may hold the sessions.
+
+Disk copies and chunks are keyed by the asset's version (the md5 of its data
+if known), so a replaced asset never serves the data of the old one.
+"""
+
+import hashlib
+import logging
+import os
+import os.path
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import StaticContent
+
+log = logging.getLogger(__name__)
+
+# How many chunks to fetch from the cache at a time.
+CHUNKS_PER_FETCH = 8
+
+# How many bytes to read from a disk copy at a time.
+DISK_READ_SIZE = 64 * 1024
+
+# The name of the django cache holding the chunks.
+CHUNK_CACHE_NAME = 'static_asset_chunks'
+
+# Disk copies being written have this suffix until they are complete.
+PARTIAL_SUFFIX = '.partial'
+
+# Copies still partial after this many seconds were abandoned by their writer.
+ABANDONED_PARTIAL_AGE = 60 * 60
+
+
+def get_chunk_cache():
+    """
+    Return the django cache in which to keep chunks, or None if there isn't one.
+    """
+    try:
+        return get_cache(CHUNK_CACHE_NAME)
+    except InvalidCacheBackendError:
+        return None
+
+
+def is_chunk_cacheable(content):
+    """
+    Should `content` be cached as a `ChunkedStaticContent`?
+    """
+    cache_settings = settings.STATIC_CONTENT_CACHE
+    return cache_settings['MAX_IN_MEMORY_SIZE'] <= content.length <= cache_settings['MAX_CHUNKED_SIZE']
+
+
+class ChunkedStaticContent(StaticContent):
+    """
+    The metadata of a large asset, which reads the asset's data through the
+    chunk and disk caches.  Create it from a `StaticContentStream`, which it
+    uses to read any data that isn't cached yet.
+    """
+    def __init__(self, content):
+        super(ChunkedStaticContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self.chunk_size = settings.STATIC_CONTENT_CACHE['CHUNK_SIZE']
+        self._stream = content
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The stream belongs to this request only.
+        state['_stream'] = None
+        return state
+
+    @property
+    def version(self):
+        """
+        A string which changes whenever the asset's data does.
+        """
+        if self.content_digest:
+            return self.content_digest
+        return self.last_modified_at.isoformat()
+
+    def _cache_key(self, index):
+        """
+        The cache key of chunk `index`.
+        """
+        name = u'{}:{}:{}'.format(self.location, self.version, self.chunk_size).encode('utf-8')
+        return 'asset-chunk:{}:{}'.format(hashlib.sha1(name).hexdigest(), index)
+
+    def _read_chunks(self, indexes):
+        """
+        Return the chunks with `indexes` (a list) from the contentstore, and
+        cache them.
+        """
+        if self._stream is None:
+            self._stream = AssetManager.find(self.location, as_stream=True)
+        if self._stream.content_digest != self.content_digest:
+            # The asset has changed since its metadata was cached; don't cache the new data as the old.
+            log.warning(u"Asset %s changed while it was being served", self.location)
+            cacheable = False
+        else:
+            cacheable = True
+
+        chunks = []
+        for index in indexes:
+            first_byte = index * self.chunk_size
+            last_byte = min(first_byte + self.chunk_size, self.length) - 1
+            chunks.append(''.join(self._stream.stream_data_in_range(first_byte, last_byte)))
+        chunk_cache = get_chunk_cache()
+        if cacheable and chunk_cache is not None:
+            chunk_cache.set_many({self._cache_key(index): chunk for index, chunk in zip(indexes, chunks)})
+        return chunks
+
+    def _iter_chunks(self, first_index, last_index):
+        """
+        Yield the chunks `first_index` to `last_index` (included) of the data.
+        """
+        chunk_cache = get_chunk_cache()
+        for start in xrange(first_index, last_index + 1, CHUNKS_PER_FETCH):
+            indexes = range(start, min(start + CHUNKS_PER_FETCH, last_index + 1))
+            keys = [self._cache_key(index) for index in indexes]
+            cached = chunk_cache.get_many(keys) if chunk_cache is not None else {}
+            missing = [index for index, key in zip(indexes, keys) if key not in cached]
+            read = dict(zip(missing, self._read_chunks(missing))) if missing else {}
+            for index, key in zip(indexes, keys):
+                yield cached[key] if key in cached else read[index]
+
+    def _stream_from_chunks(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included) from the chunks.
+        """
+        first_index = first_byte // self.chunk_size
+        last_index = last_byte // self.chunk_size
+        for index, chunk in enumerate(self._iter_chunks(first_index, last_index), first_index):
+            start = index * self.chunk_size
+            yield chunk[max(first_byte - start, 0):last_byte - start + 1]
+
+    def stream_data(self):
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        if self.length == 0:
+            return iter([])
+
+        disk_cache = get_disk_cache()
+        if disk_cache is not None:
+            path = disk_cache.get_path(self)
+            if path is None:
+                path = disk_cache.store(self, self._stream_from_chunks(0, self.length - 1))
+            if path is not None:
+                try:
+                    return _stream_file_in_range(open(path, 'rb'), first_byte, last_byte)
+                except IOError:
+                    # Removed to make room for another copy since.
+                    pass
+        return self._stream_from_chunks(first_byte, last_byte)
+
+
+def _stream_file_in_range(data, first_byte, last_byte):
+    """
+    Stream the bytes first_byte to last_byte (included) of the open file
+    `data`, and close it.
+    """
+    with data:
+        data.seek(first_byte)
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = data.read(min(remaining, DISK_READ_SIZE))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class AssetDiskCache(object):
+    """
+    Copies of large assets in `directory`, which holds at most `max_size`
+    bytes of them.  The least recently used copies are removed to make room.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, content):
+        """
+        The path of the copy of `content`.
+        """
+        name = u'{}:{}'.format(content.location, content.version).encode('utf-8')
+        return os.path.join(self.directory, hashlib.sha1(name).hexdigest())
+
+    def get_path(self, content):
+        """
+        Return the path of the copy of `content`, or None if there isn't one.
+        """
+        path = self._path(content)
+        try:
+            # Mark it as recently used.
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def store(self, content, data):
+        """
+        Copy `content`, whose data is the iterable `data`, returning its path,
+        or None if it isn't worth copying or couldn't be copied.
+        """
+        if content.length > self.max_size:
+            return None
+        self._make_room(content.length)
+
+        path = self._path(content)
+        try:
+            copy = tempfile.NamedTemporaryFile(dir=self.directory, suffix=PARTIAL_SUFFIX, delete=False)
+        except (IOError, OSError):
+            log.warning(u"Could not copy asset %s to %s", content.location, self.directory, exc_info=True)
+            return None
+        try:
+            with copy:
+                for chunk in data:
+                    copy.write(chunk)
+            os.rename(copy.name, path)
+        except (IOError, OSError):
+            # e.g. the disk is full, or the directory was cleaned up; serve without a copy.
+            log.warning(u"Could not copy asset %s to %s", content.location, self.directory, exc_info=True)
+            _remove(copy.name)
+            return None
+        except Exception:
+            _remove(copy.name)
+            raise
+        return path
+
+    def _make_room(self, length):
+        """
+        Remove the least recently used copies until `length` more bytes fit.
+
+        Copies other processes are still writing are left alone, but count
+        against the size.
+        """
+        copies = []
+        abandoned_before = time.time() - ABANDONED_PARTIAL_AGE
+        for name in os.listdir(self.directory):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            if name.endswith(PARTIAL_SUFFIX) and stat.st_mtime >= abandoned_before:
+                length += stat.st_size
+                continue
+            copies.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for __, size, __ in copies)
+        for __, size, name in sorted(copies):
+            if total + length <= self.max_size:
+                break
+            # It may have been removed by another process already.
+            _remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def _remove(path):
+    """
+    Remove the file at `path`, if it is still there.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_DISK_CACHE = None
+
+
+def get_disk_cache():
+    """
+    Return the process-wide `AssetDiskCache`, or None if there isn't one.
+    """
+    global _DISK_CACHE  # pylint: disable=global-statement
+    directory = settings.STATIC_CONTENT_CACHE['DISK_DIRECTORY']
+    if directory is None:
+        return None
+    if _DISK_CACHE is None or _DISK_CACHE.directory != directory:
+        _DISK_CACHE = AssetDiskCache(directory, settings.STATIC_CONTENT_CACHE['DISK_MAX_SIZE'])
+    return _DISK_CACHE
@@ -4,12 +4,17 @@ Tests for StaticContentServer
 import copy
 import ddt
 import logging
+import os
+import shutil
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache import cache, get_cache
 from django.test.client import Client
 from django.test.utils import override_settings
+from mock import Mock, patch
 
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
@@ -17,6 +22,7 @@ from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.xml_importer import import_course_from_xml
 
+from contentserver.caching import AssetDiskCache, CHUNK_CACHE_NAME
 from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
@@ -63,6 +69,10 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.unlocked_asset = self.course_key.make_asset_key('asset', 'another_static.txt')
         self.url_unlocked = unicode(self.unlocked_asset)
         self.length_unlocked = self.contentstore.get_attr(self.unlocked_asset, 'length')
+        self.data_unlocked = self.contentstore.find(self.unlocked_asset).data
+        self.etag_unlocked = '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5'))
+        cache.clear()
+        get_cache(CHUNK_CACHE_NAME).clear()
 
     def test_unlocked_asset(self):
         """
@@ -146,17 +156,87 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges response.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
-        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -10'.format(
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        boundary = resp['Content-Type'].split('boundary=')[1]
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+        self.assertEqual(
+            resp.content,
+            (
+                '--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes {first}-{last}/{length}\r\n\r\n'
+                '{first_part}\r\n'
+                '--{boundary}\r\nContent-Type: text/plain\r\nContent-Range: bytes {tail}-{end}/{length}\r\n\r\n'
+                '{last_part}\r\n'
+                '--{boundary}--\r\n'
+            ).format(
+                boundary=boundary, first=first_byte, last=last_byte, length=self.length_unlocked,
+                tail=self.length_unlocked - 10, end=self.length_unlocked - 1,
+                first_part=self.data_unlocked[first_byte:last_byte + 1], last_part=self.data_unlocked[-10:],
+            )
+        )
+
+    def test_range_request_cached_content(self):
+        """
+        Test that range requests for cached content are served from the cache.
+        """
+        self.client.get(self.url_unlocked)
+        with patch('contentserver.middleware.AssetManager.find') as mock_find:
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=1-4')
+        self.assertFalse(mock_find.called)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.content, self.data_unlocked[1:5])
+
+    def test_etag(self):
+        """
+        Test that responses have the md5 of the content as their ETag, and
+        that requests with a matching If-None-Match get 304 Not Modified.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['ETag'], self.etag_unlocked)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other", {}'.format(self.etag_unlocked))
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], self.etag_unlocked)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(resp.status_code, 200)
+
+    @ddt.data(None, 'disk')
+    def test_chunked_content(self, disk_directory):
+        """
+        Test that content too large to cache whole is served from the chunk
+        cache, or from disk, without going back to the contentstore.
+        """
+        cache_settings = {
+            'MAX_IN_MEMORY_SIZE': 1,
+            'MAX_CHUNKED_SIZE': self.length_unlocked,
+            'CHUNK_SIZE': 16,
+            'DISK_DIRECTORY': None,
+            'DISK_MAX_SIZE': self.length_unlocked,
+        }
+        if disk_directory:
+            cache_settings['DISK_DIRECTORY'] = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, cache_settings['DISK_DIRECTORY'])
+
+        with override_settings(STATIC_CONTENT_CACHE=cache_settings):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.content, self.data_unlocked)
+
+            with patch('xmodule.assetstore.assetmgr.AssetManager.find') as mock_find:
+                resp = self.client.get(self.url_unlocked)
+                self.assertEqual(resp.content, self.data_unlocked)
+                resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-40')
+                self.assertEqual(resp.content, self.data_unlocked[10:41])
+            self.assertFalse(mock_find.called)
 
     @ddt.data(
         'bytes 0-',
@@ -193,6 +273,43 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         self.assertEqual(resp.status_code, 416)
 
 
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache class.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.disk_cache = AssetDiskCache(self.directory, 10)
+
+    def _content(self, name, length):
+        """
+        Return an object with the attributes of a ChunkedStaticContent the disk cache uses.
+        """
+        return Mock(location=name, version='1', length=length)
+
+    def test_make_room_keeps_partial_copies(self):
+        partial = os.path.join(self.directory, 'other_process.partial')
+        with open(partial, 'wb') as partial_file:
+            partial_file.write('x' * 6)
+
+        path = self.disk_cache.store(self._content('first', 4), ['abcd'])
+        self.assertIsNotNone(path)
+        self.disk_cache.store(self._content('second', 4), ['efgh'])
+
+        # the completed copy makes room, the partial one is still being written
+        self.assertTrue(os.path.exists(partial))
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_copy_is_a_miss(self):
+        content = self._content('asset', 4)
+        with patch('contentserver.caching.os.rename', side_effect=OSError):
+            self.assertIsNone(self.disk_cache.store(content, ['abcd']))
+        self.assertIsNone(self.disk_cache.get_path(content))
+        self.assertEqual(os.listdir(self.directory), [])
+
+
 @ddt.ddt
 class ParseRangeHeaderTestCase(unittest.TestCase):
     """
@@ -0,0 +1,152 @@
+"""
+Middleware which reports the mongo, SQL, cache and codejail calls each request
+made, as counted by dogstats_wrapper.request_metrics.
+
+It is configured by settings.REQUEST_METRICS:
+
+    ENABLED: whether to measure requests at all.
+    TRACK_CALL_SITES: whether to also count the calls by the code they were
+        made from.  This walks the stack at every call, so it costs more.
+    LOG: whether to log a line of counts and times for each request.
+    STATSD: whether to send the counts and times to statsd, tagged by view.
+
+In DEBUG mode, the counts and times are also returned in X-Request-Metrics-*
+response headers.
+"""
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.util import CursorWrapper
+from django.utils.importlib import import_module
+
+import dogstats_wrapper as dog_stats_api
+from dogstats_wrapper import request_metrics
+
+log = logging.getLogger(__name__)
+
+# How many of the busiest call sites of each kind to log.
+CALL_SITES_LOGGED = 5
+
+
+class MeasuredCursorWrapper(CursorWrapper):
+    """
+    A database cursor whose queries are measured as 'sql' calls.
+    """
+    def execute(self, sql, params=()):  # pylint: disable=missing-docstring
+        self.set_dirty()
+        with request_metrics.measure('sql'):
+            return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, param_list):  # pylint: disable=missing-docstring
+        self.set_dirty()
+        with request_metrics.measure('sql'):
+            return self.cursor.executemany(sql, param_list)
+
+
+def measure_connection(connection):
+    """
+    Make the cursors of the database `connection` measure their queries.
+
+    Django only lets a cursor be wrapped through its debug cursor, so the
+    connection is made to always use one, and in DEBUG mode the real debug
+    cursor is kept underneath.
+    """
+    if getattr(connection, 'request_metrics_measured', False):
+        return
+    debug = connection.use_debug_cursor or (connection.use_debug_cursor is None and settings.DEBUG)
+    make_debug_cursor = connection.make_debug_cursor
+
+    def make_measured_cursor(cursor):  # pylint: disable=missing-docstring
+        return MeasuredCursorWrapper(make_debug_cursor(cursor) if debug else cursor, connection)
+
+    connection.make_debug_cursor = make_measured_cursor
+    connection.use_debug_cursor = True
+    connection.request_metrics_measured = True
+
+
+def measure_cache_backends():
+    """
+    Make the backends of settings.CACHES measure their gets as 'cache_gets' calls.
+    """
+    for name, config in settings.CACHES.items():
+        module_name, __, class_name = config['BACKEND'].rpartition('.')
+        try:
+            backend = getattr(import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError):
+            log.warning(u"Can't measure the gets of cache %s", name)
+            continue
+        if getattr(backend, 'request_metrics_measured', False):
+            continue
+        backend.get = request_metrics.measured('cache_gets')(backend.get)
+        backend.get_many = request_metrics.measured('cache_gets')(backend.get_many)
+        backend.request_metrics_measured = True
+
+
+def _view_name(view_func):
+    """
+    The dotted name of `view_func`, for tagging its metrics.
+    """
+    name = getattr(view_func, '__name__', view_func.__class__.__name__)
+    return u'{}.{}'.format(getattr(view_func, '__module__', ''), name)
+
+
+class RequestMetricsMiddleware(object):
+    """
+    Measures each request and reports its metrics.
+    """
+    def __init__(self):
+        self.config = getattr(settings, 'REQUEST_METRICS', {})
+        if not self.config.get('ENABLED'):
+            raise MiddlewareNotUsed()
+        measure_cache_backends()
+
+    def process_request(self, request):  # pylint: disable=missing-docstring
+        for connection in connections.all():
+            measure_connection(connection)
+        request_metrics.start(self.config.get('TRACK_CALL_SITES', False))
+        request.request_metrics_view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):  # pylint: disable=unused-argument
+        """
+        Remember which view handles the request, to tag its metrics with.
+        """
+        request.request_metrics_view = _view_name(view_func)
+
+    def process_response(self, request, response):  # pylint: disable=missing-docstring
+        metrics = request_metrics.stop()
+        if metrics is None:
+            return response
+
+        view = getattr(request, 'request_metrics_view', None) or 'unknown'
+        summary = sorted(metrics.summary().items())
+
+        if settings.DEBUG:
+            for kind, (count, milliseconds) in summary:
+                header = 'X-Request-Metrics-{}'.format(kind.replace('_', '-').title())
+                response[header] = '{} calls, {:.1f} ms'.format(count, milliseconds)
+
+        if self.config.get('LOG', True):
+            log.info(
+                u"request_metrics view=%s path=%s status=%s %s",
+                view, request.path, response.status_code,
+                u' '.join(
+                    u'{0}={1} {0}_ms={2:.1f}'.format(kind, count, milliseconds)
+                    for kind, (count, milliseconds) in summary
+                ),
+            )
+            for kind, call_sites in sorted(metrics.call_sites.items()):
+                log.info(
+                    u"request_metrics_call_sites view=%s kind=%s call_sites=%s",
+                    view, kind, json.dumps(call_sites.most_common(CALL_SITES_LOGGED)),
+                )
+
+        if self.config.get('STATSD', False):
+            tags = [u'view:{}'.format(view)]
+            for kind, (count, milliseconds) in summary:
+                dog_stats_api.histogram('edxapp.request.{}.count'.format(kind), count, tags=tags)
+                dog_stats_api.histogram('edxapp.request.{}.time'.format(kind), milliseconds, tags=tags)
+
+        return response
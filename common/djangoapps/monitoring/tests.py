@@ -0,0 +1,104 @@
+"""
+Tests of the per-request metrics.
+"""
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from mock import patch
+
+from dogstats_wrapper import request_metrics
+from monitoring.middleware import RequestMetricsMiddleware
+
+METRICS_ENABLED = {'ENABLED': True, 'TRACK_CALL_SITES': True, 'LOG': True, 'STATSD': True}
+
+
+def a_view(request):  # pylint: disable=unused-argument
+    """
+    A view which runs a query twice.
+    """
+    for __ in range(2):
+        list(User.objects.all())
+    return HttpResponse()
+
+
+class RequestMetricsTest(TestCase):
+    """
+    Tests of dogstats_wrapper.request_metrics.
+    """
+    def tearDown(self):
+        request_metrics.stop()
+        super(RequestMetricsTest, self).tearDown()
+
+    def test_not_measuring(self):
+        with request_metrics.measure('mongo_reads'):
+            pass
+        self.assertIsNone(request_metrics.current())
+
+    def test_nested_calls_count_once(self):
+        metrics = request_metrics.start()
+
+        @request_metrics.measured('mongo_reads')
+        def read():  # pylint: disable=missing-docstring
+            with request_metrics.measure('mongo_reads'):
+                with request_metrics.measure('sql'):
+                    pass
+
+        read()
+        read()
+        self.assertEqual(metrics.counts, {'mongo_reads': 2, 'sql': 2})
+        self.assertIs(request_metrics.stop(), metrics)
+        self.assertIsNone(request_metrics.current())
+
+    def test_call_sites(self):
+        metrics = request_metrics.start(track_call_sites=True)
+        for __ in range(3):
+            with request_metrics.measure('sql'):
+                pass
+
+        (call_site, count), = metrics.call_sites['sql'].items()
+        self.assertIn('test_call_sites', call_site)
+        self.assertEqual(count, 3)
+
+
+@override_settings(REQUEST_METRICS=METRICS_ENABLED, DEBUG=True)
+class RequestMetricsMiddlewareTest(TestCase):
+    """
+    Tests of RequestMetricsMiddleware.
+    """
+    def setUp(self):
+        super(RequestMetricsMiddlewareTest, self).setUp()
+        self.middleware = RequestMetricsMiddleware()
+        self.request = RequestFactory().get('/a/path')
+
+    def process(self):
+        """
+        Run self.request through the middleware and a_view.
+        """
+        self.middleware.process_request(self.request)
+        self.middleware.process_view(self.request, a_view, [], {})
+        return self.middleware.process_response(self.request, a_view(self.request))
+
+    @override_settings(REQUEST_METRICS={'ENABLED': False})
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            RequestMetricsMiddleware()
+
+    def test_headers(self):
+        response = self.process()
+        self.assertEqual(response['X-Request-Metrics-Sql'].split(',')[0], '2 calls')
+        self.assertIsNone(request_metrics.current())
+
+    @patch('monitoring.middleware.dog_stats_api')
+    @patch('monitoring.middleware.log')
+    def test_reports(self, mock_log, mock_dog_stats_api):
+        self.process()
+
+        tags = [u'view:monitoring.tests.a_view']
+        mock_dog_stats_api.histogram.assert_any_call('edxapp.request.sql.count', 2, tags=tags)
+        logged = [call[0][0] % call[0][1:] for call in mock_log.info.call_args_list]
+        self.assertIn('sql=2', logged[0])
+        self.assertIn('kind=sql', logged[1])
+        self.assertIn('a_view', logged[1])
@@ -1,5 +1,7 @@
 import threading
 
+from celery.signals import task_prerun
+
 _request_cache_threadlocal = threading.local()
 _request_cache_threadlocal.data = {}
 
@@ -19,3 +21,13 @@ class RequestCache(object):
     def process_response(self, request, response):
         self.clear_request_cache()
         return response
+
+
+@task_prerun.connect
+def clear_request_cache_before_task(**kwargs):  # pylint: disable=unused-argument
+    """
+    Celery tasks are the requests of the workers, so don't let them share what
+    they cached.  It is cleared before rather than after each task so that
+    task_postrun receivers can still see what the task left in it.
+    """
+    RequestCache().clear_request_cache()
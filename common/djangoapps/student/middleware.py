@@ -5,7 +5,7 @@ disabled accounts from accessing the site.
 from django.http import HttpResponseForbidden
 from django.utils.translation import ugettext as _
 from django.conf import settings
-from student.models import UserStanding
+from student.models import CourseEnrollment, UserStanding
 
 
 class UserStandingMiddleware(object):
@@ -34,3 +34,16 @@ class UserStandingMiddleware(object):
                     ),
                 )
                 return HttpResponseForbidden(msg)
+
+
+class EnrollmentsCacheMiddleware(object):
+    """
+    Forgets the enrollments cached between requests for the users whose
+    enrollments the request changed, once the request's transaction is over,
+    since other requests may have cached them again in the meantime.
+
+    Must come after RequestCache and before TransactionMiddleware.
+    """
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        CourseEnrollment.clear_changed_enrollments_caches()
+        return response
@@ -20,16 +20,19 @@ from collections import defaultdict, OrderedDict
 import dogstats_wrapper as dog_stats_api
 from urllib import urlencode
 
+from celery.signals import task_postrun
+
 from django.utils.translation import ugettext as _, ugettext_lazy
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.db import models, IntegrityError
+from django.db import models, IntegrityError, transaction
 from django.db.models import Count
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver, Signal
+from django.core.cache import get_cache, InvalidCacheBackendError
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_noop
 from django_countries.fields import CountryField
@@ -44,6 +47,7 @@ import lms.lib.comment_client as cc
 from util.model_utils import emit_field_changed_events, get_changed_fields_dict
 from util.query import use_read_replica_if_available
 from xmodule_django.models import CourseKeyField, NoneToEmptyManager
+from request_cache.middleware import RequestCache
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.django import modulestore
 from opaque_keys.edx.keys import CourseKey
@@ -96,22 +100,20 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY)
-    hasher.update(unicode(user.id))
-    if course_id:
-        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
-    digest = hasher.hexdigest()
-
-    if not hasattr(user, '_anonymous_id'):
-        user._anonymous_id = {}  # pylint: disable=protected-access
-
-    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+    digest = _anonymous_id_digest(user, course_id)
 
     if save is False:
         return digest
 
+    _save_anonymous_id(user, course_id, digest)
+    return digest
+
+
+def _save_anonymous_id(user, course_id, digest):
+    """
+    Save `digest` as the anonymous id of `user` in `course_id`, unless one is
+    stored already.
+    """
     try:
         anonymous_user_id, __ = AnonymousUserId.objects.get_or_create(
             defaults={'anonymous_user_id': digest},
@@ -132,9 +134,95 @@ def anonymous_id_for_user(user, course_id, save=True):
         # continue
         pass
 
+
+def _anonymous_id_digest(user, course_id):
+    """
+    Compute the anonymous id of `user` in `course_id`, and remember it on the
+    user object.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY)
+    hasher.update(unicode(user.id))
+    if course_id:
+        hasher.update(course_id.to_deprecated_string().encode('utf-8'))
+    digest = hasher.hexdigest()
+
+    if not hasattr(user, '_anonymous_id'):
+        user._anonymous_id = {}  # pylint: disable=protected-access
+
+    user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
     return digest
 
 
+# The number of rows read or written by a query of the bulk anonymous id functions
+ANONYMOUS_ID_BATCH_SIZE = 250
+
+
+def anonymous_ids_for_users(users, course_id, save=True):
+    """
+    Return a dict mapping the id of each of `users` to their anonymous id in
+    `course_id`, as anonymous_id_for_user would, with a few queries per batch of
+    users rather than one per user.
+
+    The ids are also remembered on the user objects, so that anonymous_id_for_user
+    doesn't have to query for them again.
+
+    Keyword arguments:
+    save -- Whether the missing ids should be saved in AnonymousUserId objects.
+    """
+    users = [user for user in users if not user.is_anonymous()]
+    anonymous_ids = dict((user.id, _anonymous_id_digest(user, course_id)) for user in users)
+    if save is False:
+        return anonymous_ids
+
+    for batch in _batches(users, ANONYMOUS_ID_BATCH_SIZE):
+        stored = dict(
+            AnonymousUserId.objects.filter(
+                course_id=course_id,
+                user__in=[user.id for user in batch],
+            ).values_list('user_id', 'anonymous_user_id')
+        )
+        for user_id, anonymous_user_id in stored.iteritems():
+            if anonymous_user_id != anonymous_ids[user_id]:
+                log.error(
+                    u"Stored anonymous user id %r for user %r "
+                    u"in course %r doesn't match computed id %r",
+                    anonymous_user_id,
+                    user_id,
+                    course_id,
+                    anonymous_ids[user_id]
+                )
+
+        missing = [user for user in batch if user.id not in stored]
+        if not missing:
+            continue
+        # Roll back only the failed insert, not the enclosing transaction
+        savepoint = transaction.savepoint()
+        try:
+            AnonymousUserId.objects.bulk_create([
+                AnonymousUserId(user=user, course_id=course_id, anonymous_user_id=anonymous_ids[user.id])
+                for user in missing
+            ])
+            transaction.savepoint_commit(savepoint)
+        except IntegrityError:
+            transaction.savepoint_rollback(savepoint)
+            # Another thread has created some of these entries, so create the
+            # others one by one
+            for user in missing:
+                _save_anonymous_id(user, course_id, anonymous_ids[user.id])
+
+    return anonymous_ids
+
+
+def _batches(items, batch_size):
+    """
+    Yield the items of the list `items` in lists of `batch_size` items.
+    """
+    for start in xrange(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -153,6 +241,20 @@ def user_by_anonymous_id(uid):
         return None
 
 
+def users_by_anonymous_ids(uids):
+    """
+    Return a dict mapping each of the anonymous user ids `uids` to its user,
+    using the AnonymousUserId lookup table with a query per batch of ids.
+
+    The ids which don't belong to a user are left out.
+    """
+    users = {}
+    for batch in _batches(list(set(uid for uid in uids if uid is not None)), ANONYMOUS_ID_BATCH_SIZE):
+        for anonymous_user_id in AnonymousUserId.objects.filter(anonymous_user_id__in=batch).select_related('user'):
+            users[anonymous_user_id.anonymous_user_id] = anonymous_user_id.user
+    return users
+
+
 class UserStanding(models.Model):
     """
     This table contains a student's account's status.
@@ -771,6 +873,107 @@ class CourseEnrollment(models.Model):
             "[CourseEnrollment] {}: {} ({}); active: ({})"
         ).format(self.user, self.course_id, self.created, self.is_active)
 
+    # The fields of an enrollment which are cached
+    CACHED_FIELDS = ('id', 'course_id', 'created', 'is_active', 'mode')
+
+    # The django cache, shared by the LMS and Studio, in which enrollments are cached between requests
+    ENROLLMENTS_CACHE_NAME = 'course_enrollments'
+
+    # The key, in the request cache, of the ids of the users whose enrollments the request changed
+    CHANGED_ENROLLMENTS_KEY = u"student.enrollments.changed"
+
+    @classmethod
+    def _shared_enrollments_cache(cls):
+        """
+        Return the django cache in which enrollments are cached between requests,
+        or None if it isn't configured.
+        """
+        try:
+            return get_cache(cls.ENROLLMENTS_CACHE_NAME)
+        except InvalidCacheBackendError:
+            return None
+
+    @classmethod
+    def _enrollments_cache_key(cls, user_id):
+        """
+        The key of the enrollments of the user `user_id` in the request cache
+        and the django cache.
+        """
+        return u"student.enrollments.{}".format(user_id)
+
+    @classmethod
+    def _cached_enrollments(cls, user):
+        """
+        Return a dict mapping the id of each course `user` has an enrollment in,
+        as stored in the database, to the CACHED_FIELDS of the enrollment.
+
+        The enrollments are read with a single query, and cached for the rest
+        of the request and, for settings.COURSE_ENROLLMENTS_CACHE_TIMEOUT
+        seconds, in the 'course_enrollments' django cache.  Enrollments the
+        request changed aren't put in the django cache, as the change may yet
+        be rolled back.
+        """
+        if user.id is None:
+            return {}
+
+        request_cache = RequestCache.get_request_cache().data
+        cache_key = cls._enrollments_cache_key(user.id)
+        enrollments = request_cache.get(cache_key)
+        if enrollments is not None:
+            return enrollments
+
+        timeout = getattr(settings, 'COURSE_ENROLLMENTS_CACHE_TIMEOUT', 0)
+        shared_cache = cls._shared_enrollments_cache() if timeout else None
+        enrollments = shared_cache.get(cache_key) if shared_cache is not None else None
+        if enrollments is None:
+            # values() returns the course ids as stored, rather than as keys
+            enrollments = dict(
+                (enrollment['course_id'], enrollment)
+                for enrollment in cls.objects.filter(user_id=user.id).values(*cls.CACHED_FIELDS)
+            )
+            if shared_cache is not None and user.id not in request_cache.get(cls.CHANGED_ENROLLMENTS_KEY, ()):
+                shared_cache.set(cache_key, enrollments, timeout)
+
+        request_cache[cache_key] = enrollments
+        return enrollments
+
+    @classmethod
+    def _cached_enrollment(cls, user, course_key):
+        """
+        Return the CACHED_FIELDS of the enrollment of `user` in `course_key`, or None.
+        """
+        stored_course_id = cls._meta.get_field('course_id').get_prep_value(course_key)
+        return cls._cached_enrollments(user).get(stored_course_id)
+
+    @classmethod
+    def clear_enrollments_cache(cls, user_id):
+        """
+        Forget the cached enrollments of the user `user_id`.
+
+        Other requests may cache them again before this request's transaction
+        ends, so they are forgotten again then, by
+        `clear_changed_enrollments_caches`.
+        """
+        request_cache = RequestCache.get_request_cache().data
+        cache_key = cls._enrollments_cache_key(user_id)
+        request_cache.pop(cache_key, None)
+        request_cache.setdefault(cls.CHANGED_ENROLLMENTS_KEY, set()).add(user_id)
+        shared_cache = cls._shared_enrollments_cache()
+        if shared_cache is not None:
+            shared_cache.delete(cache_key)
+
+    @classmethod
+    def clear_changed_enrollments_caches(cls):
+        """
+        Forget the enrollments cached between requests for the users whose
+        enrollments this request changed.  Call it once the request's
+        transaction has been committed or rolled back.
+        """
+        changed = RequestCache.get_request_cache().data.pop(cls.CHANGED_ENROLLMENTS_KEY, ())
+        shared_cache = cls._shared_enrollments_cache()
+        if changed and shared_cache is not None:
+            shared_cache.delete_many([cls._enrollments_cache_key(user_id) for user_id in changed])
+
     @classmethod
     def get_or_create_enrollment(cls, user, course_key):
         """
@@ -823,13 +1026,10 @@ class CourseEnrollment(models.Model):
         Returns:
             Course enrollment object or None
         """
-        try:
-            return CourseEnrollment.objects.get(
-                user=user,
-                course_id=course_key
-            )
-        except cls.DoesNotExist:
+        enrollment = cls._cached_enrollment(user, course_key)
+        if enrollment is None:
             return None
+        return cls(user=user, **enrollment)
 
     @classmethod
     def num_enrolled_in(cls, course_id):
@@ -1131,11 +1331,8 @@ class CourseEnrollment(models.Model):
 
         `course_id` is our usual course_id string (e.g. "edX/Test101/2013_Fall)
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_key)
-            return record.is_active
-        except cls.DoesNotExist:
-            return False
+        enrollment = cls._cached_enrollment(user, course_key)
+        return enrollment is not None and enrollment['is_active']
 
     @classmethod
     def is_enrolled_by_partial(cls, user, course_id_partial):
@@ -1156,14 +1353,10 @@ class CourseEnrollment(models.Model):
         assert not course_id_partial.run  # None or empty string
         course_key = SlashSeparatedCourseKey(course_id_partial.org, course_id_partial.course, '')
         querystring = unicode(course_key.to_deprecated_string())
-        try:
-            return CourseEnrollment.objects.filter(
-                user=user,
-                course_id__startswith=querystring,
-                is_active=1
-            ).exists()
-        except cls.DoesNotExist:
-            return False
+        return any(
+            course_id.startswith(querystring) and enrollment['is_active']
+            for course_id, enrollment in cls._cached_enrollments(user).iteritems()
+        )
 
     @classmethod
     def enrollment_mode_for_user(cls, user, course_id):
@@ -1177,11 +1370,10 @@ class CourseEnrollment(models.Model):
             and is_active is whether the enrollment is active.
         Returns (None, None) if the courseenrollment record does not exist.
         """
-        try:
-            record = CourseEnrollment.objects.get(user=user, course_id=course_id)
-            return (record.mode, record.is_active)
-        except cls.DoesNotExist:
+        enrollment = cls._cached_enrollment(user, course_id)
+        if enrollment is None:
             return (None, None)
+        return (enrollment['mode'], enrollment['is_active'])
 
     @classmethod
     def enrollments_for_user(cls, user):
@@ -1275,6 +1467,34 @@ class CourseEnrollment(models.Model):
         return CourseMode.is_verified_slug(self.mode)
 
 
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_delete, sender=CourseEnrollment)
+def clear_enrollments_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the cached enrollments of the user of an enrollment which changed.
+    """
+    CourseEnrollment.clear_enrollments_cache(instance.user_id)
+
+
+@task_postrun.connect
+def clear_changed_enrollments_caches_after_task(**kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the enrollments cached for the users whose enrollments a celery task
+    changed, once it is done.
+    """
+    CourseEnrollment.clear_changed_enrollments_caches()
+
+
+@receiver(post_save, sender=User)
+def clear_new_user_enrollments_cache(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget any enrollments cached for the id of a new user, in case the id was
+    used before (e.g. by a user whose creation was rolled back).
+    """
+    if created:
+        CourseEnrollment.clear_enrollments_cache(instance.id)
+
+
 class CourseEnrollmentAllowed(models.Model):
     """
     Table of users (specified by email address strings) who are allowed to enroll in a specified course.
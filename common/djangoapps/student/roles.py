@@ -4,6 +4,7 @@ adding users, removing users, and listing members
 """
 
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 
 from django.contrib.auth.models import User
 import logging
@@ -36,23 +37,56 @@ def register_access_role(cls):
 
 class RoleCache(object):
     """
-    A cache of the CourseAccessRoles held by a particular user
+    A cache of the CourseAccessRoles held by a particular user, indexed for
+    constant-time lookups
     """
     def __init__(self, user):
-        self._roles = set(
-            CourseAccessRole.objects.filter(user=user).all()
-        )
+        self._roles = set()
+        self._course_roles = defaultdict(set)
+        self._org_roles = defaultdict(set)
+        for access_role in CourseAccessRole.objects.filter(user=user).only('role', 'course_id', 'org'):
+            self._roles.add((access_role.role, access_role.course_id, access_role.org))
+            if access_role.course_id is None:
+                self._org_roles[access_role.org].add(access_role.role)
+            else:
+                self._course_roles[access_role.course_id].add(access_role.role)
 
     def has_role(self, role, course_id, org):
         """
         Return whether this RoleCache contains a role with the specified role, course_id, and org
         """
-        return any(
-            access_role.role == role and
-            access_role.course_id == course_id and
-            access_role.org == org
-            for access_role in self._roles
-        )
+        return (role, course_id, org) in self._roles
+
+    def course_roles(self, course_key):
+        """
+        Return the set of the names of the roles held in the course with
+        `course_key`, either in the course itself or in its whole org
+        """
+        return self._course_roles.get(course_key, set()) | self._org_roles.get(course_key.org, set())
+
+
+def get_role_cache(user):
+    """
+    Return the RoleCache of `user`, creating it on first use.  It is kept on
+    the user object, so it lasts as long as that does: usually one request.
+    """
+    # pylint: disable=protected-access
+    if not hasattr(user, '_roles'):
+        user._roles = RoleCache(user)
+    return user._roles
+
+
+def get_course_roles(user, course_keys):
+    """
+    Return a dict mapping each of `course_keys` to the set of the names of
+    the roles `user` holds in that course, directly or through its org, from
+    a single query.
+    """
+    if not (user.is_authenticated() and user.is_active):
+        return {course_key: set() for course_key in course_keys}
+
+    cache = get_role_cache(user)
+    return {course_key: cache.course_roles(course_key) for course_key in course_keys}
 
 
 class AccessRole(object):
@@ -137,13 +171,7 @@ class RoleBase(AccessRole):
         if not (user.is_authenticated() and user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(user, '_roles'):
-            # Cache a list of tuples identifying the particular roles that a user has
-            # Stored as tuples, rather than django models, to make it cheaper to construct objects for comparison
-            user._roles = RoleCache(user)
-
-        return user._roles.has_role(self._role_name, self.course_key, self.org)
+        return get_role_cache(user).has_role(self._role_name, self.course_key, self.org)
 
     def add_users(self, *users):
         """
@@ -328,11 +356,7 @@ class UserBasedRole(object):
         if not (self.user.is_authenticated() and self.user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(self.user, '_roles'):
-            self.user._roles = RoleCache(self.user)
-
-        return self.user._roles.has_role(self.role, course_key, course_key.org)
+        return get_role_cache(self.user).has_role(self.role, course_key, course_key.org)
 
     def add_course(self, *course_keys):
         """
@@ -15,6 +15,7 @@ from xmodule.error_module import ErrorDescriptor
 from django.test.client import Client
 from student.models import CourseEnrollment
 from student.views import get_course_enrollment_pairs
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.milestones_helpers import (
     get_pre_requisite_courses_not_completed,
     set_prerequisite_courses,
@@ -91,6 +92,9 @@ class TestCourseListing(ModuleStoreTestCase):
         course_key = mongo_store.make_course_key('Org1', 'Course1', 'Run1')
         self._create_course_with_access_groups(course_key, default_store=ModuleStoreEnum.Type.mongo)
 
+        # Make the dashboard load the course from the modulestore.
+        CourseOverview.objects.all().delete()
+
         with patch('xmodule.modulestore.mongo.base.MongoKeyValueStore', Mock(side_effect=Exception)):
             self.assertIsInstance(modulestore().get_course(course_key), ErrorDescriptor)
 
@@ -110,7 +114,7 @@ class TestCourseListing(ModuleStoreTestCase):
 
         course_location = mongo_store.make_course_key('testOrg', 'doomedCourse', 'RunBabyRun')
         self._create_course_with_access_groups(course_location, default_store=ModuleStoreEnum.Type.mongo)
-        mongo_store.delete_course(course_location, ModuleStoreEnum.UserID.test)
+        self.store.delete_course(course_location, ModuleStoreEnum.UserID.test)
 
         course_location = mongo_store.make_course_key('testOrg', 'erroredCourse', 'RunBabyRun')
         course = self._create_course_with_access_groups(course_location, default_store=ModuleStoreEnum.Type.mongo)
@@ -125,6 +129,7 @@ class TestCourseListing(ModuleStoreTestCase):
                 'metadata.tabs': course_db_record['metadata']['tabs'],
             }},
         )
+        CourseOverview.objects.filter(id=course_location).delete()
 
         courses_list = list(get_course_enrollment_pairs(self.student, None, []))
         self.assertEqual(len(courses_list), 1, courses_list)
@@ -9,7 +9,7 @@ from student.tests.factories import AnonymousUserFactory
 
 from student.roles import (
     GlobalStaff, CourseRole, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole
+    OrgStaffRole, OrgInstructorRole, RoleCache, CourseBetaTesterRole, get_course_roles
 )
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
@@ -191,3 +191,30 @@ class RoleCacheTestCase(TestCase):
     def test_empty_cache(self, role, target):
         cache = RoleCache(self.user)
         self.assertFalse(cache.has_role(*target))
+
+    def test_course_roles(self):
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        OrgInstructorRole(self.IN_KEY.org).add_users(self.user)
+        cache = RoleCache(self.user)
+
+        self.assertEqual(cache.course_roles(self.IN_KEY), {'staff', 'instructor'})
+        self.assertEqual(cache.course_roles(self.NOT_IN_KEY), {'instructor'})
+        self.assertEqual(cache.course_roles(SlashSeparatedCourseKey('edX2', 'toy', '2012_Fall')), set())
+
+    def test_get_course_roles(self):
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        CourseBetaTesterRole(self.NOT_IN_KEY).add_users(self.user)
+        other_key = SlashSeparatedCourseKey('edX2', 'toy', '2012_Fall')
+
+        with self.assertNumQueries(1):
+            roles = get_course_roles(self.user, [self.IN_KEY, self.NOT_IN_KEY, other_key])
+            self.assertTrue(CourseStaffRole(self.IN_KEY).has_user(self.user))
+        self.assertEqual(roles, {
+            self.IN_KEY: {'staff'},
+            self.NOT_IN_KEY: {'beta_testers'},
+            other_key: set(),
+        })
+
+    def test_get_course_roles_anonymous(self):
+        CourseStaffRole(self.IN_KEY).add_users(self.user)
+        self.assertEqual(get_course_roles(AnonymousUserFactory(), [self.IN_KEY]), {self.IN_KEY: set()})
@@ -14,18 +14,23 @@ import ddt
 from django.conf import settings
 from django.contrib.auth.models import User, AnonymousUser
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import get_cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from django.test.client import RequestFactory, Client
+from django.test.utils import override_settings
 from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
 from student.models import (
-    anonymous_id_for_user, user_by_anonymous_id, CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
+    anonymous_id_for_user, anonymous_ids_for_users, user_by_anonymous_id, users_by_anonymous_ids, AnonymousUserId,
+    CourseEnrollment, unique_id_for_user, LinkedInAddToProfileConfiguration
 )
 from student.views import (process_survey_link, _cert_info,
                            change_enrollment, complete_course_mode_info)
+from student.middleware import EnrollmentsCacheMiddleware
 from student.tests.factories import UserFactory, CourseModeFactory
+from request_cache.middleware import RequestCache
 from util.testing import EventTestMixin
 from util.model_utils import USER_SETTINGS_CHANGED_EVENT_NAME
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -402,6 +407,29 @@ class DashboardTest(ModuleStoreTestCase):
 
         self.assertFalse(enrollment.refundable())
 
+    @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
+    def test_notpassing_certificate(self):
+        # The grade required for a certificate is read from the course's overview
+        self.client.login(username="jack", password="test")
+        CourseEnrollment.enroll(self.user, self.course.id, mode='honor')
+
+        self.course.start = datetime.now(pytz.UTC) - timedelta(days=2)
+        self.course.end = datetime.now(pytz.UTC) - timedelta(days=1)
+        self.course = self.update_course(self.course, self.user.id)
+
+        GeneratedCertificateFactory.create(
+            user=self.user,
+            course_id=self.course.id,
+            status=CertificateStatuses.notpassing,
+            mode='honor',
+            grade='0.3',
+        )
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertEquals(response.status_code, 200)
+        self.assertContains(response, 'Grade required for a')
+        self.assertContains(response, '{0:.0f}%'.format(self.course.lowest_passing_grade * 100))
+
     @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
     def test_linked_in_add_to_profile_btn_not_appearing_without_config(self):
         # Without linked-in config don't show Add Certificate to LinkedIn button
@@ -734,6 +762,73 @@ class EnrollInCourseTest(EnrollmentEventTestMixin, TestCase):
         CourseEnrollment.enroll(user, course_id, "honor")
         self.assert_enrollment_mode_change_event_was_emitted(user, course_id, "honor")
 
+    def assert_enrollments_read_once(self, user, queries=1):
+        """
+        Assert that all the enrollment checks of `user` make `queries` queries together.
+        """
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        with self.assertNumQueries(queries):
+            self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+            self.assertFalse(CourseEnrollment.is_enrolled(user, SlashSeparatedCourseKey("edX", "Test102", "2013")))
+            self.assertTrue(
+                CourseEnrollment.is_enrolled_by_partial(user, SlashSeparatedCourseKey("edX", "Test101", None))
+            )
+            self.assertEqual(CourseEnrollment.enrollment_mode_for_user(user, course_id), ("audit", True))
+            self.assertEqual(CourseEnrollment.get_enrollment(user, course_id).mode, "audit")
+
+    def test_enrollments_cached_per_request(self):
+        user = User.objects.create(username="justin", email="jh@fake.edx.org")
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        CourseEnrollment.enroll(user, course_id, "audit")
+        RequestCache().clear_request_cache()
+        self.assert_enrollments_read_once(user)
+        self.assert_enrollments_read_once(user, queries=0)
+
+        # Changing an enrollment through another User object updates the cache
+        CourseEnrollment.unenroll(User.objects.get(id=user.id), course_id)
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+
+    def end_request(self):
+        """
+        Do what the middleware does at the end of a request.
+        """
+        EnrollmentsCacheMiddleware().process_response(None, None)
+        RequestCache().clear_request_cache()
+
+    @override_settings(COURSE_ENROLLMENTS_CACHE_TIMEOUT=60)
+    def test_enrollments_cached_between_requests(self):
+        get_cache('course_enrollments').clear()
+        user = User.objects.create(username="justin", email="jh@fake.edx.org")
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        CourseEnrollment.enroll(user, course_id, "audit")
+        self.end_request()
+        self.assert_enrollments_read_once(user)
+        RequestCache().clear_request_cache()
+        self.assert_enrollments_read_once(user, queries=0)
+
+        CourseEnrollment.get_enrollment(user, course_id).deactivate()
+        RequestCache().clear_request_cache()
+        self.assertFalse(CourseEnrollment.is_enrolled(user, course_id))
+
+    @override_settings(COURSE_ENROLLMENTS_CACHE_TIMEOUT=60)
+    def test_enrollments_changed_by_request_not_shared_until_it_ends(self):
+        get_cache('course_enrollments').clear()
+        user = User.objects.create(username="justin", email="jh@fake.edx.org")
+        course_id = SlashSeparatedCourseKey("edX", "Test101", "2013")
+        self.end_request()
+        shared_cache = get_cache('course_enrollments')
+        cache_key = CourseEnrollment._enrollments_cache_key(user.id)  # pylint: disable=protected-access
+
+        CourseEnrollment.enroll(user, course_id, "audit")
+        # the enrollment isn't committed yet, so this request doesn't share it
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+        self.assertIsNone(shared_cache.get(cache_key))
+
+        # and what another request caches before the end of this one is forgotten
+        shared_cache.set(cache_key, {}, 60)
+        self.end_request()
+        self.assertTrue(CourseEnrollment.is_enrolled(user, course_id))
+
 
 @unittest.skipUnless(settings.ROOT_URLCONF == 'lms.urls', 'Test only valid in lms')
 class ChangeEnrollmentViewTest(ModuleStoreTestCase):
@@ -884,3 +979,38 @@ class AnonymousLookupTable(ModuleStoreTestCase):
         real_user = user_by_anonymous_id(anonymous_id)
         self.assertEqual(self.user, real_user)
         self.assertEqual(anonymous_id, anonymous_id_for_user(self.user, course2.id, save=False))
+
+    def test_bulk_roundtrip(self):
+        users = [self.user, UserFactory(), UserFactory()]
+        anonymous_id_for_user(users[0], self.course.id)
+
+        # One query to find the stored ids and one to create the others.
+        with self.assertNumQueries(2):
+            anonymous_ids = anonymous_ids_for_users(users, self.course.id)
+        self.assertEqual(len(set(anonymous_ids.values())), 3)
+        with self.assertNumQueries(0):
+            for user in users:
+                self.assertEqual(anonymous_ids[user.id], anonymous_id_for_user(user, self.course.id))
+
+        with self.assertNumQueries(1):
+            real_users = users_by_anonymous_ids(anonymous_ids.values() + ['unknown', None])
+        self.assertEqual(real_users, dict((anonymous_ids[user.id], user) for user in users))
+
+    def test_bulk_with_concurrent_creation(self):
+        users = [self.user, UserFactory(), UserFactory()]
+        bulk_create = AnonymousUserId.objects.bulk_create
+
+        def bulk_create_after_another_thread(anonymous_user_ids):
+            """
+            Create the id of the second user, as another thread would, then the ids.
+            """
+            anonymous_id_for_user(User.objects.get(id=users[1].id), self.course.id)
+            return bulk_create(anonymous_user_ids)
+
+        with patch.object(AnonymousUserId.objects, 'bulk_create', side_effect=bulk_create_after_another_thread):
+            anonymous_ids = anonymous_ids_for_users(users, self.course.id)
+
+        self.assertEqual(AnonymousUserId.objects.filter(course_id=self.course.id).count(), 3)
+        self.assertEqual(users_by_anonymous_ids(anonymous_ids.values()), dict(
+            (anonymous_ids[user.id], user) for user in users
+        ))
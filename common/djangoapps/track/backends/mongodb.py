@@ -2,11 +2,20 @@
 
 from __future__ import absolute_import
 
+import atexit
+import glob
+import itertools
 import logging
+import os
+import Queue
+import tempfile
+import threading
+import time
 
+import bson
 import pymongo
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import ConnectionFailure, PyMongoError
 
 from track.backends import BaseBackend
 
@@ -95,3 +104,225 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+
+class BufferedMongoBackend(MongoBackend):
+    """
+    A MongoDB event tracker backend which inserts events from a background
+    thread, in batches, so that sending an event doesn't wait for MongoDB.
+
+    Events that can't be inserted, because MongoDB is down, the buffer is
+    full or the backend is closed, are written to files in `spill_directory`
+    if there is one, and inserted once MongoDB accepts events again.
+    Otherwise they are dropped.  Events that can't be inserted for any other
+    reason (e.g. they can't be encoded) are dropped.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Connect to a MongoDB.
+
+        :Parameters:
+
+          Those of `MongoBackend`, and:
+
+          - `batch_size`: the most events to insert at once
+          - `flush_interval`: the most seconds an event waits to be inserted
+          - `max_buffer_size`: the most events waiting to be inserted
+          - `block_timeout`: how many seconds `send` waits for room in a full
+            buffer before giving up on the event
+          - `spill_directory`: where to keep events that couldn't be
+            inserted, or None to drop them
+
+        """
+        super(BufferedMongoBackend, self).__init__(**kwargs)
+
+        self.batch_size = kwargs.get('batch_size', 100)
+        self.flush_interval = kwargs.get('flush_interval', 1.0)
+        self.block_timeout = kwargs.get('block_timeout', 0)
+        self.spill_directory = kwargs.get('spill_directory')
+        if self.spill_directory and not os.path.isdir(self.spill_directory):
+            os.makedirs(self.spill_directory)
+
+        self.buffer = Queue.Queue(kwargs.get('max_buffer_size', 10000))
+        self.counters = dict.fromkeys(['flushed', 'spilled', 'replayed', 'dropped'], 0)
+        self._counters_lock = threading.Lock()
+        self._spill_count = itertools.count()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._pid = None
+        self._stopping = threading.Event()
+
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event to be inserted in to the Mongo collection"""
+        if self._stopping.is_set():
+            # Nothing will insert it any more.
+            self._spill([event])
+            return
+        self._ensure_thread()
+        try:
+            if self.block_timeout:
+                self.buffer.put(event, timeout=self.block_timeout)
+            else:
+                self.buffer.put_nowait(event)
+        except Queue.Full:
+            self._spill([event])
+
+    def _ensure_thread(self):
+        """Start the thread that inserts the events, in this process"""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                # Threads don't survive a fork, so a forked process needs its own.
+                self._thread = threading.Thread(target=self._run, name='BufferedMongoBackend')
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _count(self, counter, amount):
+        """Add `amount` to `counter`"""
+        with self._counters_lock:
+            self.counters[counter] += amount
+
+    def stats(self):
+        """Return the counts of flushed, spilled, replayed and dropped events"""
+        with self._counters_lock:
+            return dict(self.counters, buffered=self.buffer.qsize())
+
+    def _next_batch(self):
+        """
+        Return the next batch of events: as many as arrive, up to
+        `batch_size`, within `flush_interval` of the first one.
+        """
+        try:
+            batch = [self.buffer.get(timeout=self.flush_interval)]
+        except Queue.Empty:
+            return []
+
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self.buffer.get(timeout=remaining))
+                else:
+                    batch.append(self.buffer.get_nowait())
+            except Queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Insert the buffered events until the backend is closed"""
+        while not self._stopping.is_set():
+            try:
+                batch = self._next_batch()
+                inserted = self.flush(batch) if batch else True
+                if inserted and self.spill_directory:
+                    self._replay_spilled()
+            except Exception:  # pylint: disable=broad-except
+                # Keep inserting the events that follow.
+                log.exception('Error in the MongoDB event tracker backend')
+
+    def flush(self, batch):
+        """
+        Insert the events in `batch`, spilling them if MongoDB is unavailable.
+        Returns whether MongoDB was available.
+
+        If the batch fails for another reason, its events are inserted one by
+        one so that only the ones that can't be are dropped.
+        """
+        try:
+            self.collection.insert(batch, manipulate=False, continue_on_error=True)
+        except ConnectionFailure:
+            log.exception('Error inserting to MongoDB event tracker backend')
+            self._spill(batch)
+            return False
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error inserting to MongoDB event tracker backend')
+            return self._flush_one_by_one(batch)
+        self._count('flushed', len(batch))
+        return True
+
+    def _flush_one_by_one(self, batch):
+        """
+        Insert the events in `batch` one at a time, dropping the ones that
+        can't be inserted.  Returns whether MongoDB was available.
+        """
+        for index, event in enumerate(batch):
+            try:
+                self.collection.insert(event, manipulate=False)
+            except ConnectionFailure:
+                self._spill(batch[index:])
+                return False
+            except Exception:  # pylint: disable=broad-except
+                log.exception('Dropping event which could not be inserted: %r', event)
+                self._count('dropped', 1)
+            else:
+                self._count('flushed', 1)
+        return True
+
+    def close(self):
+        """Insert, or else spill, the events that are still buffered"""
+        self._stopping.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(self.flush_interval * 2)
+
+        batch = []
+        while True:
+            try:
+                batch.append(self.buffer.get_nowait())
+            except Queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+
+    def _spill(self, events):
+        """Write `events` to a new file in the spill directory, or drop them"""
+        if not self.spill_directory:
+            self._count('dropped', len(events))
+            return
+
+        # Named so that they sort oldest first
+        name = 'events-{:.6f}-{}-{}.bson'.format(time.time(), os.getpid(), next(self._spill_count))
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.spill_directory, suffix='.partial', delete=False) as spill:
+                for event in events:
+                    spill.write(bson.BSON.encode(event))
+            os.rename(spill.name, os.path.join(self.spill_directory, name))
+        except (EnvironmentError, bson.errors.BSONError):
+            log.exception('Error spilling events from the MongoDB event tracker backend')
+            self._count('dropped', len(events))
+        else:
+            self._count('spilled', len(events))
+
+    def _replay_spilled(self):
+        """Insert the events of the oldest spilled file, if there is one"""
+        paths = sorted(glob.glob(os.path.join(self.spill_directory, '*.bson')))
+        if not paths:
+            return
+
+        # Claim the file, so that no other process replays it too.
+        claimed = '{}.{}.replaying'.format(paths[0], os.getpid())
+        try:
+            os.rename(paths[0], claimed)
+        except OSError:
+            return
+
+        try:
+            with open(claimed, 'rb') as spill:
+                events = bson.decode_all(spill.read())
+            if events:
+                self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except PyMongoError:
+            # MongoDB is still unavailable; try again later.
+            os.rename(claimed, paths[0])
+            return
+        except (EnvironmentError, bson.errors.BSONError):
+            log.exception('Error replaying spilled events in %s', claimed)
+            return
+
+        os.remove(claimed)
+        self._count('replayed', len(events))
@@ -1,10 +1,17 @@
 from __future__ import absolute_import
 
+import os
+import shutil
+import tempfile
+import time
+
+from bson.errors import InvalidDocument
 from mock import patch
+from pymongo.errors import AutoReconnect
 
 from django.test import TestCase
 
-from track.backends.mongodb import MongoBackend
+from track.backends.mongodb import BufferedMongoBackend, MongoBackend
 
 
 class TestMongoBackend(TestCase):
@@ -36,3 +43,107 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+
+class TestBufferedMongoBackend(TestCase):
+    def setUp(self):
+        self.mongo_patcher = patch('track.backends.mongodb.MongoClient')
+        self.addCleanup(self.mongo_patcher.stop)
+        self.mongo_patcher.start()
+
+        self.spill_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spill_directory)
+
+    def make_backend(self, **kwargs):
+        backend = BufferedMongoBackend(**kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def inserted_batches(self, backend):
+        return [args[0] for _, args, _ in backend.collection.insert.mock_calls]
+
+    def test_batches(self):
+        backend = self.make_backend(batch_size=2, flush_interval=0.01)
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+        with patch.object(backend, '_ensure_thread'):
+            for event in events:
+                backend.send(event)
+
+        self.assertEqual(backend._next_batch(), events[:2])  # pylint: disable=protected-access
+        self.assertEqual(backend._next_batch(), events[2:])  # pylint: disable=protected-access
+        self.assertEqual(backend._next_batch(), [])  # pylint: disable=protected-access
+
+    def test_background_flush(self):
+        backend = self.make_backend(flush_interval=0.01)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        backend.close()
+
+        self.assertEqual(sum(self.inserted_batches(backend), []), [{'test': 1}, {'test': 2}])
+        self.assertEqual(backend.stats()['flushed'], 2)
+
+    def test_full_buffer_drops(self):
+        backend = self.make_backend(max_buffer_size=1)
+        with patch.object(backend, '_ensure_thread'):
+            backend.send({'test': 1})
+            backend.send({'test': 2})
+
+        self.assertEqual(backend.stats()['dropped'], 1)
+        self.assertEqual(backend.stats()['buffered'], 1)
+
+    def test_spill_and_replay(self):
+        backend = self.make_backend(spill_directory=self.spill_directory)
+        events = [{'test': 1}, {'test': 2}]
+
+        backend.collection.insert.side_effect = AutoReconnect
+        self.assertFalse(backend.flush(events))
+        self.assertEqual(len(os.listdir(self.spill_directory)), 1)
+        # MongoDB is still down, so the events stay spilled.
+        backend._replay_spilled()  # pylint: disable=protected-access
+        self.assertEqual(len(os.listdir(self.spill_directory)), 1)
+
+        backend.collection.insert.side_effect = None
+        backend._replay_spilled()  # pylint: disable=protected-access
+        self.assertEqual(os.listdir(self.spill_directory), [])
+        self.assertEqual(self.inserted_batches(backend)[-1], events)
+        self.assertEqual(backend.stats()['spilled'], 2)
+        self.assertEqual(backend.stats()['replayed'], 2)
+
+    def test_bad_event_is_dropped_alone(self):
+        backend = self.make_backend(spill_directory=self.spill_directory)
+        events = [{'test': 1}, {'test': 2}, {'test': 3}]
+
+        def insert(docs, **kwargs):  # pylint: disable=unused-argument
+            if isinstance(docs, list) or docs['test'] == 2:
+                raise InvalidDocument('cannot encode object')
+        backend.collection.insert.side_effect = insert
+
+        self.assertTrue(backend.flush(events))
+        self.assertEqual(backend.stats()['flushed'], 2)
+        self.assertEqual(backend.stats()['dropped'], 1)
+        self.assertEqual(os.listdir(self.spill_directory), [])
+
+    def test_thread_survives_errors(self):
+        backend = self.make_backend(flush_interval=0.01)
+        next_batch = backend._next_batch  # pylint: disable=protected-access
+        failures = [RuntimeError]
+
+        def fail_once():
+            if failures:
+                raise failures.pop()
+            return next_batch()
+
+        with patch.object(backend, '_next_batch', side_effect=fail_once):
+            backend.send({'test': 1})
+            deadline = time.time() + 5
+            while backend.stats()['flushed'] < 1 and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(backend.stats()['flushed'], 1)
+
+    def test_send_after_close_spills(self):
+        backend = self.make_backend(spill_directory=self.spill_directory)
+        backend.close()
+        backend.send({'test': 1})
+
+        self.assertEqual(backend.stats()['spilled'], 1)
+        self.assertEqual(len(os.listdir(self.spill_directory)), 1)
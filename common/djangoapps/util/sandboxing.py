@@ -1,9 +1,15 @@
 import re
 from django.conf import settings
+from django.core.cache import get_cache
+
+from capa.safe_exec import SafeExecCache
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# The process-wide cache of sandboxed execution results
+_SAFE_EXEC_CACHE = None
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -38,3 +44,25 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the process-wide `SafeExecCache` for the results of sandboxed code,
+    configured by settings.SAFE_EXEC_CACHE.
+
+    Its shared tier is the django cache named by SAFE_EXEC_CACHE['SHARED_CACHE'],
+    if any.
+    """
+    global _SAFE_EXEC_CACHE  # pylint: disable=global-statement
+    if _SAFE_EXEC_CACHE is None:
+        config = settings.SAFE_EXEC_CACHE
+        shared_cache_name = config.get('SHARED_CACHE')
+        _SAFE_EXEC_CACHE = SafeExecCache(
+            shared_cache=get_cache(shared_cache_name) if shared_cache_name else None,
+            max_entries=config.get('LOCAL_MAX_ENTRIES', 0),
+            local_timeout=config.get('LOCAL_TIMEOUT', 0),
+            timeout=config.get('TIMEOUT'),
+            max_value_size=config.get('MAX_RESULT_SIZE', 64 * 1024),
+        )
+    return _SAFE_EXEC_CACHE
@@ -4,9 +4,11 @@ Parser and evaluator for FormulaResponse and NumericalResponse
 Uses pyparsing to parse. Main function as of now is evaluator().
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
@@ -72,6 +74,13 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# The default functions that give the same results for an array of inputs as
+# they do for each of its elements, so that `evaluate_samples` may use them.
+VECTORIZED_FUNCTIONS = frozenset(DEFAULT_FUNCTIONS) - {'fact', 'factorial', 'arccot'}
+
+# Maximum number of parsed expressions kept by `parse_cached`.
+PARSE_CACHE_SIZE = 1000
+
 
 class UndefinedVariable(Exception):
     """
@@ -173,12 +182,14 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        # Compare only strings with the operators, as a numpy array (see
+        # `evaluate_samples`) would be compared elementwise.
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +202,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -216,6 +227,36 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+_PARSE_CACHE = OrderedDict()
+_PARSE_CACHE_LOCK = threading.Lock()
+
+
+def parse_cached(math_expr, case_sensitive=False):
+    """
+    Return a `ParseAugmenter` that has parsed `math_expr`.
+
+    Parsing with pyparsing is far slower than evaluating the resulting tree,
+    so the most recently used `PARSE_CACHE_SIZE` parses are kept and shared.
+    Callers must not modify the returned object. Expressions that fail to
+    parse are not cached; the parse error is raised each time.
+    """
+    key = (math_expr, case_sensitive)
+    with _PARSE_CACHE_LOCK:
+        math_interpreter = _PARSE_CACHE.pop(key, None)
+        if math_interpreter is not None:
+            _PARSE_CACHE[key] = math_interpreter
+            return math_interpreter
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    with _PARSE_CACHE_LOCK:
+        _PARSE_CACHE[key] = math_interpreter
+        while len(_PARSE_CACHE) > PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    return math_interpreter
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
@@ -229,8 +270,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = parse_cached(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -258,6 +298,114 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     return math_interpreter.reduce_tree(evaluate_actions)
 
 
+# The following evaluation actions replace those above when evaluating with
+# numpy arrays in place of numbers. Arrays aren't `numbers.Number`s, so they
+# tell values from operators by ruling out strings instead.
+
+def eval_atom_array(parse_result):
+    """
+    Return the value wrapped by the atom, ignoring any parentheses.
+    """
+    return next(k for k in parse_result if not isinstance(k, basestring))
+
+
+def eval_power_array(parse_result):
+    """
+    Exponentiate the values, right to left, as `eval_power` does.
+    """
+    parse_result = reversed([k for k in parse_result if not isinstance(k, basestring)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_array(parse_result):
+    """
+    Compute the parallel resistors operator, as `eval_parallel` does.
+
+    A zero input raises a FloatingPointError (see `evaluate_samples`) rather
+    than giving NaN.
+    """
+    values = [k for k in parse_result if not isinstance(k, basestring)]
+    if len(values) == 1:
+        return values[0]
+    return 1. / sum(1. / value for value in values)
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression at several sample points; return a list holding
+    what `evaluator` would return for each dict of variables in
+    `variables_list`.
+
+    All of the dicts must bind the same variables. The expression is parsed
+    once, and where possible it is evaluated just once, with each variable
+    bound to a numpy array of its sampled values. That isn't possible when
+    the expression uses functions that don't operate elementwise on arrays,
+    or when the evaluation would error or give a floating point warning for
+    some sample (e.g. division by zero); then each sample is evaluated by
+    `evaluator`, so results and errors are the same as calling it directly.
+    """
+    if not variables_list:
+        return []
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    math_interpreter = parse_cached(math_expr, case_sensitive)
+    all_variables, all_functions = add_defaults(variables_list[0], functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    if case_sensitive:
+        casify = lambda x: x
+        vectorized_functions = VECTORIZED_FUNCTIONS - set(functions)
+    else:
+        casify = lambda x: x.lower()
+        vectorized_functions = VECTORIZED_FUNCTIONS - set(lower_dict(functions))
+
+    names = set(variables_list[0])
+    can_vectorize = (
+        all(set(variables) == names for variables in variables_list) and
+        all(casify(func) in vectorized_functions for func in math_interpreter.functions_used)
+    )
+    for name in names:
+        if not can_vectorize:
+            break
+        values = [variables[name] for variables in variables_list]
+        # Only use arrays of all real or all complex values: integer arrays
+        # would silently overflow where python ints don't, and a real sample
+        # mixed into a complex array would get complex results (e.g. sqrt(-1)).
+        array = numpy.array(values)
+        can_vectorize = (
+            array.dtype.kind == 'f' or
+            (array.dtype.kind == 'c' and all(isinstance(value, complex) for value in values))
+        )
+        all_variables[casify(name)] = array
+
+    if can_vectorize:
+        evaluate_actions = {
+            'number': eval_number,
+            'variable': lambda x: all_variables[casify(x[0])],
+            'function': lambda x: all_functions[casify(x[0])](x[1]),
+            'atom': eval_atom_array,
+            'power': eval_power_array,
+            'parallel': eval_parallel_array,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+        try:
+            with numpy.errstate(all='raise'):
+                result = math_interpreter.reduce_tree(evaluate_actions)
+        except Exception:  # pylint: disable=broad-except
+            pass
+        else:
+            if numpy.ndim(result) == 0:
+                return [result] * len(variables_list)
+            return list(result)
+
+    return [
+        evaluator(variables, functions, math_expr, case_sensitive)
+        for variables in variables_list
+    ]
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
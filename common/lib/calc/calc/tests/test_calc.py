@@ -4,6 +4,7 @@ Unit tests for calc.py
 
 import unittest
 import numpy
+from mock import patch
 import calc
 from pyparsing import ParseException
 
@@ -559,3 +560,85 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parse_cached(self):
+        """
+        Check that parses are shared, per case sensitivity, and bounded
+        """
+        parsed = calc.parse_cached("x+1")
+        self.assertIs(parsed, calc.parse_cached("x+1"))
+        self.assertIsNot(parsed, calc.parse_cached("x+1", case_sensitive=True))
+
+        with patch('calc.calc.PARSE_CACHE_SIZE', 2):
+            calc.parse_cached("x+2")
+            calc.parse_cached("x+3")
+            self.assertIsNot(parsed, calc.parse_cached("x+1"))
+
+        with self.assertRaises(ParseException):
+            calc.parse_cached("x+")
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Check that calc.evaluate_samples gives what calc.evaluator would for
+    each sample, whether or not it can evaluate them as arrays
+    """
+
+    def assert_same_as_evaluator(self, variables_list, math_expr, functions=None, case_sensitive=False):
+        """
+        Compare evaluate_samples against evaluator at each sample.
+        """
+        functions = functions or {}
+        expected = [
+            calc.evaluator(variables, functions, math_expr, case_sensitive)
+            for variables in variables_list
+        ]
+        actual = calc.evaluate_samples(variables_list, functions, math_expr, case_sensitive)
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_vectorized(self):
+        """
+        Check that samples are evaluated together, as arrays, where possible
+        """
+        variables_list = [{'x': 0.5 * i, 'Y': 2.0 - i} for i in range(1, 10)]
+        with patch('calc.calc.evaluator') as mock_evaluator:
+            calc.evaluate_samples(variables_list, {}, "sin(x)^2 + x*y/(1+x^2) - 3||x")
+            self.assertFalse(mock_evaluator.called)
+        self.assert_same_as_evaluator(variables_list, "sin(x)^2 + x*y/(1+x^2) - 3||x")
+        self.assert_same_as_evaluator(variables_list, "-sqrt(x)*e^(i*pi*Y)")
+
+    def test_constant_expression(self):
+        """
+        Check that an expression without variables gives a value per sample
+        """
+        self.assertEqual(calc.evaluate_samples([{'x': 1.0}, {'x': 2.0}], {}, "2*3"), [6.0, 6.0])
+        nans = calc.evaluate_samples([{'x': 1.0}], {}, " ")
+        self.assertTrue(numpy.isnan(nans[0]))
+
+    def test_fallback(self):
+        """
+        Check that samples are evaluated one by one where arrays won't do
+        """
+        # Division by zero, and values outside a function's domain.
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples([{'x': 1.0}, {'x': 0.0}], {}, "1/x")
+        self.assert_same_as_evaluator([{'x': 1.0}, {'x': -1.0}], "sqrt(x) + arccos(x*2)")
+        self.assert_same_as_evaluator([{'x': 1.0}, {'x': 0.0}], "x||2")
+        # Functions that don't work elementwise on arrays.
+        self.assert_same_as_evaluator([{'x': 3.0}, {'x': 4.0}], "fact(x) + arccot(-x)")
+        self.assert_same_as_evaluator([{'x': 3.0}, {'x': 4.0}], "f(x)", functions={'f': lambda x: x if x > 3 else 0})
+        # Integer and mixed real and complex samples.
+        self.assert_same_as_evaluator([{'x': 10}, {'x': 20}], "x^20")
+        self.assert_same_as_evaluator([{'x': -1.0}, {'x': 1j}], "sqrt(x)")
+
+    def test_undefined_vars(self):
+        """
+        Check that undefined variables are caught
+        """
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples([{'x': 1.0}], {}, "x+y")
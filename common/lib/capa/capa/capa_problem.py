@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -58,6 +61,35 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# How many parsed problems, and contexts extracted from their scripts, are kept
+# for new instances of the same problems; see LoncapaProblem._get_template.
+TEMPLATE_CACHE_SIZE = 1000
+
+_TEMPLATE_CACHE = OrderedDict()
+_TEMPLATE_CACHE_LOCK = threading.Lock()
+
+
+def _get_cached_template(key):
+    """
+    Return the template cached under `key`, marking it as most recently used,
+    or None if it isn't cached.
+    """
+    with _TEMPLATE_CACHE_LOCK:
+        template = _TEMPLATE_CACHE.pop(key, None)
+        if template is not None:
+            _TEMPLATE_CACHE[key] = template
+        return template
+
+
+def _set_cached_template(key, template):
+    """
+    Cache `template` under `key`, evicting the least recently used templates.
+    """
+    with _TEMPLATE_CACHE_LOCK:
+        _TEMPLATE_CACHE[key] = template
+        while len(_TEMPLATE_CACHE) > TEMPLATE_CACHE_SIZE:
+            _TEMPLATE_CACHE.popitem(last=False)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -154,19 +186,9 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
-
-        # construct script processor context (eg for customresponse problems)
-        self.context = self._extract_context(self.tree)
+        # parse problem XML file into an element tree, and construct script processor
+        # context (eg for customresponse problems)
+        self.problem_text, self.tree, self.context = self._get_template(problem_text)
 
         # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
         # transformations.  This also creates the dict (self.responders) of Response
@@ -529,6 +551,54 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _get_template(self, problem_text):
+        """
+        Returns the problem text with startouttext and endouttext converted, its
+        tree with any <include> tags handled, and the context extracted from its
+        scripts.
+
+        Parsing the problem and executing its scripts is only done the first time
+        a problem is instantiated with the same text and seed, and, if its scripts
+        use it, the same anonymous_student_id: the results are cached, and copies
+        of them are returned, for the instance to modify.
+        """
+        encoded_text = problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+        text_key = (self.problem_id, hashlib.sha1(encoded_text).hexdigest())
+
+        parsed = _get_cached_template(text_key)
+        if parsed is None:
+            # Convert startouttext and endouttext to proper <text></text>
+            problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+            problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            # handle any <include file="foo"> tags
+            self._process_includes()
+
+            # Like safe_exec's cache, assume that scripts which don't mention a global don't use it.
+            uses_student_id = any(
+                'anonymous_student_id' in (script.text or '') for script in self.tree.iter('script')
+            )
+            parsed = (problem_text, self.tree, uses_student_id)
+            _set_cached_template(text_key, parsed)
+
+        problem_text, tree, uses_student_id = parsed
+        tree = deepcopy(tree)
+
+        student_id = self.capa_system.anonymous_student_id
+        context_key = text_key + (self.seed, student_id if uses_student_id else None)
+        context = _get_cached_template(context_key)
+        if context is None:
+            context = self._extract_context(tree)
+            _set_cached_template(context_key, deepcopy(context))
+        else:
+            context = deepcopy(context)
+            context['anonymous_student_id'] = student_id
+
+        return problem_text, tree, context
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -1,3 +1,4 @@
 """Capa's specialized use of codejail.safe_exec."""
 
-from .safe_exec import safe_exec, update_hash
+from .cache import SafeExecCache
+from .safe_exec import configure_worker_pool, safe_exec, update_hash
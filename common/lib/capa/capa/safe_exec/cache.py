@@ -0,0 +1,137 @@
+"""A two-tier cache for the results of capa's safe_exec."""
+
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+
+class SafeExecCache(object):
+    """
+    A cache of sandboxed execution results, for use as the `cache` argument
+    of `safe_exec`.
+
+    There are two tiers: an in-process LRU holding at most `max_entries`
+    results for at most `local_timeout` seconds and, optionally, a shared
+    django-style cache (anything with `get` and `set`) which is consulted on
+    local misses and written through on every `set`, with `timeout`.
+
+    `safe_exec` results are JSON-safe, so entries are kept locally as JSON:
+    every hit hands back a fresh copy the caller is free to mutate, and the
+    JSON is what `max_value_size` (in bytes) is measured against.  Results
+    larger than that are not cached at all.
+
+    Hits, misses and skipped results are counted, both on the instance
+    (see `stats()`) and as `capa.safe_exec.cache.*` datadog metrics.
+    """
+    def __init__(self, shared_cache=None, max_entries=1000, local_timeout=300, timeout=None, max_value_size=64 * 1024):
+        self.shared_cache = shared_cache
+        self.max_entries = max_entries
+        self.local_timeout = local_timeout
+        self.timeout = timeout
+        self.max_value_size = max_value_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.too_large = 0
+
+    def _local_get(self, key):
+        """
+        Return the JSON for `key` from the local LRU, marking it as most
+        recently used, or None if it is absent or has expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            expires, data = entry
+            if expires < time.time():
+                return None
+            self._entries[key] = entry
+            return data
+
+    def _local_set(self, key, data):
+        """
+        Store JSON in the local LRU, evicting the least recently used entries.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + self.local_timeout, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached result for `key`, or None if it isn't cached.
+        """
+        data = self._local_get(key)
+        if data is not None:
+            self.hits += 1
+            dog_stats_api.increment('capa.safe_exec.cache.hit', tags=['tier:local'])
+            return json.loads(data)
+
+        if self.shared_cache is not None:
+            try:
+                value = self.shared_cache.get(key)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Unable to read %s from the shared safe_exec cache", key)
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                dog_stats_api.increment('capa.safe_exec.cache.hit', tags=['tier:shared'])
+                self._local_set(key, json.dumps(value))
+                return value
+
+        self.misses += 1
+        dog_stats_api.increment('capa.safe_exec.cache.miss')
+        return None
+
+    def set(self, key, value):
+        """
+        Cache `value`, which must be JSON-serializable, under `key`, unless
+        it is larger than `max_value_size`.
+        """
+        data = json.dumps(value)
+        if len(data) > self.max_value_size:
+            self.too_large += 1
+            dog_stats_api.increment('capa.safe_exec.cache.too_large')
+            return
+
+        self._local_set(key, data)
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.set(key, value, self.timeout)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Unable to write %s to the shared safe_exec cache", key)
+
+    def clear(self):
+        """
+        Empty the local tier and reset the counters. The shared tier is left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.shared_hits = self.misses = self.too_large = 0
+
+    def stats(self):
+        """
+        Return a dict of the cache counters, including the overall hit rate.
+        """
+        hits = self.hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'too_large': self.too_large,
+            'hit_rate': float(hits) / lookups if lookups else 0.0,
+        }
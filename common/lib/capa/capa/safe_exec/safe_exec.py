@@ -4,9 +4,12 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import WorkerPool
 from dogapi import dog_stats_api
+from dogstats_wrapper import request_metrics
 
 import hashlib
+import re
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -46,6 +49,36 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# The pool of pre-started sandboxes to execute code in, if there is one.
+WORKER_POOL = None
+
+# Globals which differ between students but which most code never looks at.  They
+# are left out of the cache key when the code can't reach them (see `_unreachable_globals`),
+# so that students share cached results.
+PER_STUDENT_GLOBALS = ('anonymous_student_id',)
+
+# Names through which code could reach globals without naming them.
+INTROSPECTION_RE = re.compile(
+    r"\b(globals|locals|vars|eval|exec|execfile|compile|getattr|__import__|__main__|__dict__|"
+    r"__builtins__|__globals__|func_globals|f_globals|sys|inspect)\b"
+)
+
+
+def configure_worker_pool(size, max_requests=100, command=None):
+    """
+    Execute sandboxed code in a `WorkerPool` of `size` workers, which have
+    imported the modules in ASSUMED_IMPORTS in advance.  A `size` of 0 goes
+    back to starting a new sandbox for each execution.
+    """
+    global WORKER_POOL  # pylint: disable=global-statement
+    if WORKER_POOL is not None:
+        WORKER_POOL.close()
+    if size:
+        preload = [modname for __, modname in ASSUMED_IMPORTS]
+        WORKER_POOL = WorkerPool(size, max_requests=max_requests, preload=preload, command=command)
+    else:
+        WORKER_POOL = None
+
 
 def update_hash(hasher, obj):
     """
@@ -70,6 +103,22 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def _unreachable_globals(code, globals_dict, python_path, extra_files):
+    """
+    Return the names of the PER_STUDENT_GLOBALS in `globals_dict` which `code`
+    can't read or change, so which can't affect the results of executing it.
+
+    That is the case if the code doesn't mention them, doesn't use any of the
+    ways to reach globals by other names, and runs no code other than its own.
+    """
+    if python_path or extra_files or INTROSPECTION_RE.search(code):
+        return set()
+    return set(
+        name for name in PER_STUDENT_GLOBALS
+        if name in globals_dict and not re.search(r"\b{}\b".format(re.escape(name)), code)
+    )
+
+
 @dog_stats_api.timed('capa.safe_exec.time')
 def safe_exec(
     code,
@@ -97,9 +146,11 @@ def safe_exec(
     `extra_files` is a list of (filename, contents) pairs.  These files are
     created in the sandbox.
 
-    `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
-    to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    `cache` is an object with .get(key) and .set(key, value) methods, such as a
+    `SafeExecCache`.  It will be used to cache the execution, taking into account the
+    code, the values of the globals, and the random seed.  The PER_STUDENT_GLOBALS
+    (e.g. `anonymous_student_id`) are left out of the key and out of the cached results
+    when the code can't reach them, so that students share results.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -109,7 +160,10 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
+        ignored_names = _unreachable_globals(code, globals_dict, python_path, extra_files)
+        safe_globals = json_safe({
+            name: value for name, value in globals_dict.iteritems() if name not in ignored_names
+        })
         md5er = hashlib.md5()
         md5er.update(repr(code))
         update_hash(md5er, safe_globals)
@@ -130,15 +184,18 @@ def safe_exec(
     # Decide which code executor to use.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif WORKER_POOL is not None:
+        exec_fn = WORKER_POOL.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
     try:
-        exec_fn(
-            code_prolog + LAZY_IMPORTS + code, globals_dict,
-            python_path=python_path, extra_files=extra_files, slug=slug,
-        )
+        with request_metrics.measure('codejail'):
+            exec_fn(
+                code_prolog + LAZY_IMPORTS + code, globals_dict,
+                python_path=python_path, extra_files=extra_files, slug=slug,
+            )
     except SafeExecException as e:
         emsg = e.message
     else:
@@ -147,7 +204,9 @@ def safe_exec(
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
-        cleaned_results = json_safe(globals_dict)
+        cleaned_results = json_safe({
+            name: value for name, value in globals_dict.iteritems() if name not in ignored_names
+        })
         cache.set(key, (emsg, cleaned_results))
 
     # If an exception happened, raise it now.
@@ -0,0 +1,71 @@
+"""Test cache.py"""
+
+import unittest
+
+from mock import patch
+
+from capa.safe_exec import SafeExecCache
+
+
+class DictCache(dict):
+    """A minimal stand-in for a django cache backend."""
+
+    def set(self, key, value, timeout=None):  # pylint: disable=arguments-differ, unused-argument
+        self[key] = value
+
+
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two tiers of SafeExecCache."""
+
+    def test_miss_then_hit(self):
+        cache = SafeExecCache()
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', (None, {'a': [1, 2]}))
+        self.assertEqual(cache.get('key'), [None, {'a': [1, 2]}])
+        self.assertDictContainsSubset({'hits': 1, 'misses': 1, 'hit_rate': 0.5}, cache.stats())
+
+    def test_get_returns_copy(self):
+        cache = SafeExecCache()
+        cache.set('key', (None, {'a': [1, 2]}))
+        cache.get('key')[1]['a'].append(3)
+        self.assertEqual(cache.get('key'), [None, {'a': [1, 2]}])
+
+    def test_lru_eviction(self):
+        cache = SafeExecCache(max_entries=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        # touch the first one so that the second is the least recently used
+        cache.get('one')
+        cache.set('three', 3)
+        self.assertIsNone(cache.get('two'))
+        self.assertEqual(cache.get('one'), 1)
+        self.assertEqual(cache.get('three'), 3)
+
+    def test_local_timeout(self):
+        cache = SafeExecCache(local_timeout=10)
+        with patch('capa.safe_exec.cache.time.time', return_value=1000):
+            cache.set('key', 1)
+        with patch('capa.safe_exec.cache.time.time', return_value=1009):
+            self.assertEqual(cache.get('key'), 1)
+        with patch('capa.safe_exec.cache.time.time', return_value=1011):
+            self.assertIsNone(cache.get('key'))
+
+    def test_too_large(self):
+        shared = DictCache()
+        cache = SafeExecCache(shared_cache=shared, max_value_size=20)
+        cache.set('key', (None, {'a': 'x' * 20}))
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(shared, {})
+        self.assertEqual(cache.stats()['too_large'], 1)
+
+    def test_shared_tier(self):
+        shared = DictCache()
+        SafeExecCache(shared_cache=shared).set('key', (None, {'a': 1}))
+
+        other_process = SafeExecCache(shared_cache=shared)
+        self.assertEqual(other_process.get('key'), (None, {'a': 1}))
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+        # the entry is now in the local tier as well
+        del shared['key']
+        self.assertEqual(other_process.get('key'), [None, {'a': 1}])
+        self.assertEqual(other_process.stats()['hits'], 1)
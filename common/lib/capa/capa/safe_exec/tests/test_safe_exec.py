@@ -166,6 +166,50 @@ class TestSafeExecCaching(unittest.TestCase):
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_unmentioned_globals_not_cached(self):
+        # The per-student globals the code doesn't mention don't affect the
+        # key, and cached results don't overwrite them.
+        cache = {}
+        g = {'anonymous_student_id': 'student1', 'seed': 3}
+        safe_exec("a = seed * 2", g, cache=DictCache(cache))
+        self.assertEqual(cache.values()[0], (None, {'a': 6, 'seed': 3}))
+
+        cache[cache.keys()[0]] = (None, {'a': 17, 'seed': 3})
+        g = {'anonymous_student_id': 'student2', 'seed': 3}
+        safe_exec("a = seed * 2", g, cache=DictCache(cache))
+        self.assertEqual(g, {'a': 17, 'seed': 3, 'anonymous_student_id': 'student2'})
+
+        # But a global that is mentioned is part of the key.
+        safe_exec("a = anonymous_student_id", g, cache=DictCache(cache))
+        safe_exec("a = anonymous_student_id", {'anonymous_student_id': 'student1'}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 3)
+
+    def test_reachable_globals_cached(self):
+        # Code which can reach globals without naming them is keyed on all of them.
+        for code in ("a = globals()['anonymous_student_id']", "a = eval('anonymous_student_id')"):
+            cache = {}
+            g = {'anonymous_student_id': 'student1'}
+            safe_exec(code, g, cache=DictCache(cache))
+            self.assertEqual(g['a'], 'student1')
+            g = {'anonymous_student_id': 'student2'}
+            safe_exec(code, g, cache=DictCache(cache))
+            self.assertEqual(g['a'], 'student2')
+            self.assertEqual(len(cache), 2)
+
+        # So is code which runs other code.
+        cache = {}
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        for student in ('student1', 'student2'):
+            g = {'anonymous_student_id': student}
+            safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib], cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
+        # Other globals are always part of the key.
+        cache = {}
+        safe_exec("a = 1", {'other': 1}, cache=DictCache(cache))
+        safe_exec("a = 1", {'other': 2}, cache=DictCache(cache))
+        self.assertEqual(len(cache), 2)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
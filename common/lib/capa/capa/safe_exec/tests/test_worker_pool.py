@@ -0,0 +1,104 @@
+"""Test worker_pool.py"""
+
+import os
+import os.path
+import signal
+import sys
+import unittest
+
+from mock import patch
+
+from capa.safe_exec import configure_worker_pool, safe_exec
+from capa.safe_exec.worker_pool import Worker, WorkerPool
+from codejail.safe_exec import SafeExecException
+
+
+class TestWorkerPool(unittest.TestCase):
+    """
+    Test WorkerPool, with workers run by this Python rather than in a sandbox.
+    """
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        self.pool = WorkerPool(1, max_requests=2, command=[sys.executable])
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'x': 2}
+        self.pool.safe_exec("y = x * 2", g)
+        self.assertEqual(g, {'x': 2, 'y': 4})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_python_lib(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        self.pool.safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(g['a'], 23)
+
+    def test_workers_are_reused_then_replaced(self):
+        pids = []
+        for __ in range(3):
+            g = {}
+            self.pool.safe_exec("import os; worker = os.getppid()", g)
+            pids.append(g['worker'])
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+
+    def test_code_cannot_change_the_worker(self):
+        g = {}
+        self.pool.safe_exec("import math; math.pi = 3", g)
+        self.pool.safe_exec("import math; a = math.pi", g)
+        self.assertGreater(g['a'], 3.14)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'prctl is Linux only')
+    def test_code_cannot_attach_to_the_worker(self):
+        # The children inherit the worker's dumpable flag.
+        g = {}
+        self.pool.safe_exec("import ctypes; dumpable = ctypes.CDLL(None).prctl(3, 0, 0, 0, 0)", g)
+        self.assertEqual(g['dumpable'], 0)
+
+    @patch('capa.safe_exec.worker_pool.EXIT_TIMEOUT', 0.2)
+    def test_unkillable_worker_is_abandoned(self):
+        # A worker stopped by a signal, which we can't kill (as under sudo)
+        worker = Worker([sys.executable], [])
+        self.addCleanup(os.kill, worker.process.pid, signal.SIGKILL)
+        os.kill(worker.process.pid, signal.SIGSTOP)
+        with patch.object(worker.process, 'kill', side_effect=OSError):
+            worker.close(kill=True)
+            worker.close()
+        self.assertIsNone(worker.process.poll())
+        self.assertFalse(os.path.exists(worker.home))
+
+    @patch('capa.safe_exec.worker_pool.codejail_safe_exec')
+    def test_fallback(self, codejail_safe_exec):
+        pool = WorkerPool(1, command=["/no/such/python"])
+        g = {}
+        pool.safe_exec("a = 1", g, slug="fallback")
+        codejail_safe_exec.assert_called_once_with(
+            "a = 1", g, python_path=None, extra_files=None, slug="fallback"
+        )
+
+
+class TestSafeExecWithWorkerPool(unittest.TestCase):
+    """
+    Test that capa's safe_exec uses the configured worker pool.
+    """
+    def setUp(self):
+        super(TestSafeExecWithWorkerPool, self).setUp()
+        configure_worker_pool(1, command=[sys.executable])
+        self.addCleanup(configure_worker_pool, 0)
+
+    def test_assumed_imports(self):
+        g = {}
+        safe_exec("a = int(math.pi)", g)
+        self.assertEqual(g['a'], 3)
+
+    def test_random_seeding(self):
+        g = {}
+        safe_exec("rnums = [random.randint(0, 999) for _ in xrange(10)]", g, random_seed=17)
+        first = g['rnums']
+        safe_exec("rnums = [random.randint(0, 999) for _ in xrange(10)]", g, random_seed=17)
+        self.assertEqual(g['rnums'], first)
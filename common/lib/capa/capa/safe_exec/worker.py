@@ -0,0 +1,209 @@
+"""
+The program run by each process of a `worker_pool.WorkerPool`.
+
+It runs under the sandboxed Python, so it can only use the standard library,
+and it is handed to that Python as source code on its command line rather
+than imported.
+
+The worker first imports the modules named in its arguments.  It then reads
+requests from stdin, one JSON object per line, and executes each one in a
+child process forked for it, so every request starts with those modules
+already imported but can't leave anything behind for the next request.  The
+child runs under the request's resource limits, as codejail would apply
+them.  The response, also a line of JSON, is written to stdout.
+
+The worker makes itself non-dumpable before taking requests, so the children,
+which run as the same user, can't ptrace it or write to its memory through
+/proc.  See worker_pool.py for the whole isolation model.
+"""
+
+import json
+import os
+import resource
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# Values of the globals that can be sent back, as in codejail.
+OK_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)
+BAD_KEYS = ("__builtins__",)
+
+# prctl(2) option, from linux/prctl.h.
+PR_SET_DUMPABLE = 4
+
+
+class DevNull(object):
+    """Swallows whatever the sandboxed code prints."""
+    def write(self, *args, **kwargs):
+        pass
+
+
+def jsonable(value):
+    """
+    Can `value` be sent back as JSON?
+    """
+    if not isinstance(value, OK_TYPES):
+        return False
+    try:
+        json.dumps(value)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def make_undumpable():
+    """
+    Keep processes of the same user, such as the children executing code, from
+    attaching to this process or reading and writing its memory.  The children
+    inherit it, so they can't do that to each other either.  Only on Linux.
+    """
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0) != 0:
+            raise OSError(ctypes.get_errno(), "prctl failed")
+    except (ImportError, AttributeError, OSError):
+        sys.stderr.write("Couldn't make the worker undumpable:\n" + traceback.format_exc())
+
+
+def set_limits(limits):
+    """
+    Apply codejail-style `limits` to this process.
+    """
+    # No subprocesses.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+    cpu = limits.get("CPU")
+    if cpu:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+    vmem = limits.get("VMEM")
+    if vmem:
+        resource.setrlimit(resource.RLIMIT_AS, (vmem, vmem))
+
+    if "FSIZE" in limits:
+        fsize = limits["FSIZE"]
+        resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+
+
+def execute(request):
+    """
+    Execute the code of `request` in this process, and return the response:
+    the JSON-safe resulting globals.
+    """
+    home = request["home"]
+    os.chdir(home)
+    os.environ["TMPDIR"] = os.path.join(home, "tmp")
+    tempfile.tempdir = None
+    for pybase in request["python_path"]:
+        sys.path.append(pybase)
+
+    # The preloaded modules were seeded once, in the worker; a new process
+    # would have seeded them itself.
+    import random
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    sys.stdout = DevNull()
+    set_limits(request["limits"])
+
+    g_dict = request["globals"]
+    exec request["code"] in g_dict  # pylint: disable=exec-used
+
+    return {
+        "globals": {
+            k: v
+            for k, v in g_dict.iteritems()
+            if jsonable(v) and k not in BAD_KEYS
+        }
+    }
+
+
+def run_request(request, worker_fds):
+    """
+    Execute `request` in a child process and return its response.
+
+    `worker_fds` are the worker's own file descriptors, which the child must
+    not be able to use.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # The child.  Whatever happens, it mustn't return into the worker's loop.
+        try:
+            os.close(read_fd)
+            for worker_fd in worker_fds:
+                os.close(worker_fd)
+            # Stray output at the file descriptor level goes to stderr.
+            os.dup2(2, 1)
+            try:
+                response = execute(request)
+            except BaseException:  # pylint: disable=broad-except
+                response = {"error": traceback.format_exc()}
+            with os.fdopen(write_fd, "wb") as result:
+                result.write(json.dumps(response))
+        finally:
+            os._exit(0)  # pylint: disable=protected-access
+
+    os.close(write_fd)
+    realtime = request["limits"].get("REALTIME")
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    timed_out = False
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        ready, __, __ = select.select([read_fd], [], [], timeout)
+        if not ready:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    __, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return {"error": "Execution took longer than %s seconds" % realtime}
+    if os.WIFSIGNALED(status):
+        return {"error": "Execution was killed by signal %d" % os.WTERMSIG(status)}
+    try:
+        return json.loads("".join(chunks))
+    except ValueError:
+        return {"error": "Execution produced no result"}
+
+
+def main(preload):
+    """
+    Import the modules named in `preload`, then serve requests until stdin
+    is closed.
+    """
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    make_undumpable()
+
+    # Keep the responses to ourselves: nothing else in this process, or its
+    # children, writes to them.
+    requests = sys.stdin
+    responses = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    worker_fds = [requests.fileno(), responses.fileno()]
+    for line in iter(requests.readline, ""):
+        response = run_request(json.loads(line), worker_fds)
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,339 @@
+"""
+A pool of pre-started sandboxed Python processes to execute code in.
+
+codejail starts a new sandboxed Python for every execution, which then has to
+import numpy and the rest before it can do anything.  A `WorkerPool` keeps a
+few sandboxed Pythons running (see worker.py) that have imported those
+modules already, and sends them code to execute over their stdin and stdout.
+
+Isolation
+---------
+
+The workers run the sandboxed Python, under codejail's sandbox user and
+AppArmor profile, just as codejail runs each execution.  As with codejail,
+that user is shared by every execution, so the pool adds no sharing between
+executions that codejail doesn't already have, except for the workers
+themselves:
+
+* A worker never executes code itself.  Each piece of code runs in a child
+  forked for it, so it starts from the worker's freshly imported modules and
+  whatever it changes in memory disappears with the child.
+
+* The child has the codejail resource limits, no subprocesses (RLIMIT_NPROC
+  is 0), and none of the worker's file descriptors, so it can't answer in the
+  worker's place.
+
+* The worker is non-dumpable, so the children can't ptrace it or write to its
+  memory through /proc, although they run as the same user.
+
+* What a child can still do to a worker is signal it, like any process of
+  the sandbox user.  The worker then stops responding or exits, and the pool
+  kills and replaces it and executes the code without the pool.  Under sudo,
+  the workers are killed with `sudo -u <sandbox user> pkill`, so the sudoers
+  rules must let the web user run pkill as the sandbox user.  A worker which
+  still doesn't exit is abandoned (and logged) rather than waited for.
+
+* Files a child writes outside its temporary home, wherever the AppArmor
+  profile lets the sandbox user write, outlive it, as they do with codejail.
+
+Workers are replaced after `max_requests` executions.  A `max_requests` of 1
+starts a new worker for every execution, if the fork isn't considered
+isolation enough.
+"""
+
+import json
+import logging
+import os
+import os.path
+import select
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from codejail import jail_code
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+from codejail.safe_exec import json_safe, SafeExecException
+from codejail.util import temp_directory
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# The workers can't import worker.py from the sandbox, so read its code now
+# to give them on their command line.
+worker_py_file = os.path.join(os.path.dirname(__file__), "worker.py")
+worker_py = open(worker_py_file).read()
+
+# How many seconds a worker gets, beyond the REALTIME limit, to respond.
+RESPONSE_GRACE_PERIOD = 5
+
+# How many seconds a worker gets to exit once it's told to, and again once it's killed.
+EXIT_TIMEOUT = 5
+
+
+class WorkerPoolError(Exception):
+    """
+    A worker couldn't execute code, for reasons that have nothing to do with
+    the code itself.
+    """
+    pass
+
+
+class Worker(object):
+    """
+    One sandboxed Python process of a `WorkerPool`.
+    """
+    def __init__(self, command, preload):
+        # The worker's home is its current directory, as in codejail.
+        self.home = tempfile.mkdtemp(prefix="codejail-")
+        os.chmod(self.home, 0775)
+        try:
+            with open(os.devnull, "wb") as devnull:
+                self.process = subprocess.Popen(
+                    command + ["-c", worker_py] + list(preload),
+                    cwd=self.home, env={}, close_fds=True,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                )
+        except OSError as err:
+            shutil.rmtree(self.home)
+            raise WorkerPoolError("Couldn't start a worker: {}".format(err))
+        self.requests = 0
+        # Under sudo, the process we started is sudo, running as root.
+        self.sudo_user = command[2] if command[:2] == ["sudo", "-u"] else None
+
+    def execute(self, request, timeout):
+        """
+        Send `request` to the worker and return its response, waiting at most
+        `timeout` seconds (None for no limit) for it.
+        """
+        self.requests += 1
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            ready, __, __ = select.select([self.process.stdout], [], [], timeout)
+            line = self.process.stdout.readline() if ready else None
+        except (IOError, OSError) as err:
+            raise WorkerPoolError("Couldn't talk to the worker: {}".format(err))
+
+        if line is None:
+            raise WorkerPoolError("The worker didn't respond in {} seconds".format(timeout))
+        if not line:
+            raise WorkerPoolError("The worker exited")
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise WorkerPoolError("The worker's response wasn't JSON")
+
+    def close(self, kill=False):
+        """
+        Stop the worker.  It exits once it sees the end of its input, or at
+        once if `kill` is true.  If it doesn't exit in time (e.g. it has been
+        stopped), it is killed, and if it still doesn't, abandoned.
+        """
+        try:
+            self.process.stdin.close()
+        except (IOError, OSError):
+            pass
+        if kill or not self._wait(EXIT_TIMEOUT):
+            self._kill()
+            if not self._wait(EXIT_TIMEOUT):
+                log.error("Abandoning worker %d, which didn't exit when killed", self.process.pid)
+        shutil.rmtree(self.home, ignore_errors=True)
+
+    def _kill(self):
+        """
+        Kill the worker.
+        """
+        if self.sudo_user:
+            # Only the sandbox user can kill the worker, which is sudo's child.
+            with open(os.devnull, "wb") as devnull:
+                try:
+                    subprocess.call(
+                        ["sudo", "-u", self.sudo_user, "pkill", "-KILL", "-P", str(self.process.pid)],
+                        stdout=devnull, stderr=devnull,
+                    )
+                except OSError:
+                    log.exception("Couldn't kill worker %d", self.process.pid)
+        try:
+            self.process.kill()
+        except OSError:
+            # It may already have exited, or, under sudo, not be ours to kill.
+            pass
+
+    def _wait(self, timeout):
+        """
+        Wait at most `timeout` seconds for the worker to exit, returning whether it did.
+        """
+        deadline = time.time() + timeout
+        while self.process.poll() is None:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+class WorkerPool(object):
+    """
+    Execute code in at most `size` pre-started sandboxed Python processes.
+
+    The workers import the modules named in `preload` before taking any code.
+    They are started when first needed, and replaced after executing
+    `max_requests` pieces of code.
+
+    Workers run the sandboxed Python that codejail is configured with, as its
+    user, unless `command`, the start of the command line to run, is given.
+    Each piece of code is executed in a process forked from a worker for it,
+    with codejail's current resource limits.
+
+    If no worker can execute some code, because the workers can't be started
+    or stop responding, it is executed by codejail as it would have been
+    without the pool.
+    """
+    def __init__(self, size, max_requests=100, preload=(), command=None):
+        self.size = size
+        self.max_requests = max_requests
+        self.preload = list(preload)
+        self.command = command
+        self._idle = []
+        self._started = 0
+        self._condition = threading.Condition()
+        self._pid = os.getpid()
+
+    def _get_command(self):
+        """
+        Return the start of the command line for workers, or None if there
+        is no sandbox to run them in.
+        """
+        if self.command is not None:
+            return list(self.command)
+        if not jail_code.is_configured("python"):
+            return None
+        python = jail_code.COMMANDS["python"]
+        command = ["sudo", "-u", python["user"]] if python["user"] else []
+        return command + python["cmdline_start"]
+
+    def _acquire(self, command):
+        """
+        Return an idle worker, starting one if there are fewer than `size`,
+        or else waiting for one to be released.
+        """
+        with self._condition:
+            if self._pid != os.getpid():
+                # We've been forked, so the workers belong to our parent.
+                self._idle = []
+                self._started = 0
+                self._pid = os.getpid()
+            while not self._idle and self._started >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+
+        try:
+            return Worker(command, self.preload)
+        except WorkerPoolError:
+            with self._condition:
+                self._started -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker, broken=False):
+        """
+        Return `worker` to the pool, or stop it if it is `broken` or has
+        executed `max_requests` pieces of code.
+        """
+        retire = broken or worker.requests >= self.max_requests
+        if retire:
+            worker.close(kill=broken)
+        with self._condition:
+            if self._pid != os.getpid():
+                return
+            if retire:
+                self._started -= 1
+            else:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def close(self):
+        """
+        Stop the idle workers.
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._started -= len(idle)
+        for worker in idle:
+            worker.close()
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute `code` in a worker, exactly as `codejail.safe_exec.safe_exec`
+        would execute it: the JSON-safe values of `globals_dict` are available
+        to it, and the JSON-safe globals it leaves are put back in
+        `globals_dict`.  Raises `SafeExecException` if the code fails.
+        """
+        command = self._get_command()
+        if command is not None:
+            try:
+                response = self._execute(command, code, globals_dict, python_path, extra_files, slug)
+            except WorkerPoolError:
+                log.exception("Couldn't execute jailed code %s in a worker", slug)
+                dog_stats_api.increment('capa.safe_exec.pool.fallback')
+            else:
+                if "error" in response:
+                    raise SafeExecException("Couldn't execute jailed code: %s" % response["error"])
+                globals_dict.update(response["globals"])
+                return
+
+        codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
+
+    def _execute(self, command, code, globals_dict, python_path, extra_files, slug):
+        """
+        Send `code` to a worker, returning its response.
+        """
+        extra_files = extra_files or ()
+        limits = dict(jail_code.LIMITS)
+        timeout = limits["REALTIME"] + RESPONSE_GRACE_PERIOD if limits.get("REALTIME") else None
+
+        log.debug("Executing jailed code %s in a worker", slug)
+        with temp_directory() as home:
+            # Lay out the code's home as codejail would: readable by the
+            # sandbox user, with a "tmp" directory it can write to.
+            os.chmod(home, 0775)
+            tmptmp = os.path.join(home, "tmp")
+            os.mkdir(tmptmp)
+            os.chmod(tmptmp, 0777)
+
+            for name, contents in extra_files:
+                with open(os.path.join(home, name), "wb") as extra:
+                    extra.write(contents)
+
+            pybases = []
+            for pydir in python_path or ():
+                pybase = os.path.basename(pydir)
+                pybases.append(pybase)
+                if any(pybase == name for name, __ in extra_files):
+                    continue
+                if os.path.isfile(pydir):
+                    shutil.copy(pydir, home)
+                else:
+                    shutil.copytree(pydir, os.path.join(home, pybase), symlinks=True)
+
+            request = {
+                "code": code,
+                "globals": json_safe(globals_dict),
+                "python_path": pybases,
+                "home": home,
+                "limits": limits,
+            }
+
+            worker = self._acquire(command)
+            broken = True
+            try:
+                response = worker.execute(request, timeout)
+                broken = False
+            finally:
+                self._release(worker, broken)
+
+        dog_stats_api.increment('capa.safe_exec.pool.executed')
+        return response
@@ -0,0 +1,71 @@
+"""
+Tests of the templates which LoncapaProblem instances are made from.
+"""
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa import capa_problem
+from . import new_loncapa_problem, test_capa_system
+
+
+class ProblemTemplateTest(unittest.TestCase):
+    """
+    Problems instantiated again should be copied from cached templates.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+        <script type="loncapa/python">
+        answer = str(random.randint(0, 1000))
+        </script>
+        <stringresponse answer="$answer">
+            <textline size="10"/>
+        </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateTest, self).setUp()
+        capa_problem._TEMPLATE_CACHE.clear()  # pylint: disable=protected-access
+        patcher = patch.object(capa_problem, 'safe_exec', wraps=capa_problem.safe_exec)
+        self.safe_exec = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scripts_run_once(self):
+        first = new_loncapa_problem(self.xml)
+        second = new_loncapa_problem(self.xml)
+        self.assertEqual(self.safe_exec.call_count, 1)
+        self.assertEqual(first.context['answer'], second.context['answer'])
+        self.assertEqual(first.get_question_answers(), second.get_question_answers())
+
+    def test_copies(self):
+        first = new_loncapa_problem(self.xml)
+        first.context['answer'] = 'changed'
+        first.tree.set('changed', 'true')
+
+        second = new_loncapa_problem(self.xml)
+        self.assertNotEqual(second.context['answer'], 'changed')
+        self.assertIsNone(second.tree.get('changed'))
+        self.assertIsNot(second.tree, first.tree)
+
+    def test_seeds(self):
+        new_loncapa_problem(self.xml, seed=1)
+        new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(self.safe_exec.call_count, 2)
+
+    def test_student_ids(self):
+        other_student = test_capa_system()
+        other_student.anonymous_student_id = 'other_student'
+
+        problem = new_loncapa_problem(self.xml)
+        other_problem = new_loncapa_problem(self.xml, capa_system=other_student)
+        self.assertEqual(problem.context['anonymous_student_id'], 'student')
+        self.assertEqual(other_problem.context['anonymous_student_id'], 'other_student')
+        self.assertEqual(self.safe_exec.call_count, 1)
+
+        # Scripts which use the student's id are run for each student.
+        xml = self.xml.replace('random.randint(0, 1000)', 'anonymous_student_id')
+        self.assertEqual(new_loncapa_problem(xml).context['answer'], 'student')
+        self.assertEqual(new_loncapa_problem(xml, capa_system=other_student).context['answer'], 'other_student')
+        self.assertEqual(self.safe_exec.call_count, 3)
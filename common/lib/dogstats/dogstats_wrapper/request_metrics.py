@@ -0,0 +1,140 @@
+"""
+Counters of the work done while handling the current request.
+
+Code that talks to a backend (mongo, SQL, the cache, codejail) wraps each call
+in `measure(kind)`, or decorates the calling function with `measured(kind)`.
+While a request is being measured (between `start()` and `stop()`, which the
+monitoring middleware calls), those calls are counted and timed per kind and,
+optionally, per call site: the first frame of the stack outside the storage
+layers, which is where an N+1 loop would show up.  Outside of a request the
+wrappers do nothing.
+
+This module doesn't depend on django, so that the libraries can use it.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+import os.path
+import sys
+import threading
+import time
+
+_local = threading.local()
+
+# Stack frames in these parts of the code are never call sites: they are the
+# layers between the code doing a request's work and the backends.
+IGNORED_PATHS = tuple(
+    os.path.join(*parts) + os.sep for parts in (
+        ('dogstats_wrapper',),
+        ('xmodule', 'modulestore'),
+        ('capa', 'safe_exec'),
+        ('django',),
+        ('pymongo',),
+        ('contracts',),
+    )
+) + (os.sep + 'contextlib.py', os.sep + 'mongodb_proxy', os.path.join('monitoring', 'middleware.py'))
+
+
+class RequestMetrics(object):
+    """
+    How many calls of each kind a request made, how long they took, and,
+    if `track_call_sites` is true, where they were made from.
+    """
+    def __init__(self, track_call_sites=False):
+        self.track_call_sites = track_call_sites
+        self.counts = Counter()
+        self.times = defaultdict(float)
+        self.call_sites = defaultdict(Counter)
+        # The kinds of the calls in progress, so that nested calls count once.
+        self._active = set()
+
+    def record(self, kind, duration, call_site=None):
+        """
+        Record one call of `kind` which took `duration` seconds.
+        """
+        self.counts[kind] += 1
+        self.times[kind] += duration
+        if call_site is not None:
+            self.call_sites[kind][call_site] += 1
+
+    def summary(self):
+        """
+        Return a dict of `{kind: (count, total milliseconds)}`.
+        """
+        return {kind: (count, self.times[kind] * 1000) for kind, count in self.counts.iteritems()}
+
+
+def start(track_call_sites=False):
+    """
+    Start measuring the current request, returning its `RequestMetrics`.
+    """
+    _local.metrics = RequestMetrics(track_call_sites)
+    return _local.metrics
+
+
+def stop():
+    """
+    Stop measuring the current request, returning its `RequestMetrics`, or
+    None if it wasn't being measured.
+    """
+    metrics = current()
+    _local.metrics = None
+    return metrics
+
+
+def current():
+    """
+    Return the `RequestMetrics` of the current request, or None if it isn't being measured.
+    """
+    return getattr(_local, 'metrics', None)
+
+
+def call_site():
+    """
+    Return the innermost frame of the stack outside of the IGNORED_PATHS, as
+    "path:line (function)".
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(path in filename for path in IGNORED_PATHS):
+            return u'{}:{} ({})'.format(filename, frame.f_lineno, frame.f_code.co_name)
+        frame = frame.f_back
+    return None
+
+
+@contextmanager
+def measure(kind):
+    """
+    Count and time the code in the with statement as a call of `kind`, unless
+    it is within another call of the same kind.
+    """
+    metrics = current()
+    if metrics is None or kind in metrics._active:  # pylint: disable=protected-access
+        yield
+        return
+
+    metrics._active.add(kind)  # pylint: disable=protected-access
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        metrics._active.discard(kind)  # pylint: disable=protected-access
+        metrics.record(
+            kind, time.time() - start_time, call_site() if metrics.track_call_sites else None
+        )
+
+
+def measured(kind):
+    """
+    Decorator which measures each call of the function as a call of `kind`.
+    """
+    def decorator(func):  # pylint: disable=missing-docstring
+        @wraps(func)
+        def wrapper(*args, **kwargs):  # pylint: disable=missing-docstring
+            if current() is None:
+                return func(*args, **kwargs)
+            with measure(kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
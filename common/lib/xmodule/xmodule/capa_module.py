@@ -118,6 +118,9 @@ class CapaDescriptor(CapaFields, RawDescriptor):
     module_class = CapaModule
 
     has_score = True
+    # The max score is the sum of the points of the problem's answer fields, which
+    # are given by its XML, whatever the seed.
+    max_score_varies_by_user = False
     template_dir_name = 'problem'
     mako_template = "widgets/problem-edit.html"
     js = {'coffee': [resource_string(__name__, 'js/src/problem/edit.coffee')]}
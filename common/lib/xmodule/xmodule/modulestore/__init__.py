@@ -306,6 +306,11 @@ class EditInfo(object):
     """
     Encapsulates the editing info of a block.
     """
+    __slots__ = (
+        'previous_version', 'update_version', 'source_version', 'edited_on', 'edited_by',
+        'original_usage', 'original_usage_version', '_subtree_edited_on', '_subtree_edited_by',
+    )
+
     def __init__(self, **kwargs):
         self.from_storable(kwargs)
 
@@ -374,12 +379,31 @@ class BlockData(object):
     Wrap the block data in an object instead of using a straight Python dictionary.
     Allows the storing of meta-information about a structure that doesn't persist along with
     the structure itself.
+
+    A structure can hold thousands of blocks of which a request uses a few, so the fields,
+    defaults and edit info are only decoded from the stored block data when first used.
     """
+    __slots__ = (
+        'block_type', 'definition', 'definition_loaded',
+        '_fields', '_defaults', '_edit_info', '_storable', '_decode_fields',
+    )
+
     def __init__(self, **kwargs):
         # Has the definition been loaded?
         self.definition_loaded = False
         self.from_storable(kwargs)
 
+    @classmethod
+    def from_mongo(cls, block_data, decode_fields=None):
+        """
+        Wrap `block_data`, a block as stored in mongo, without decoding it. `decode_fields`, if
+        given, is called with the stored fields when they are first used and returns them decoded.
+        """
+        block = cls.__new__(cls)
+        block.definition_loaded = False
+        block.from_storable(block_data, decode_fields)
+        return block
+
     def to_storable(self):
         """
         Serialize to a Mongo-storable format.
@@ -392,26 +416,63 @@ class BlockData(object):
             'edit_info': self.edit_info.to_storable()
         }
 
-    def from_storable(self, block_data):
+    def from_storable(self, block_data, decode_fields=None):
         """
         De-serialize from Mongo-storable format to an object.
-        """
-        # Contains the Scope.settings and 'children' field values.
-        # 'children' are stored as a list of (block_type, block_id) pairs.
-        self.fields = block_data.get('fields', {})
 
+        The fields, defaults and edit info are decoded from `block_data` when first used.
+        """
         # XBlock type ID.
         self.block_type = block_data.get('block_type', None)
 
         # DB id of the record containing the content of this XBlock.
         self.definition = block_data.get('definition', None)
 
-        # Scope.settings default values copied from a template block (used e.g. when
-        # blocks are copied from a library to a course)
-        self.defaults = block_data.get('defaults', {})
+        self._fields = self._defaults = self._edit_info = None
+        self._storable = block_data
+        self._decode_fields = decode_fields
+
+    @property
+    def fields(self):
+        """
+        The Scope.settings and 'children' field values.
+        'children' are stored as a list of (block_type, block_id) pairs.
+        """
+        if self._fields is None:
+            fields = self._storable.get('fields', {})
+            self._fields = self._decode_fields(fields) if self._decode_fields else fields
+        return self._fields
+
+    @fields.setter
+    def fields(self, value):  # pylint: disable=missing-docstring
+        self._fields = value
+
+    @property
+    def defaults(self):
+        """
+        Scope.settings default values copied from a template block (used e.g. when
+        blocks are copied from a library to a course)
+        """
+        if self._defaults is None:
+            self._defaults = self._storable.get('defaults', {})
+        return self._defaults
+
+    @defaults.setter
+    def defaults(self, value):  # pylint: disable=missing-docstring
+        self._defaults = value
+
+    @property
+    def edit_info(self):
+        """
+        EditInfo object containing all versioning/editing data.
+        """
+        if self._edit_info is None:
+            self._edit_info = EditInfo(**self._storable.get('edit_info', {}))
+        return self._edit_info
 
-        # EditInfo object containing all versioning/editing data.
-        self.edit_info = EditInfo(**block_data.get('edit_info', {}))
+    @edit_info.setter
+    def edit_info(self, value):  # pylint: disable=missing-docstring
+        self._edit_info = value
 
     def __repr__(self):
         # pylint: disable=bad-continuation, redundant-keyword-arg
@@ -790,8 +851,8 @@ class ModuleStoreRead(ModuleStoreAssetBase):
             # If an XBlock is passed-in, just match its fields.
             xblock, fields = (block, block.fields)
         elif isinstance(block, BlockData):
-            # BlockData is an object - compare its attributes in dict form.
-            xblock, fields = (None, block.__dict__)
+            # BlockData is an object - compare the attributes asked about in dict form.
+            xblock, fields = (None, {key: getattr(block, key) for key in qualifiers if hasattr(block, key)})
         else:
             xblock, fields = (None, block)
 
@@ -891,6 +952,15 @@ class ModuleStoreRead(ModuleStoreAssetBase):
         '''
         pass
 
+    def get_parent_locations(self, locations, **kwargs):
+        '''
+        Find the locations that are the parents of these locations, as get_parent_location does.
+
+        Returns a dict mapping each of `locations` to its parent location, or None if it has none. Modulestores
+        which can find many parents at once should override this.
+        '''
+        return {location: self.get_parent_location(location, **kwargs) for location in locations}
+
     @abstractmethod
     def get_orphans(self, course_key, **kwargs):
         """
@@ -23,6 +23,8 @@ import django.utils
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -77,13 +79,18 @@ class SignalHandler(object):
     4. The thing that listens for the signal lives in process, but should do
        almost no work. Its main job is to kick off the celery task that will
        do the actual work.
+    5. Authors publish often, so tasks which rebuild something for the whole
+       course should be coalesced per course, with
+       openedx.core.djangoapps.content.publish_handlers.
 
     """
     course_published = django.dispatch.Signal(providing_args=["course_key"])
+    course_deleted = django.dispatch.Signal(providing_args=["course_key"])
     library_updated = django.dispatch.Signal(providing_args=["library_key"])
 
     _mapping = {
         "course_published": course_published,
+        "course_deleted": course_deleted,
         "library_updated": library_updated
     }
 
@@ -112,6 +119,31 @@ def load_function(path):
     return getattr(import_module(module_path), name)
 
 
+# The process-wide cache of split modulestore structures
+_STRUCTURE_CACHE = None
+
+
+def get_structure_cache():
+    """
+    Returns the process-wide StructureCache shared by all split modulestores, or None
+    if it is disabled (settings.SPLIT_STRUCTURE_CACHE_SIZE is 0).
+
+    If a django cache named 'course_structure_cache' is configured it is used as the
+    shared tier below the in-process LRU.
+    """
+    global _STRUCTURE_CACHE  # pylint: disable=global-statement
+    max_entries = getattr(settings, 'SPLIT_STRUCTURE_CACHE_SIZE', 0)
+    if not max_entries:
+        return None
+    if _STRUCTURE_CACHE is None:
+        try:
+            shared_cache = get_cache('course_structure_cache')
+        except InvalidCacheBackendError:
+            shared_cache = None
+        _STRUCTURE_CACHE = StructureCache(max_entries=max_entries, shared_cache=shared_cache)
+    return _STRUCTURE_CACHE
+
+
 def create_modulestore_instance(
         engine,
         content_store,
@@ -151,6 +183,9 @@ def create_modulestore_instance(
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        _options['structure_cache'] = get_structure_cache()
+
     if HAS_USER_SERVICE and not user_service:
         xb_user_service = DjangoXBlockUserService(get_current_user())
     else:
@@ -198,8 +233,9 @@ def clear_existing_modulestores():
 
     This is useful for flushing state between unit tests.
     """
-    global _MIXED_MODULESTORE  # pylint: disable=global-statement
+    global _MIXED_MODULESTORE, _STRUCTURE_CACHE  # pylint: disable=global-statement
     _MIXED_MODULESTORE = None
+    _STRUCTURE_CACHE = None
 
 
 class ModuleI18nService(object):
@@ -6,6 +6,7 @@ In this way, courses can be served up both - say - XMLModuleStore or MongoModule
 """
 
 import logging
+from collections import defaultdict
 from contextlib import contextmanager
 import itertools
 import functools
@@ -368,7 +369,12 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         """
         assert isinstance(course_key, CourseKey)
         store = self._get_modulestore_for_courselike(course_key)
-        return store.delete_course(course_key, user_id)
+        result = store.delete_course(course_key, user_id)
+
+        signal_handler = getattr(store, 'signal_handler', None)
+        if signal_handler:
+            signal_handler.send("course_deleted", course_key=course_key)
+        return result
 
     @contract(asset_metadata='AssetMetadata', user_id='int|long', import_only=bool)
     def save_asset_metadata(self, asset_metadata, user_id, import_only=False):
@@ -527,6 +533,19 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._get_modulestore_for_courselike(location.course_key)
         return store.get_parent_location(location, **kwargs)
 
+    @strip_key
+    def get_parent_locations(self, locations, **kwargs):
+        """
+        returns a dict mapping each of the given locations to its parent location
+        """
+        locations_by_store = defaultdict(list)
+        for location in locations:
+            locations_by_store[self._get_modulestore_for_courselike(location.course_key)].append(location)
+        parents = {}
+        for store, store_locations in locations_by_store.iteritems():
+            parents.update(store.get_parent_locations(store_locations, **kwargs))
+        return parents
+
     def get_block_original_usage(self, usage_key):
         """
         If a block was inherited into another structure using copy_from_template,
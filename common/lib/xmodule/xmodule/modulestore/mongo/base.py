@@ -17,12 +17,14 @@ import sys
 import logging
 import copy
 import re
+import time
 from uuid import uuid4
 
 from bson.son import SON
 from datetime import datetime
 from fs.osfs import OSFS
 from mongodb_proxy import MongoProxy, autoretry_read
+from dogstats_wrapper import request_metrics
 from path import path
 from pytz import UTC
 from contracts import contract, new_contract
@@ -68,6 +70,11 @@ BLOCK_TYPES_WITH_CHILDREN = list(set(
     name for name, class_ in XBlock.load_classes() if getattr(class_, 'has_children', False)
 ))
 
+# How long, in seconds, a request waits for another one to compute a course's metadata inheritance tree before
+# computing it itself, and how often it checks whether the tree is there yet.
+INHERITANCE_TREE_LOCK_TIMEOUT = 10
+INHERITANCE_TREE_POLL_INTERVAL = 0.1
+
 # Allow us to call _from_deprecated_(son|string) throughout the file
 # pylint: disable=protected-access
 
@@ -612,6 +619,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         connection.close()
 
     @autoretry_read()
+    @request_metrics.measured('mongo_reads')
     def fill_in_run(self, course_key):
         """
         In mongo some course_keys are used without runs. This helper function returns
@@ -657,18 +665,21 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         else:
             return ParentLocationCache()
 
-    def _compute_metadata_inheritance_tree(self, course_id):
+    @request_metrics.measured('mongo_reads')
+    def _find_inheritance_records(self, course_id, names=None):
         '''
-        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        Find the xblocks of the course which may define inheritable data (those with children), with only the
+        given `names` if any, and return them by location url, with the location url of the course.
         '''
         # get all collections in the course, this query should not return any leaf nodes
-        course_id = self.fill_in_run(course_id)
         query = SON([
             ('_id.tag', 'i4x'),
             ('_id.org', course_id.org),
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
+        if names is not None:
+            query['_id.name'] = {'$in': list(names)}
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
@@ -708,44 +719,233 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if location.category == 'course':
                 root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return results_by_url, root
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
+    def _find_subtree_inheritance_records(self, course_id, url):
+        '''
+        Find the xblocks with children in the subtree of the xblock with location url `url`, one level of the
+        subtree at a time, and return them by location url.
+        '''
+        results_by_url = {}
+        level = set([url])
+        while level:
+            names = set(course_id.make_usage_key_from_deprecated_string(child).name for child in level)
+            records, __ = self._find_inheritance_records(course_id, names)
+            level_results = {
+                child: records[child] for child in level if child in records and child not in results_by_url
+            }
+            results_by_url.update(level_results)
+            level = set(
+                child
+                for result in level_results.itervalues()
+                for child in result.get('definition', {}).get('children', [])
+            )
+        return results_by_url
 
+    def _inherit_metadata(self, results_by_url, url, children, metadata, metadata_to_inherit):
+        """
+        Record in `metadata_to_inherit` the metadata which the xblocks with location urls `children` and their
+        descendants inherit, given that `metadata` is what the xblock with location url `url`, their parent,
+        passes on.
+        """
+        for child in children:
             # go through all the children and recurse, but only if we have
             # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+            if child in results_by_url:
+                new_child_metadata = copy.deepcopy(metadata)
+                new_child_metadata.update(results_by_url[child].get('metadata', {}))
+                metadata_to_inherit[child] = new_child_metadata
+                self._inherit_metadata(
+                    results_by_url, child, results_by_url[child].get('definition', {}).get('children', []),
+                    new_child_metadata, metadata_to_inherit
+                )
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = metadata.copy()
+            # WARNING: 'parent' is not part of inherited metadata, but
+            # we're piggybacking on this recursive traversal to grab
+            # and cache the child's parent, as a performance optimization.
+            # The 'parent' key will be popped out of the dictionary during
+            # CachingDescriptorSystem.load_item
+            metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+
+    def _compute_metadata_inheritance_tree(self, course_id):
+        '''
+        Find all inheritable fields from all xblocks in the course which may define inheritable data
+        '''
+        course_id = self.fill_in_run(course_id)
+        results_by_url, root = self._find_inheritance_records(course_id)
 
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
         if root is not None:
-            _compute_inherited_metadata(root)
+            self._inherit_metadata(
+                results_by_url, root, results_by_url[root].get('definition', {}).get('children', []),
+                results_by_url[root].get('metadata', {}), metadata_to_inherit
+            )
 
         return metadata_to_inherit
 
+    def _inheritance_tree_cache_key(self, course_id, subtree=None):
+        """
+        The key of the inheritance tree of the course in the metadata_inheritance_cache_subsystem, or of its
+        `subtree`th subtree if given.
+        """
+        key = u'inheritance/{}'.format(course_id)
+        return key if subtree is None else u'{}/{}'.format(key, subtree)
+
+    def _compute_and_store_metadata_inheritance_tree(self, course_id):
+        '''
+        Compute the metadata inheritance tree of the course, and store it in the caching subsystem, if any.
+
+        The tree is stored as one entry per subtree of a child of the course (normally a chapter), so that editing
+        something only recomputes and rewrites its chapter (see _refresh_metadata_inheritance_subtree). The entries
+        of the other children of the course, and what the course itself passes on, are stored in an index. The index
+        and the subtrees are stamped with the same version; subtrees with another version are from an older tree.
+        '''
+        if self.metadata_inheritance_cache_subsystem is None:
+            return self._compute_metadata_inheritance_tree(course_id)
+
+        results_by_url, root = self._find_inheritance_records(course_id)
+        if root is None:
+            return {}
+
+        version = uuid4().hex
+        index = {
+            'version': version,
+            'root': root,
+            'root_metadata': results_by_url[root].get('metadata', {}),
+            'entries': {},
+            'subtrees': [],
+        }
+        subtrees = []
+        for child in results_by_url[root].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                entries = {}
+                self._inherit_metadata(results_by_url, root, [child], index['root_metadata'], entries)
+                index['subtrees'].append(child)
+                subtrees.append({'version': version, 'entries': entries})
+            else:
+                self._inherit_metadata(results_by_url, root, [child], index['root_metadata'], index['entries'])
+
+        # Store the subtrees first, so that whoever finds the new index finds them too.
+        for position, subtree in enumerate(subtrees):
+            self.metadata_inheritance_cache_subsystem.set(
+                self._inheritance_tree_cache_key(course_id, position), subtree
+            )
+        self.metadata_inheritance_cache_subsystem.set(self._inheritance_tree_cache_key(course_id), index)
+
+        tree = dict(index['entries'])
+        for subtree in subtrees:
+            tree.update(subtree['entries'])
+        return tree
+
+    def _read_metadata_inheritance_tree(self, course_id):
+        '''
+        Read the metadata inheritance tree of the course from the caching subsystem.
+
+        Returns the index, the subtrees and the tree they make up, or None if any of them is missing or outdated.
+        '''
+        index = self.metadata_inheritance_cache_subsystem.get(self._inheritance_tree_cache_key(course_id))
+        if not index:
+            return None
+        keys = [self._inheritance_tree_cache_key(course_id, position) for position in range(len(index['subtrees']))]
+        found = self.metadata_inheritance_cache_subsystem.get_many(keys) if keys else {}
+
+        subtrees = []
+        tree = dict(index['entries'])
+        for key in keys:
+            subtree = found.get(key)
+            if subtree is None or subtree['version'] != index['version']:
+                return None
+            subtrees.append(subtree)
+            tree.update(subtree['entries'])
+        return index, subtrees, tree
+
+    def _get_shared_metadata_inheritance_tree(self, course_id):
+        '''
+        Return the metadata inheritance tree of the course from the caching subsystem, computing and storing it if
+        it isn't there.
+
+        Only one request computes a missing tree at a time: the others wait, up to
+        INHERITANCE_TREE_LOCK_TIMEOUT seconds, for it to be stored, rather than all query Mongo for it.
+        '''
+        stored = self._read_metadata_inheritance_tree(course_id)
+        if stored is not None:
+            return stored[2]
+
+        lock_key = u'{}/lock'.format(self._inheritance_tree_cache_key(course_id))
+        if self.metadata_inheritance_cache_subsystem.add(lock_key, True, INHERITANCE_TREE_LOCK_TIMEOUT):
+            try:
+                return self._compute_and_store_metadata_inheritance_tree(course_id)
+            finally:
+                self.metadata_inheritance_cache_subsystem.delete(lock_key)
+
+        deadline = time.time() + INHERITANCE_TREE_LOCK_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(INHERITANCE_TREE_POLL_INTERVAL)
+            stored = self._read_metadata_inheritance_tree(course_id)
+            if stored is not None:
+                return stored[2]
+        # Whoever was computing it is taking too long; do it ourselves.
+        return self._compute_and_store_metadata_inheritance_tree(course_id)
+
+    def _refresh_metadata_inheritance_subtree(self, course_id, usage_key):
+        '''
+        Update the stored metadata inheritance tree of the course after the xblock at `usage_key` was edited, by
+        recomputing only the subtree of the child of the course it is in.
+
+        Returns the updated tree, or None if the whole tree has to be recomputed instead.
+        '''
+        if self.metadata_inheritance_cache_subsystem is None or usage_key.category == 'course':
+            return None
+        stored = self._read_metadata_inheritance_tree(course_id)
+        if stored is None:
+            return None
+        index, subtrees, tree = stored
+
+        if usage_key.category not in BLOCK_TYPES_WITH_CHILDREN:
+            # Only xblocks with children pass metadata on, so the tree is unchanged.
+            return tree
+
+        url = unicode(as_published(usage_key))
+        for position, subtree_root in enumerate(index['subtrees']):
+            if url == subtree_root or url in subtrees[position]['entries']:
+                break
+        else:
+            # Not in the course (yet); the tree changes when its parent is updated.
+            return tree
+
+        results_by_url = self._find_subtree_inheritance_records(course_id, subtree_root)
+        if subtree_root not in results_by_url:
+            return None
+        entries = {}
+        self._inherit_metadata(results_by_url, index['root'], [subtree_root], index['root_metadata'], entries)
+        self.metadata_inheritance_cache_subsystem.set(
+            self._inheritance_tree_cache_key(course_id, position), {'version': index['version'], 'entries': entries}
+        )
+
+        for key in subtrees[position]['entries']:
+            del tree[key]
+        tree.update(entries)
+        return tree
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Put the metadata inheritance tree of the course in the request cache, if available.
+        """
+        if self.request_cache is not None:
+            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
+            # defined
+            if 'metadata_inheritance' not in self.request_cache.data:
+                self.request_cache.data['metadata_inheritance'] = {}
+            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
         Compute the metadata inheritance for the course.
         '''
-        tree = {}
+        tree = None
 
         course_id = self.fill_in_run(course_id)
         if not force_refresh:
@@ -755,45 +955,47 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
             # then look in any caching subsystem (e.g. memcached)
             if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(unicode(course_id), {})
+                tree = self._get_shared_metadata_inheritance_tree(course_id)
             else:
                 logging.warning(
                     'Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is \
                     OK in localdev and testing environment. Not OK in production.'
                 )
 
-        if not tree:
+        if tree is None:
             # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self._compute_metadata_inheritance_tree(course_id)
-
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+            # and write out the computed tree to the caching subsystem (e.g. memcached), if available
+            tree = self._compute_and_store_metadata_inheritance_tree(course_id)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
-        if self.request_cache is not None:
-            # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
-            # defined
-            if 'metadata_inheritance' not in self.request_cache.data:
-                self.request_cache.data['metadata_inheritance'] = {}
-            self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
 
         return tree
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, usage_key=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
+        If given the `usage_key` of the only xblock that changed, only the part of the tree it is in is recomputed.
+
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if usage_key is not None:
+                course_id = self.fill_in_run(course_id)
+                cached_metadata = self._refresh_metadata_inheritance_subtree(course_id, usage_key)
+                if cached_metadata is not None:
+                    self._set_request_cached_metadata_inheritance_tree(course_id, cached_metadata)
+            if cached_metadata is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+                self._forget_parent_index(course_id)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -805,6 +1007,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         del item['_id']
 
     @autoretry_read()
+    @request_metrics.measured('mongo_reads')
     def _query_children_for_cache_children(self, course_key, items):
         """
         Generate a pymongo in query for finding the items and return the payloads
@@ -961,10 +1164,11 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         course_org_filter = kwargs.get('org')
 
-        if course_org_filter:
-            course_records = self.collection.find({'_id.category': 'course', '_id.org': course_org_filter})
-        else:
-            course_records = self.collection.find({'_id.category': 'course'})
+        with request_metrics.measure('mongo_reads'):
+            if course_org_filter:
+                course_records = list(self.collection.find({'_id.category': 'course', '_id.org': course_org_filter}))
+            else:
+                course_records = list(self.collection.find({'_id.category': 'course'}))
 
         base_list = sum(
             [
@@ -985,6 +1189,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         return [course for course in base_list if not isinstance(course, ErrorDescriptor)]
 
+    @request_metrics.measured('mongo_reads')
     def _find_one(self, location):
         '''Look for a given location in the collection. If the item is not present, raise
         ItemNotFoundError.
@@ -1018,6 +1223,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         except ItemNotFoundError:
             return None
 
+    @request_metrics.measured('mongo_reads')
     def has_course(self, course_key, ignore_case=False, **kwargs):
         """
         Returns the course_id of the course if it was found, else None
@@ -1161,14 +1367,15 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             query['definition.children'] = qualifiers.pop('children')
 
         query.update(qualifiers)
-        items = self.collection.find(
-            query,
-            sort=[SORT_REVISION_FAVOR_DRAFT],
-        )
+        with request_metrics.measure('mongo_reads'):
+            items = list(self.collection.find(
+                query,
+                sort=[SORT_REVISION_FAVOR_DRAFT],
+            ))
 
         modules = self._load_items(
             course_id,
-            list(items),
+            items,
             using_descriptor_system=using_descriptor_system
         )
         return modules
@@ -1350,6 +1557,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         '''
         return self.get_course(location.course_key, depth)
 
+    @request_metrics.measured('mongo_writes')
     def _update_single_item(self, location, update, allow_not_found=False):
         """
         Set update on the specified item, and raises ItemNotFoundError
@@ -1426,6 +1634,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                     parent_cache.set(unicode(child), xblock.location)
 
             self._update_single_item(xblock.scope_ids.usage_id, payload, allow_not_found=allow_not_found)
+            if xblock.has_children:
+                self._forget_parent_index(course_key)
 
             # update subtree edited info for ancestors
             # don't update the subtree info for descendants of the publish root for efficiency
@@ -1440,7 +1650,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, usage_key=xblock.scope_ids.usage_id
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
@@ -1475,6 +1687,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                     jsonfields[field_name] = field.read_json(xblock)
         return jsonfields
 
+    @request_metrics.measured('mongo_reads')
     def _get_non_orphan_parents(self, location, parents, revision):
         """
         Extract non orphan parents by traversing the list of possible parents and remove current location
@@ -1502,6 +1715,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                         multi=False,
                         upsert=True,
                     )
+                    self._forget_parent_index(location.course_key)
                 elif ancestor_loc.category == 'course':
                     # once we reach the top location of the tree and if the location is not an orphan then the
                     # parent is not an orphan either
@@ -1523,22 +1737,30 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         if parent_cache.has(unicode(location)):
             return parent_cache.get(unicode(location))
 
-        # create a query with tag, org, course, and the children field set to the given location
-        query = self._course_key_to_son(location.course_key)
-        query['definition.children'] = unicode(location)
-
-        # if only looking for the PUBLISHED parent, set the revision in the query to None
-        if revision == ModuleStoreEnum.RevisionOption.published_only:
-            query['_id.revision'] = MongoRevisionKey.published
-
         def cache_and_return(parent_loc):  # pylint:disable=missing-docstring
             parent_cache.set(unicode(location), parent_loc)
             return parent_loc
 
-        # query the collection, sorting by DRAFT first
-        parents = list(
-            self.collection.find(query, {'_id': True}, sort=[SORT_REVISION_FAVOR_DRAFT])
-        )
+        parent_index = self._get_parent_index(location.course_key)
+        if parent_index is not None:
+            parents = parent_index.get(unicode(location), [])
+            # if only looking for the PUBLISHED parent, only keep the published ones
+            if revision == ModuleStoreEnum.RevisionOption.published_only:
+                parents = [parent for parent in parents if parent['_id']['revision'] == MongoRevisionKey.published]
+        else:
+            # create a query with tag, org, course, and the children field set to the given location
+            query = self._course_key_to_son(location.course_key)
+            query['definition.children'] = unicode(location)
+
+            # if only looking for the PUBLISHED parent, set the revision in the query to None
+            if revision == ModuleStoreEnum.RevisionOption.published_only:
+                query['_id.revision'] = MongoRevisionKey.published
+
+            # query the collection, sorting by DRAFT first
+            with request_metrics.measure('mongo_reads'):
+                parents = list(
+                    self.collection.find(query, {'_id': True}, sort=[SORT_REVISION_FAVOR_DRAFT])
+                )
         if len(parents) == 0:
             # no parents were found
             return cache_and_return(None)
@@ -1601,6 +1823,68 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             return parent
         return None
 
+    def _parent_index_cache_key(self, course_key):
+        """
+        The key of the parent index of the course in the request cache and the metadata_inheritance_cache_subsystem.
+        Like the index itself, it doesn't depend on the run.
+        """
+        return u'parents/{}/{}'.format(course_key.org, course_key.course)
+
+    def _get_parent_index(self, course_key):
+        """
+        Return the parent index of the course: a dict mapping the location url of each xblock that is listed as a
+        child in the course to the records ({'_id': ...}) of the xblocks listing it, drafts first.
+
+        The index is read from Mongo in one query, and kept in the request cache and in the
+        metadata_inheritance_cache_subsystem, from which _forget_parent_index removes it whenever the children of
+        an xblock of the course change.
+
+        Returns None if there is nowhere to keep the index, or while a bulk operation on the course has written to
+        it, since the index may no longer be accurate until the operation ends.
+        """
+        if self.request_cache is None and self.metadata_inheritance_cache_subsystem is None:
+            return None
+        bulk_record = self._get_bulk_ops_record(course_key.for_branch(None))
+        if bulk_record.active and bulk_record.dirty:
+            return None
+
+        cache_key = self._parent_index_cache_key(course_key)
+        request_indexes = {} if self.request_cache is None else self.request_cache.data.setdefault('parent-index', {})
+        parent_index = request_indexes.get(cache_key)
+        if parent_index is None and self.metadata_inheritance_cache_subsystem is not None:
+            parent_index = self.metadata_inheritance_cache_subsystem.get(cache_key)
+        if parent_index is None:
+            query = self._course_key_to_son(course_key)
+            query['definition.children'] = {'$exists': True}
+            with request_metrics.measure('mongo_reads'):
+                records = list(self.collection.find(
+                    query, {'_id': True, 'definition.children': True}, sort=[SORT_REVISION_FAVOR_DRAFT]
+                ))
+            parent_index = {}
+            for record in records:
+                for child in record.get('definition', {}).get('children', []):
+                    parent_index.setdefault(child, []).append({'_id': record['_id']})
+            if self.metadata_inheritance_cache_subsystem is not None:
+                self.metadata_inheritance_cache_subsystem.set(cache_key, parent_index)
+        request_indexes[cache_key] = parent_index
+        return parent_index
+
+    def _forget_parent_index(self, course_key):
+        """
+        Remove the parent index of the course from the caches after the children of an xblock of it changed.
+
+        During a bulk operation the index isn't used once the course is written to, so it is only forgotten when the
+        operation ends, by refresh_cached_metadata_inheritance_tree.
+        """
+        course_key = course_key.for_branch(None)
+        if self._is_in_bulk_operation(course_key):
+            return
+        cache_key = self._parent_index_cache_key(course_key)
+        if self.request_cache is not None:
+            self.request_cache.data.get('parent-index', {}).pop(cache_key, None)
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.delete(cache_key)
+
     def get_modulestore_type(self, course_key=None):
         """
         Returns an enumeration-like type reflecting the type of this modulestore per ModuleStoreEnum.Type
@@ -1609,6 +1893,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         """
         return ModuleStoreEnum.Type.mongo
 
+    @request_metrics.measured('mongo_reads')
     def get_orphans(self, course_key, **kwargs):
         """
         Return an array of all of the locations for orphans in the course.
@@ -1630,6 +1915,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         item_locs -= all_reachable
         return [course_key.make_usage_key_from_deprecated_string(item_loc) for item_loc in item_locs]
 
+    @request_metrics.measured('mongo_reads')
     def get_courses_for_wiki(self, wiki_slug, **kwargs):
         """
         Return the list of courses which use this wiki_slug
@@ -9,6 +9,8 @@ and otherwise returns i4x://org/course/cat/name).
 import pymongo
 import logging
 
+from dogstats_wrapper import request_metrics
+
 from opaque_keys.edx.locations import Location
 from xmodule.exceptions import InvalidVersionError
 from xmodule.modulestore import ModuleStoreEnum
@@ -117,6 +119,7 @@ class DraftModuleStore(MongoModuleStore):
         else:
             raise UnsupportedRevisionError()
 
+    @request_metrics.measured('mongo_reads')
     def has_item(self, usage_key, revision=None):
         """
         Returns True if location exists in this ModuleStore.
@@ -149,6 +152,7 @@ class DraftModuleStore(MongoModuleStore):
         else:
             raise UnsupportedRevisionError()
 
+    @request_metrics.measured('mongo_writes')
     def delete_course(self, course_key, user_id):
         """
         :param course_key: which course to delete
@@ -162,6 +166,7 @@ class DraftModuleStore(MongoModuleStore):
         # delete all of the db records for the course
         course_query = self._course_key_to_son(course_key)
         self.collection.remove(course_query, multi=True)
+        self._forget_parent_index(course_key)
         self.delete_all_asset_metadata(course_key, user_id)
 
     def clone_course(self, source_course_id, dest_course_id, user_id, fields=None, **kwargs):
@@ -240,6 +245,7 @@ class DraftModuleStore(MongoModuleStore):
 
             self.update_item(module, user_id, allow_not_found=True)
 
+    @request_metrics.measured('mongo_reads')
     def _get_raw_parent_locations(self, location, key_revision):
         """
         Get the parents but don't unset the revision in their locations.
@@ -388,6 +394,7 @@ class DraftModuleStore(MongoModuleStore):
         # get_item will wrap_draft so don't call it here (otherwise, it would override the is_draft attribute)
         return self.get_item(location)
 
+    @request_metrics.measured('mongo_writes')
     def _convert_to_draft(self, location, user_id, delete_published=False, ignore_if_draft=False):
         """
         Internal method with additional internal parameters to convert a subtree to draft.
@@ -633,6 +640,7 @@ class DraftModuleStore(MongoModuleStore):
             bulk_record = self._get_bulk_ops_record(root_usages[0].course_key)
             bulk_record.dirty = True
             self.collection.remove({'_id': {'$in': to_be_deleted}}, safe=self.collection.safe)
+        self._forget_parent_index(root_usages[0].course_key)
 
     @MongoModuleStore.memoize_request_cache
     def has_changes(self, xblock):
@@ -737,6 +745,7 @@ class DraftModuleStore(MongoModuleStore):
         if len(to_be_deleted) > 0:
             bulk_record.dirty = True
             self.collection.remove({'_id': {'$in': to_be_deleted}})
+            self._forget_parent_index(course_key)
 
         self._flag_publish_event(course_key)
 
@@ -817,7 +826,8 @@ class DraftModuleStore(MongoModuleStore):
                     query.append(as_draft(item_usage_key).to_deprecated_son())
             if query:
                 query = {'_id': {'$in': query}}
-                to_process_drafts = list(self.collection.find(query))
+                with request_metrics.measure('mongo_reads'):
+                    to_process_drafts = list(self.collection.find(query))
 
                 # now we have to go through all drafts and replace the non-draft
                 # with the draft. This is because the semantics of the DraftStore is to
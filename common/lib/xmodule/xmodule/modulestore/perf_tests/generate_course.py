@@ -0,0 +1,77 @@
+"""
+Generates synthetic courses of a given shape in a modulestore, for performance tests.
+"""
+
+from collections import namedtuple
+
+from xmodule.modulestore import ModuleStoreEnum
+
+# A simple multiple choice problem, so that problems have a realistic amount of content.
+PROBLEM_XML = u"""<problem>
+<multiplechoiceresponse>
+  <p>Problem {index}: which of these numbers is the largest?</p>
+  <choicegroup type="MultipleChoice">
+    <choice correct="false">1</choice>
+    <choice correct="false">2</choice>
+    <choice correct="true">{index}00</choice>
+  </choicegroup>
+</multiplechoiceresponse>
+</problem>"""
+
+
+class CourseShape(namedtuple('CourseShape', 'chapters sequentials verticals problems')):
+    """
+    The shape of a synthetic course: the number of chapters in the course, and
+    of sequentials, verticals and problems in each chapter, sequential and vertical.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return 'x'.join(str(count) for count in self)
+
+
+# Course shapes used by default, from a small course to one with ~3,700 blocks.
+COURSE_SHAPES = (
+    CourseShape(2, 2, 2, 2),
+    CourseShape(5, 5, 4, 3),
+    CourseShape(10, 8, 5, 8),
+)
+
+
+def make_course(store, course_key, shape, user_id=ModuleStoreEnum.UserID.test, publish=True):
+    """
+    Create a course with `course_key` and the given `shape` in `store`, and publish
+    it unless `publish` is False.  Block ids follow the blocks' positions, e.g.
+    ``problem_1_0_2_3``, so that courses of the same shape are identical.
+
+    Returns the course's location.
+    """
+    with store.bulk_operations(course_key):
+        course = store.create_course(
+            course_key.org, course_key.course, course_key.run, user_id,
+            fields={'display_name': u'Synthetic course {}'.format(shape)},
+        )
+        _make_children(store, user_id, course.location, shape, ('chapter', 'sequential', 'vertical', 'problem'), ())
+        if publish:
+            store.publish(course.location, user_id)
+    return course.location
+
+
+def _make_children(store, user_id, parent_location, counts, block_types, position):
+    """
+    Create `counts[0]` children of type `block_types[0]` under `parent_location`,
+    and recursively their own children.
+    """
+    if not counts:
+        return
+    block_type = block_types[0]
+    for index in xrange(counts[0]):
+        child_position = position + (index,)
+        suffix = '_'.join(str(number) for number in child_position)
+        fields = {'display_name': u'{} {}'.format(block_type.capitalize(), suffix)}
+        if block_type == 'problem':
+            fields['data'] = PROBLEM_XML.format(index=index + 1)
+        child = store.create_child(
+            user_id, parent_location, block_type, block_id=u'{}_{}'.format(block_type, suffix), fields=fields,
+        )
+        _make_children(store, user_id, child.location, counts[1:], block_types[1:], child_position)
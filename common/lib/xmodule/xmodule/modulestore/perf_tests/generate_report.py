@@ -77,13 +77,14 @@ class ReportGenerator(object):
     """
     Base class for report generation.
     """
+    sel_sql = 'select id, run_id, block_desc, elapsed, timestamp FROM block_times ORDER BY run_id DESC'
+
     def __init__(self, db_name):
         # Read data from all modulestore combos.
         conn = sqlite3.connect(db_name)
         conn.row_factory = sqlite3.Row
-        sel_sql = 'select id, run_id, block_desc, elapsed, timestamp FROM block_times ORDER BY run_id DESC'
         cur = conn.cursor()
-        cur.execute(sel_sql)
+        cur.execute(self.sel_sql)
         self.all_rows = cur.fetchall()
 
 
@@ -265,11 +266,80 @@ class FindReportGen(ReportGenerator):
         return html
 
 
+class OperationsReportGen(ReportGenerator):
+    """
+    Class which generates report for modulestore operations performance test data.
+    """
+    sel_sql = (
+        'select run_id, store, shape, operation, elapsed, finds, sends, memory '
+        'FROM modulestore_measurements ORDER BY run_id DESC'
+    )
+
+    def __init__(self, db_name):
+        super(OperationsReportGen, self).__init__(db_name)
+        self._read_measurement_data()
+
+    def _read_measurement_data(self):
+        """
+        Read in the latest measurements from the sqlite DB and save into a dict.
+        """
+        self.run_data = {}
+
+        self.all_modulestores = set()
+        for row in self.all_rows:
+            self.all_modulestores.add(row['store'])
+
+            # Save the data in a multi-level dict - { operation1: { shape1: { store1: row, ...}, ...}, ...}.
+            operation_data = self.run_data.setdefault(row['operation'], {})
+            shape_data = operation_data.setdefault(row['shape'], {})
+            __ = shape_data.setdefault(row['store'], row)
+
+    def generate_html(self):
+        """
+        Generate HTML.
+        """
+        html = HTMLDocument("Results")
+
+        ms_keys = sorted(self.all_modulestores)
+        columns = ["Course Shape", ]
+        for k in ms_keys:
+            columns.extend([
+                "{} (ms)".format(k),
+                "{} (finds)".format(k),
+                "{} (sends)".format(k),
+                "{} (memory KB)".format(k),
+            ])
+
+        # Output each operation to a different table.
+        for operation in sorted(self.run_data.keys()):
+            per_operation = self.run_data[operation]
+            operation_table = HTMLTable(columns)
+            for shape in sorted(per_operation.keys(), key=lambda shape: [int(count) for count in shape.split('x')]):
+                per_shape = per_operation[shape]
+                row = [shape, ]
+                for modulestore in ms_keys:
+                    if modulestore in per_shape:
+                        measurement = per_shape[modulestore]
+                        row.extend([
+                            "{:.1f}".format(measurement['elapsed']),
+                            "{}".format(measurement['finds']),
+                            "{}".format(measurement['sends']),
+                            "{}".format(measurement['memory']),
+                        ])
+                    else:
+                        row.extend(["", "", "", ""])
+                operation_table.add_row(row)
+            html.add_header(2, operation)
+            html.add_to_body(operation_table.table)
+
+        return html
+
+
 if click is not None:
     @click.command()
     @click.argument('outfile', type=click.File('w'), default='-', required=False)
     @click.option('--db_name', help='Name of sqlite database from which to read data.', default=DB_NAME)
-    @click.option('--data_type', help='Data type to process. One of: "imp_exp" or "find"', default="find")
+    @click.option('--data_type', help='Data type to process. One of: "imp_exp", "find" or "ops"', default="find")
     def cli(outfile, db_name, data_type):
         """
         Generate an HTML report from the sqlite timing data.
@@ -280,6 +350,9 @@ if click is not None:
         elif data_type == 'find':
             f_gen = FindReportGen(db_name)
             html = f_gen.generate_html()
+        elif data_type == 'ops':
+            ops_gen = OperationsReportGen(db_name)
+            html = ops_gen.generate_html()
         click.echo(html.tostring(), file=outfile)
 
 if __name__ == '__main__':
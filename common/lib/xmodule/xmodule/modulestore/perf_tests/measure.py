@@ -0,0 +1,126 @@
+"""
+Measures modulestore operations in performance tests: their duration, the
+number of mongo queries and writes they make, and the memory they leave
+allocated.  Measurements are saved in the sqlite database that
+generate_report.py reads.
+"""
+
+from contextlib import contextmanager
+import datetime
+import gc
+import resource
+import sqlite3
+import time
+
+from mock import Mock, patch
+import pymongo.message
+
+from xmodule.modulestore.perf_tests.generate_report import DB_NAME
+
+# pymongo functions building messages which read from mongo...
+FIND_METHODS = ('query', 'get_more')
+# ...and which write to it (see check_mongo_calls).
+SEND_METHODS = ('insert', 'update', 'delete', '_do_batched_write_command', '_do_batched_insert')
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS modulestore_measurements (
+        id INTEGER PRIMARY KEY,
+        run_id TEXT,
+        store TEXT,
+        shape TEXT,
+        operation TEXT,
+        elapsed REAL,
+        finds INTEGER,
+        sends INTEGER,
+        memory INTEGER,
+        timestamp TEXT
+    )
+"""
+
+
+class Measurement(object):
+    """
+    What an operation cost: its duration in ms, how many mongo messages it
+    sent to read (`finds`) and write (`sends`), and by how many KB it grew the
+    memory of the process.
+    """
+    def __init__(self):
+        self.elapsed = None
+        self.finds = 0
+        self.sends = 0
+        self.memory = None
+
+    def __repr__(self):
+        return 'Measurement(elapsed={0.elapsed}, finds={0.finds}, sends={0.sends}, memory={0.memory})'.format(self)
+
+
+def resident_memory():
+    """
+    Return the memory used by this process, in KB.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / 1024
+    except (IOError, OSError):
+        # Not on Linux; the peak is the best we can do.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def measure():
+    """
+    Measure the code run in the with statement, yielding a `Measurement`
+    which is filled in when it ends.  Keep anything whose memory should be
+    counted referenced until then.
+    """
+    measurement = Measurement()
+    mocks = {
+        method: Mock(wraps=getattr(pymongo.message, method))
+        for method in FIND_METHODS + SEND_METHODS
+        if hasattr(pymongo.message, method)
+    }
+
+    gc.collect()
+    memory_before = resident_memory()
+    start = time.time()
+    with patch.multiple(pymongo.message, **mocks):
+        yield measurement
+    measurement.elapsed = (time.time() - start) * 1000
+    gc.collect()
+    measurement.memory = resident_memory() - memory_before
+
+    measurement.finds = sum(mock.call_count for method, mock in mocks.items() if method in FIND_METHODS)
+    measurement.sends = sum(mock.call_count for method, mock in mocks.items() if method in SEND_METHODS)
+
+
+class MeasurementRecorder(object):
+    """
+    Saves the measurements of one run of the performance tests in the sqlite
+    database `db_name`.
+    """
+    def __init__(self, db_name=DB_NAME, run_id=None):
+        self.db_name = db_name
+        self.run_id = run_id or datetime.datetime.now().isoformat()
+        with sqlite3.connect(self.db_name) as conn:
+            conn.execute(CREATE_TABLE_SQL)
+
+    @contextmanager
+    def measure(self, store, shape, operation):
+        """
+        Measure `operation`, run in the with statement on a course of `shape`
+        in the modulestore named `store`, and save the measurement.
+        """
+        with measure() as measurement:
+            yield measurement
+        with sqlite3.connect(self.db_name) as conn:
+            conn.execute(
+                'INSERT INTO modulestore_measurements '
+                '(run_id, store, shape, operation, elapsed, finds, sends, memory, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    self.run_id, store, str(shape), operation, measurement.elapsed,
+                    measurement.finds, measurement.sends, measurement.memory,
+                    datetime.datetime.now().isoformat(),
+                )
+            )
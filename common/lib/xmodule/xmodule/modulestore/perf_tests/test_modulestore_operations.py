@@ -0,0 +1,128 @@
+"""
+Performance tests of common modulestore operations on synthetic courses.
+
+The measurements are saved in the sqlite database read by generate_report.py:
+
+    python generate_report.py --data_type=ops report.html
+
+The modulestores run against the mongod given by the EDXAPP_TEST_MONGO_HOST
+and EDXAPP_TEST_MONGO_PORT environment variables (localhost:27017 by default).
+"""
+from functools import partial
+import itertools
+from shutil import rmtree
+from tempfile import mkdtemp
+import unittest
+
+import ddt
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.perf_tests.generate_course import COURSE_SHAPES, make_course
+from xmodule.modulestore.perf_tests.measure import MeasurementRecorder
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    MIXED_MODULESTORE_SETUPS,
+    SHORT_NAME_MAP,
+)
+from xmodule.modulestore.xml_exporter import export_course_to_xml
+from xmodule.modulestore.xml_importer import import_course_from_xml
+
+# Depths at which courses are read.
+COURSE_DEPTHS = (0, 1, 2, None)
+
+# One measurements run per test run.
+RECORDER = None
+
+
+def get_recorder():
+    """
+    Return the recorder of this test run's measurements.
+    """
+    global RECORDER  # pylint: disable=global-statement
+    if RECORDER is None:
+        RECORDER = MeasurementRecorder()
+    return RECORDER
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class ModulestoreOperationTimings(unittest.TestCase):
+    """
+    This class exists to measure modulestore operations on courses of
+    different shapes, in the old mongo and split modulestores.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(ModulestoreOperationTimings, self).setUp()
+        self.export_dir = mkdtemp()
+        self.addCleanup(rmtree, self.export_dir, ignore_errors=True)
+        self.user_id = ModuleStoreEnum.UserID.test
+
+    @ddt.data(*itertools.product(
+        MIXED_MODULESTORE_SETUPS,
+        COURSE_SHAPES,
+    ))
+    @ddt.unpack
+    def test_operations(self, store_builder, shape):
+        """
+        Measure each operation on a course of `shape`.
+        """
+        measure = partial(get_recorder().measure, SHORT_NAME_MAP[store_builder], shape)
+
+        with store_builder.build() as (content_store, store):
+            course_key = store.make_course_key('perf', 'course', str(shape))
+            with measure('create'):
+                course_location = make_course(store, course_key, shape, self.user_id)
+
+            with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                for depth in COURSE_DEPTHS:
+                    with measure('get_course:depth={}'.format(depth)):
+                        course = store.get_course(course_key, depth=depth)
+                    del course
+
+                with measure('get_items:category'):
+                    items = store.get_items(course_key, qualifiers={'category': 'problem'})
+                self.assertEqual(len(items), shape.chapters * shape.sequentials * shape.verticals * shape.problems)
+                del items
+
+                with measure('get_items:name'):
+                    items = store.get_items(course_key, qualifiers={'category': 'problem', 'name': 'problem_0_0_0_0'})
+                self.assertEqual(len(items), 1)
+
+                with measure('get_items:settings'):
+                    __ = store.get_items(course_key, settings={'display_name': 'Vertical 0_0_0'})
+
+                with measure('get_parent_location'):
+                    parent = store.get_parent_location(items[0].location)
+                self.assertEqual(parent.block_id, 'vertical_0_0_0')
+
+            problem = store.get_item(items[0].location)
+            problem.display_name = 'Edited problem'
+            store.update_item(problem, self.user_id)
+            with measure('publish'):
+                store.publish(course_location, self.user_id)
+
+            with measure('export'):
+                export_course_to_xml(store, content_store, course_key, self.export_dir, 'exported_course')
+
+            import_key = store.make_course_key('perf', 'imported', str(shape))
+            with measure('import'):
+                import_course_from_xml(
+                    store,
+                    self.user_id,
+                    self.export_dir,
+                    source_dirs=['exported_course'],
+                    static_content_store=content_store,
+                    target_id=import_key,
+                    create_if_not_present=True,
+                    raise_on_failure=True,
+                )
+
+            clone_key = store.make_course_key('perf', 'cloned', str(shape))
+            with measure('clone'):
+                store.clone_course(course_key, clone_key, self.user_id)
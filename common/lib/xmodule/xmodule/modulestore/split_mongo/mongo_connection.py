@@ -1,7 +1,13 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import cPickle as pickle
+import logging
 import re
+import threading
+import zlib
+from collections import OrderedDict
+
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
 
@@ -9,6 +15,7 @@ import pymongo
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
 
 from contracts import check, new_contract
+from dogstats_wrapper import request_metrics
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
@@ -18,27 +25,37 @@ import pytz
 
 new_contract('BlockData', BlockData)
 
+log = logging.getLogger(__name__)
+
+
+def _fields_from_mongo(fields):
+    """
+    Converts a block's stored 'children' field from [[block_type, block_id]] to [BlockKey], in place.
+    """
+    if 'children' in fields:
+        check('list(list[2])', fields['children'])
+        fields['children'] = [BlockKey(*child) for child in fields['children']]
+    return fields
+
 
 def structure_from_mongo(structure):
     """
     Converts the 'blocks' key from a list [block_data] to a map
         {BlockKey: block_data}.
     Converts 'root' from [block_type, block_id] to BlockKey.
-    Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
+    Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey] when each
+        block's fields are first used (see BlockData.from_mongo).
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
     """
     check('seq[2]', structure['root'])
     check('list(dict)', structure['blocks'])
-    for block in structure['blocks']:
-        if 'children' in block['fields']:
-            check('list(list[2])', block['fields']['children'])
 
     structure['root'] = BlockKey(*structure['root'])
     new_blocks = {}
     for block in structure['blocks']:
-        if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
+        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData.from_mongo(
+            block, _fields_from_mongo
+        )
     structure['blocks'] = new_blocks
 
     return structure
@@ -70,17 +87,162 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A size-bounded cache of structure documents keyed by structure ``_id``.
+
+    Structures are immutable once written, so entries never need invalidation.
+    Entries are kept as compressed pickles of the raw mongo document, so every
+    hit hands back a fresh document that the caller is free to mutate (e.g. via
+    :func:`structure_from_mongo`).
+
+    There are two tiers: an in-process LRU holding at most ``max_entries``
+    structures and, optionally, a shared django-style cache (anything with
+    ``get``, ``get_many`` and ``set``) which is consulted on local misses.
+    """
+    def __init__(self, max_entries=1000, shared_cache=None, key_prefix='split_structure'):
+        self.max_entries = max_entries
+        self.shared_cache = shared_cache
+        self.key_prefix = key_prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _shared_key(self, structure_id):
+        """
+        Return the key used for ``structure_id`` in the shared cache.
+        """
+        return u'{}.{}'.format(self.key_prefix, structure_id)
+
+    def _local_get(self, structure_id):
+        """
+        Return the serialized entry for ``structure_id`` from the local LRU,
+        marking it as most recently used, or None.
+        """
+        with self._lock:
+            data = self._entries.pop(structure_id, None)
+            if data is not None:
+                self._entries[structure_id] = data
+            return data
+
+    def _local_set(self, structure_id, data):
+        """
+        Store a serialized entry in the local LRU, evicting the least recently used entries.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(structure_id, None)
+            self._entries[structure_id] = data
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _serialize(structure):
+        """
+        Pickle and compress a raw structure document.
+        """
+        # level 1 is the fastest and still shrinks structures by ~10x
+        return zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1)
+
+    @staticmethod
+    def _deserialize(data):
+        """
+        Inverse of :meth:`_serialize`.
+        """
+        return pickle.loads(zlib.decompress(data))
+
+    def get(self, structure_id):
+        """
+        Return the raw structure document for ``structure_id``, or None if it isn't cached.
+        """
+        return self.get_many([structure_id]).get(structure_id)
+
+    def get_many(self, structure_ids):
+        """
+        Return a dict of ``{structure_id: raw structure document}`` for every id in
+        ``structure_ids`` which is cached in either tier.
+        """
+        found = {}
+        missing = []
+        for structure_id in structure_ids:
+            data = self._local_get(structure_id)
+            if data is None:
+                missing.append(structure_id)
+            else:
+                self.hits += 1
+                found[structure_id] = self._deserialize(data)
+
+        if missing and self.shared_cache is not None:
+            shared_keys = {self._shared_key(structure_id): structure_id for structure_id in missing}
+            try:
+                shared_entries = self.shared_cache.get_many(shared_keys.keys())
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Unable to read structures from the shared structure cache")
+                shared_entries = {}
+            for shared_key, data in shared_entries.iteritems():
+                structure_id = shared_keys[shared_key]
+                self.shared_hits += 1
+                self._local_set(structure_id, data)
+                found[structure_id] = self._deserialize(data)
+                missing.remove(structure_id)
+
+        self.misses += len(missing)
+        return found
+
+    def set(self, structure):
+        """
+        Cache the raw structure document ``structure`` under its ``_id``.
+        """
+        data = self._serialize(structure)
+        self._local_set(structure['_id'], data)
+        if self.shared_cache is not None:
+            try:
+                # structures are immutable, so they never need to time out
+                self.shared_cache.set(self._shared_key(structure['_id']), data, None)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Unable to write structure %s to the shared structure cache", structure['_id'])
+
+    def clear(self):
+        """
+        Empty the local tier and reset the counters. The shared tier is left alone.
+        """
+        with self._lock:
+            self._entries.clear()
+        self.hits = self.shared_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Return a dict of the cache counters.
+        """
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Arguments:
+            structure_cache (StructureCache): if given, structures are read through this cache.
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +284,16 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure_from_mongo(structure)
+
+        with request_metrics.measure('mongo_reads'):
+            structure = self.structures.find_one({'_id': key})
+        if self.structure_cache is not None and structure is not None:
+            self.structure_cache.set(structure)
+        return structure_from_mongo(structure)
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
@@ -132,9 +303,24 @@ class MongoConnection(object):
         Arguments:
             ids (list): A list of structure ids
         """
-        return [structure_from_mongo(structure) for structure in self.structures.find({'_id': {'$in': ids}})]
+        if self.structure_cache is None:
+            with request_metrics.measure('mongo_reads'):
+                structures = list(self.structures.find({'_id': {'$in': ids}}))
+            return [structure_from_mongo(structure) for structure in structures]
+
+        cached = self.structure_cache.get_many(ids)
+        structures = cached.values()
+        missing = [structure_id for structure_id in ids if structure_id not in cached]
+        if missing:
+            with request_metrics.measure('mongo_reads'):
+                found = list(self.structures.find({'_id': {'$in': missing}}))
+            for structure in found:
+                self.structure_cache.set(structure)
+                structures.append(structure)
+        return [structure_from_mongo(structure) for structure in structures]
 
     @autoretry_read()
+    @request_metrics.measured('mongo_reads')
     def find_structures_derived_from(self, ids):
         """
         Return all structures that were immediately derived from a structure listed in ``ids``.
@@ -145,6 +331,7 @@ class MongoConnection(object):
         return [structure_from_mongo(structure) for structure in self.structures.find({'previous_version': {'$in': ids}})]
 
     @autoretry_read()
+    @request_metrics.measured('mongo_reads')
     def find_ancestor_structures(self, original_version, block_key):
         """
         Find all structures that originated from ``original_version`` that contain ``block_key``.
@@ -169,12 +356,14 @@ class MongoConnection(object):
             })
         ]
 
+    @request_metrics.measured('mongo_writes')
     def insert_structure(self, structure):
         """
         Insert a new structure into the database.
         """
         self.structures.insert(structure_to_mongo(structure))
 
+    @request_metrics.measured('mongo_reads')
     def get_course_index(self, key, ignore_case=False):
         """
         Get the course_index from the persistence mechanism whose id is the given key
@@ -191,6 +380,7 @@ class MongoConnection(object):
             }
         return self.course_index.find_one(query)
 
+    @request_metrics.measured('mongo_reads')
     def find_matching_course_indexes(self, branch=None, search_targets=None, org_target=None):
         """
         Find the course_index matching particular conditions.
@@ -213,8 +403,9 @@ class MongoConnection(object):
         if org_target:
             query['org'] = org_target
 
-        return self.course_index.find(query)
+        return list(self.course_index.find(query))
 
+    @request_metrics.measured('mongo_writes')
     def insert_course_index(self, course_index):
         """
         Create the course_index in the db
@@ -222,6 +413,7 @@ class MongoConnection(object):
         course_index['last_update'] = datetime.datetime.now(pytz.utc)
         self.course_index.insert(course_index)
 
+    @request_metrics.measured('mongo_writes')
     def update_course_index(self, course_index, from_index=None):
         """
         Update the db record for course_index.
@@ -244,6 +436,7 @@ class MongoConnection(object):
         course_index['last_update'] = datetime.datetime.now(pytz.utc)
         self.course_index.update(query, course_index, upsert=False,)
 
+    @request_metrics.measured('mongo_writes')
     def delete_course_index(self, course_key):
         """
         Delete the course_index from the persistence mechanism whose id is the given course_index
@@ -254,18 +447,21 @@ class MongoConnection(object):
         }
         return self.course_index.remove(query)
 
+    @request_metrics.measured('mongo_reads')
     def get_definition(self, key):
         """
         Get the definition from the persistence mechanism whose id is the given key
         """
         return self.definitions.find_one({'_id': key})
 
+    @request_metrics.measured('mongo_reads')
     def get_definitions(self, definitions):
         """
         Retrieve all definitions listed in `definitions`.
         """
-        return self.definitions.find({'_id': {'$in': definitions}})
+        return list(self.definitions.find({'_id': {'$in': definitions}}))
 
+    @request_metrics.measured('mongo_writes')
     def insert_definition(self, definition):
         """
         Create the definition in the db
@@ -76,6 +76,40 @@ class MemoryCache(object):
         """
         self._data[key] = value
 
+    def get_many(self, keys):
+        """
+        Get the keys that have been set from the cache, as a dict.
+
+        Args:
+            keys: The keys to get.
+        """
+        return {key: self._data[key] for key in keys if key in self._data}
+
+    def add(self, key, value, timeout=None):  # pylint: disable=unused-argument
+        """
+        Set a key in the cache, unless it has already been set.
+
+        Returns whether the key was set.
+
+        Args:
+            key: The key to set.
+            value: The value to set it to.
+            timeout: Ignored; keys don't expire.
+        """
+        if key in self._data:
+            return False
+        self._data[key] = value
+        return True
+
+    def delete(self, key):
+        """
+        Delete a key from the cache.
+
+        Args:
+            key: The key to delete.
+        """
+        self._data.pop(key, None)
+
 
 class MongoContentstoreBuilder(object):
     """
@@ -17,6 +17,7 @@ from uuid import uuid4
 from datetime import datetime
 from pytz import UTC
 import unittest
+from mock import patch
 from xblock.core import XBlock
 
 from xblock.fields import Scope, Reference, ReferenceList, ReferenceValueDict
@@ -45,6 +46,8 @@ from xmodule.modulestore.tests.utils import LocationMixin
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import MemoryCache
 
 
 log = logging.getLogger(__name__)
@@ -778,6 +781,82 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_metadata_inheritance_subtree_refresh(self):
+        """
+        Editing an xblock should only recompute the stored inheritance tree of the chapter it is in.
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        course = self.draft_store.create_course("TestX", "InheritanceTest", "1234_A1", self.dummy_user)
+        self.addCleanup(self.draft_store.delete_course, course.id, self.dummy_user)
+        for __ in range(2):
+            self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+        course = self.draft_store.get_course(course.id)
+        sequential = self.draft_store.create_child(self.dummy_user, course.children[0], "sequential")
+        problem = self.draft_store.create_child(self.dummy_user, sequential.location, "problem")
+
+        tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id, force_refresh=True)
+        self.assertEqual(tree, self.draft_store._compute_metadata_inheritance_tree(course.id))
+        self.assertNotIn('due', tree[unicode(problem.location)])
+        index, subtrees, __ = self.draft_store._read_metadata_inheritance_tree(course.id)
+
+        sequential.due = datetime(2015, 1, 1, tzinfo=UTC)
+        self.draft_store.update_item(sequential, self.dummy_user)
+
+        new_index, new_subtrees, new_tree = self.draft_store._read_metadata_inheritance_tree(course.id)
+        self.assertEqual(new_tree, self.draft_store._compute_metadata_inheritance_tree(course.id))
+        self.assertIn('due', new_tree[unicode(problem.location)])
+        # Only the first chapter's subtree was stored again.
+        self.assertIs(new_index, index)
+        self.assertIsNot(new_subtrees[0], subtrees[0])
+        self.assertIs(new_subtrees[1], subtrees[1])
+
+    def test_parent_index(self):
+        """
+        Parents should be found from the course's parent index, which is read from Mongo once, and forgotten when
+        the children of an xblock change.
+        """
+        self.draft_store.metadata_inheritance_cache_subsystem = MemoryCache()
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        course = self.draft_store.create_course("TestX", "ParentTest", "1234_A1", self.dummy_user)
+        self.addCleanup(self.draft_store.delete_course, course.id, self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, "sequential")
+
+        with check_mongo_calls(1):
+            self.assertEqual(
+                self.draft_store.get_parent_locations([chapter.location, sequential.location]),
+                {chapter.location: course.location, sequential.location: chapter.location}
+            )
+        with check_mongo_calls(0):
+            self.assertEqual(self.draft_store.get_parent_location(sequential.location), chapter.location)
+
+        other_chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+        other_chapter.children.append(sequential.location)
+        self.draft_store.update_item(other_chapter, self.dummy_user)
+        chapter = self.draft_store.get_item(chapter.location)
+        chapter.children = []
+        self.draft_store.update_item(chapter, self.dummy_user)
+        self.assertEqual(self.draft_store.get_parent_location(sequential.location), other_chapter.location)
+
+    def test_metadata_inheritance_tree_single_flight(self):
+        """
+        While another request computes a missing inheritance tree, a request should wait for it rather than
+        compute it too.
+        """
+        cache = MemoryCache()
+        self.draft_store.metadata_inheritance_cache_subsystem = cache
+        self.addCleanup(setattr, self.draft_store, 'metadata_inheritance_cache_subsystem', None)
+        course_key = SlashSeparatedCourseKey('edX', 'toy', '2012_Fall')
+        tree = self.draft_store._compute_and_store_metadata_inheritance_tree(course_key)
+        stored = self.draft_store._read_metadata_inheritance_tree(course_key)
+        cache.add(u'inheritance/{}/lock'.format(course_key), True)
+
+        with patch.object(self.draft_store, '_read_metadata_inheritance_tree', side_effect=[None, None, stored]):
+            with patch.object(self.draft_store, '_compute_and_store_metadata_inheritance_tree') as mock_compute:
+                self.assertEqual(self.draft_store._get_shared_metadata_inheritance_tree(course_key), tree)
+                self.assertFalse(mock_compute.called)
+
 
 class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
     '''
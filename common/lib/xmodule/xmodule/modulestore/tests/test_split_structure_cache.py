@@ -0,0 +1,172 @@
+"""
+Tests of the split modulestore structure cache.
+"""
+import copy
+import unittest
+
+from bson.objectid import ObjectId
+from mock import MagicMock, patch
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    MongoConnection, StructureCache, structure_from_mongo, structure_to_mongo
+)
+
+
+def make_structure():
+    """
+    Return a minimal raw (as stored in mongo) structure document.
+    """
+    return {
+        '_id': ObjectId(),
+        'root': ['course', 'course'],
+        'blocks': [
+            {
+                'block_type': 'course',
+                'block_id': 'course',
+                'fields': {'children': [['chapter', 'chapter1']]},
+                'edit_info': {},
+            },
+            {
+                'block_type': 'chapter',
+                'block_id': 'chapter1',
+                'fields': {},
+                'edit_info': {},
+            },
+        ],
+    }
+
+
+class DictCache(dict):
+    """
+    A minimal stand-in for a django cache backend.
+    """
+    def get_many(self, keys):  # pylint: disable=missing-docstring
+        return {key: self[key] for key in keys if key in self}
+
+    def set(self, key, value, timeout=None):  # pylint: disable=arguments-differ, unused-argument
+        self[key] = value
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests of StructureCache on its own.
+    """
+    def test_get_returns_copy(self):
+        cache = StructureCache()
+        structure = make_structure()
+        cache.set(structure)
+
+        cached = cache.get(structure['_id'])
+        self.assertEqual(cached, structure)
+        self.assertIsNot(cached, structure)
+        cached['blocks'] = []
+        self.assertEqual(cache.get(structure['_id']), structure)
+        self.assertEqual(cache.stats()['hits'], 2)
+
+    def test_miss(self):
+        cache = StructureCache()
+        self.assertIsNone(cache.get(ObjectId()))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_lru_eviction(self):
+        cache = StructureCache(max_entries=2)
+        structures = [make_structure() for __ in range(3)]
+        cache.set(structures[0])
+        cache.set(structures[1])
+        # touch the first one so that the second is the least recently used
+        cache.get(structures[0]['_id'])
+        cache.set(structures[2])
+
+        self.assertIsNone(cache.get(structures[1]['_id']))
+        self.assertIsNotNone(cache.get(structures[0]['_id']))
+        self.assertIsNotNone(cache.get(structures[2]['_id']))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['entries'], 2)
+
+    def test_shared_tier(self):
+        shared = DictCache()
+        structure = make_structure()
+        StructureCache(shared_cache=shared).set(structure)
+
+        other_process = StructureCache(shared_cache=shared)
+        self.assertEqual(other_process.get(structure['_id']), structure)
+        self.assertEqual(other_process.stats()['shared_hits'], 1)
+        # the entry is now in the local tier as well
+        other_process.get(structure['_id'])
+        self.assertEqual(other_process.stats()['hits'], 1)
+
+
+class TestMongoConnectionStructureCache(unittest.TestCase):
+    """
+    Tests that MongoConnection reads structures through its StructureCache.
+    """
+    def setUp(self):
+        super(TestMongoConnectionStructureCache, self).setUp()
+        with patch('xmodule.modulestore.split_mongo.mongo_connection.pymongo'):
+            with patch('xmodule.modulestore.split_mongo.mongo_connection.MongoProxy', MagicMock()):
+                self.connection = MongoConnection(
+                    'db', 'collection', 'host', structure_cache=StructureCache()
+                )
+        self.structures = self.connection.structures = MagicMock(name='structures')
+
+    def test_get_structure(self):
+        raw = make_structure()
+        self.structures.find_one.side_effect = lambda query: copy.deepcopy(raw)
+
+        first = self.connection.get_structure(raw['_id'])
+        second = self.connection.get_structure(raw['_id'])
+
+        self.assertEqual(self.structures.find_one.call_count, 1)
+        self.assertEqual(first['_id'], second['_id'])
+        self.assertItemsEqual(first['blocks'].keys(), second['blocks'].keys())
+        self.assertEqual(second['root'], BlockKey('course', 'course'))
+        self.assertEqual(
+            second['blocks'][BlockKey('course', 'course')].fields['children'],
+            [BlockKey('chapter', 'chapter1')]
+        )
+
+    def test_find_structures_by_id(self):
+        cached, uncached = make_structure(), make_structure()
+        self.connection.structure_cache.set(cached)
+        self.structures.find.return_value = [uncached]
+
+        found = self.connection.find_structures_by_id([cached['_id'], uncached['_id']])
+
+        self.structures.find.assert_called_once_with({'_id': {'$in': [uncached['_id']]}})
+        self.assertItemsEqual([structure['_id'] for structure in found], [cached['_id'], uncached['_id']])
+        self.assertIsNotNone(self.connection.structure_cache.get(uncached['_id']))
+
+
+class TestStructureFromMongo(unittest.TestCase):
+    """
+    Tests that structure_from_mongo decodes each block only when it is used.
+    """
+    def test_lazy_decoding(self):
+        structure = structure_from_mongo(make_structure())
+        course = structure['blocks'][BlockKey('course', 'course')]
+
+        self.assertEqual(course.block_type, 'course')
+        self.assertEqual(course.to_storable()['fields'], {'children': [BlockKey('chapter', 'chapter1')]})
+        # the chapter hasn't been used, so its edit info hasn't been decoded
+        self.assertIsNone(structure['blocks'][BlockKey('chapter', 'chapter1')]._edit_info)  # pylint: disable=protected-access
+
+    def test_copy(self):
+        structure = structure_from_mongo(make_structure())
+        copied = copy.deepcopy(structure)
+        course = copied['blocks'][BlockKey('course', 'course')]
+
+        course.fields['display_name'] = 'Copied'
+        course.edit_info.edited_by = 'copier'
+        self.assertEqual(course.fields['children'], [BlockKey('chapter', 'chapter1')])
+        original = structure['blocks'][BlockKey('course', 'course')]
+        self.assertNotIn('display_name', original.fields)
+        self.assertIsNone(original.edit_info.edited_by)
+
+    def test_round_trip(self):
+        stored = structure_to_mongo(structure_from_mongo(make_structure()))
+        stored_blocks = {block['block_id']: block for block in stored['blocks']}
+
+        self.assertEqual(stored_blocks['course']['fields']['children'], [BlockKey('chapter', 'chapter1')])
+        self.assertEqual(stored_blocks['chapter1']['block_type'], 'chapter')
+        self.assertIsNone(stored_blocks['chapter1']['edit_info']['edited_by'])
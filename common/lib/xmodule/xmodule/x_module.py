@@ -283,6 +283,12 @@ class XModuleMixin(XModuleFields, XBlockMixin):
     # student interacts with the module on the page.  A specific example is
     # FoldIt, which posts grade-changing updates through a separate API.
     always_recalculate_grades = False
+
+    # False if max_score() only depends on the content of this descriptor, and
+    # not on the student or their state (e.g. a random seed), so that it can be
+    # computed once and shared by all students.
+    max_score_varies_by_user = True
+
     # The default implementation of get_icon_class returns the icon_class
     # attribute of the class
     #
@@ -10,6 +10,7 @@ from contextlib import contextmanager
 from django.db import transaction, IntegrityError
 
 from courseware.field_overrides import FieldOverrideProvider  # pylint: disable=import-error
+from request_cache.middleware import RequestCache  # pylint: disable=import-error
 from ccx import ACTIVE_CCX_KEY  # pylint: disable=import-error
 
 from .models import CcxMembership, CcxFieldOverride
@@ -30,6 +31,10 @@ class CustomCoursesForEdxOverrideProvider(FieldOverrideProvider):
             return get_override_for_ccx(ccx, block, name, default)
         return default
 
+    def overrides_field(self, block, name):
+        ccx = get_current_ccx()
+        return bool(ccx) and name in _get_override_index_for_ccx(ccx)[1]
+
 
 class _CcxContext(threading.local):
     """
@@ -94,17 +99,46 @@ def _get_overrides_for_ccx(ccx, block):
     overrides set on this block for this CCX.
     """
     overrides = {}
-    query = CcxFieldOverride.objects.filter(
-        ccx=ccx,
-        location=block.location
-    )
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, value in _get_override_index_for_ccx(ccx)[0].get(_location_key(block), {}).iteritems():
+        field = block.fields[name]
+        overrides[name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_override_index_for_ccx(ccx):
+    """
+    Returns all of the overrides set for this CCX, loaded with a single query
+    and cached for the duration of the request: a tuple of a dictionary of the
+    serialized override values keyed by location and field name, and of the
+    set of the overridden field names.
+    """
+    request_cache = RequestCache.get_request_cache()
+    cache_key = _index_cache_key(ccx)
+    index = request_cache.data.get(cache_key)
+    if index is None:
+        by_location = {}
+        query = CcxFieldOverride.objects.filter(ccx=ccx)
+        for location, name, value in query.values_list('location', 'field', 'value'):
+            by_location.setdefault(location, {})[name] = value
+        names = set(name for overrides in by_location.itervalues() for name in overrides)
+        index = request_cache.data[cache_key] = (by_location, names)
+    return index
+
+
+def _index_cache_key(ccx):
+    """
+    The request cache key of the override index of `ccx`.
+    """
+    return u"ccx.overrides.index.{}".format(ccx.id)
+
+
+def _location_key(block):
+    """
+    The location of `block`, as stored in CcxFieldOverride.location.
+    """
+    return CcxFieldOverride._meta.get_field('location').get_prep_value(block.location)  # pylint: disable=protected-access
+
+
 @transaction.commit_on_success
 def override_field_for_ccx(ccx, block, name, value):
     """
@@ -128,6 +162,7 @@ def override_field_for_ccx(ccx, block, name, value):
             field=name)
         override.value = value
     override.save()
+    RequestCache.get_request_cache().data.pop(_index_cache_key(ccx), None)
     if hasattr(block, '_ccx_overrides'):
         del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
 
@@ -145,6 +180,7 @@ def clear_override_for_ccx(ccx, block, name):
             location=block.location,
             field=name).delete()
 
+        RequestCache.get_request_cache().data.pop(_index_cache_key(ccx), None)
         if hasattr(block, '_ccx_overrides'):
             del block._ccx_overrides[ccx.id]  # pylint: disable=protected-access
 
@@ -105,6 +105,18 @@ class TestFieldOverrides(ModuleStoreTestCase):
             dummy2 = chapter.start
             dummy3 = chapter.start
 
+    def test_overrides_read_with_one_query(self):
+        """
+        Test that the overrides of all of the blocks are read with one query.
+        """
+        ccx_start = datetime.datetime(2014, 12, 25, 00, 00, tzinfo=pytz.UTC)
+        chapter = self.course.get_children()[0]
+        override_field_for_ccx(self.ccx, chapter, 'start', ccx_start)
+        with self.assertNumQueries(1):
+            for block in iter_blocks(self.course):
+                dummy_start = block.start
+                dummy_due = block.due
+
     def test_override_is_inherited(self):
         """
         Test that sequentials inherit overridden start date from chapter.
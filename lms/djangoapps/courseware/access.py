@@ -29,10 +29,10 @@ from courseware.masquerade import get_masquerade_role, is_masquerading_as_studen
 from student import auth
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
 from student.roles import (
-    GlobalStaff, CourseStaffRole, CourseInstructorRole,
-    OrgStaffRole, OrgInstructorRole, CourseBetaTesterRole
+    GlobalStaff, CourseStaffRole, CourseInstructorRole, CourseBetaTesterRole, get_course_roles
 )
 from util.milestones_helpers import get_pre_requisite_courses_not_completed
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 
 import dogstats_wrapper as dog_stats_api
 
@@ -83,7 +83,7 @@ def has_access(user, action, obj, course_key=None):
 
     # delegate the work to type-specific functions.
     # (start with more specific types, then get more general)
-    if isinstance(obj, CourseDescriptor):
+    if isinstance(obj, (CourseDescriptor, CourseOverview)):
         return _has_access_course_desc(user, action, obj)
 
     if isinstance(obj, ErrorDescriptor):
@@ -114,7 +114,8 @@ def has_access(user, action, obj, course_key=None):
 # ================ Implementation helpers ================================
 def _has_access_course_desc(user, action, course):
     """
-    Check if user has access to a course descriptor.
+    Check if user has access to a course descriptor, or to the course a
+    CourseOverview summarizes.
 
     Valid actions:
 
@@ -135,6 +136,8 @@ def _has_access_course_desc(user, action, course):
 
         NOTE: this is not checking whether user is actually enrolled in the course.
         """
+        if isinstance(course, CourseOverview):
+            return _can_load_course_overview(user, course)
         # delegate to generic descriptor check to check start dates
         return _has_access_descriptor(user, 'load', course, course.id)
 
@@ -311,6 +314,32 @@ def _has_access_course_desc(user, action, course):
     return _dispatch(checkers, action, user, course)
 
 
+def _can_load_course_overview(user, course_overview):
+    """
+    The 'load' check of _has_access_descriptor, for a CourseOverview: courses
+    have no group access rules, and aren't detached.
+    """
+    course_key = course_overview.id
+    if course_overview.visible_to_staff_only and not _has_staff_access_to_descriptor(user, course_overview, course_key):
+        return False
+
+    # If start dates are off, can always load
+    if settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course_key):
+        debug("Allow: DISABLE_START_DATES")
+        return True
+
+    if course_overview.start is not None:
+        now = datetime.now(UTC())
+        effective_start = _adjust_start_date_for_beta_testers(user, course_overview, course_key=course_key)
+        if in_preview_mode() or now > effective_start:
+            debug("Allow: now > effective start date")
+            return True
+        return _has_staff_access_to_descriptor(user, course_overview, course_key)
+
+    debug("Allow: no start date")
+    return True
+
+
 def _has_access_error_desc(user, action, descriptor, course_key):
     """
     Only staff should see error descriptors.
@@ -620,21 +649,14 @@ def _has_access_to_course(user, access_level, course_key):
         debug("Deny: unknown access level")
         return False
 
-    staff_access = (
-        CourseStaffRole(course_key).has_user(user) or
-        OrgStaffRole(course_key.org).has_user(user)
-    )
+    # The user's course and org roles in this course, from the user's role cache.
+    course_roles = get_course_roles(user, [course_key])[course_key]
 
-    if staff_access and access_level == 'staff':
+    if CourseStaffRole.ROLE in course_roles and access_level == 'staff':
         debug("Allow: user has course staff access")
         return True
 
-    instructor_access = (
-        CourseInstructorRole(course_key).has_user(user) or
-        OrgInstructorRole(course_key.org).has_user(user)
-    )
-
-    if instructor_access and access_level in ('staff', 'instructor'):
+    if CourseInstructorRole.ROLE in course_roles and access_level in ('staff', 'instructor'):
         debug("Allow: user has course instructor access")
         return True
 
@@ -96,6 +96,19 @@ class OverrideFieldData(FieldData):
                     return value
         return NOTSET
 
+    def may_inherit_override(self, block, name):
+        """
+        Checks whether the field identified by `name` in `block` may inherit an
+        override from the block's ancestors: whether it is inheritable, and
+        some provider may have an override of it in the course.
+        """
+        if overrides_disabled() or name not in InheritanceMixin.fields:
+            return False
+        return any(
+            not hasattr(provider, 'overrides_field') or provider.overrides_field(block, name)
+            for provider in self.providers
+        )
+
     def get(self, block, name):
         value = self.get_override(block, name)
         if value is not NOTSET:
@@ -114,8 +127,7 @@ class OverrideFieldData(FieldData):
             # If this is an inheritable field and an override is set above,
             # then we want to return False here, so the field_data uses the
             # override and not the original value for this block.
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
+            if self.may_inherit_override(block, name):
                 for ancestor in _lineage(block):
                     if self.get_override(ancestor, name) is not NOTSET:
                         return False
@@ -128,13 +140,11 @@ class OverrideFieldData(FieldData):
     def default(self, block, name):
         # The `default` method is overloaded by the field storage system to
         # also handle inheritance.
-        if not overrides_disabled():
-            inheritable = InheritanceMixin.fields.keys()
-            if name in inheritable:
-                for ancestor in _lineage(block):
-                    value = self.get_override(ancestor, name)
-                    if value is not NOTSET:
-                        return value
+        if self.may_inherit_override(block, name):
+            for ancestor in _lineage(block):
+                value = self.get_override(ancestor, name)
+                if value is not NOTSET:
+                    return value
         return self.fallback.default(block, name)
 
 
@@ -192,6 +202,15 @@ class FieldOverrideProvider(object):
         """
         raise NotImplementedError
 
+    def overrides_field(self, block, name):
+        """
+        Returns whether the provider may have an override for the field named
+        `name` in any block of `block`'s course.  Returning False spares
+        looking for overrides of inheritable fields in the block's ancestors.
+        This implementation always returns True.
+        """
+        return True
+
 
 def _lineage(block):
     """
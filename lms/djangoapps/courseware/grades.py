@@ -6,21 +6,28 @@ import random
 import logging
 
 from contextlib import contextmanager
+from datetime import timedelta
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.test.client import RequestFactory
+from django.utils import timezone
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
 from courseware.model_data import FieldDataCache
-from student.models import anonymous_id_for_user
+from student.models import ANONYMOUS_ID_BATCH_SIZE, anonymous_id_for_user, anonymous_ids_for_users
 from util.module_utils import yield_dynamic_descriptor_descendents
+from xblock.fields import Scope
+from xblock.runtime import KeyValueStore
 from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from .access import has_access
+from .models import StudentModule, StudentSectionGrade
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
@@ -29,6 +36,9 @@ from opaque_keys.edx.keys import CourseKey
 
 log = logging.getLogger("edx.courseware")
 
+# How long the max scores of a course's problems are cached, in seconds.
+MAX_SCORES_CACHE_TIMEOUT = 60 * 60 * 24
+
 
 def answer_distributions(course_key):
     """
@@ -121,6 +131,213 @@ def answer_distributions(course_key):
     return answer_counts
 
 
+def course_structure_version(course):
+    """
+    Return a string identifying the current version of the content of `course`,
+    or None if the modulestore can't tell when the course was last changed
+    (e.g. XML courses).
+    """
+    runtime = course.runtime
+    if not isinstance(runtime, EditInfoRuntimeMixin):
+        return None
+    edited_on = runtime.get_subtree_edited_on(course)
+    return edited_on.isoformat() if edited_on is not None else None
+
+
+# Module state saved this long before its section was graded may not have been committed
+# yet when the grader read it, so it still makes the stored section grade stale.
+STATE_COMMIT_GRACE = timedelta(seconds=60)
+
+
+class PersistedSectionGrades(object):
+    """
+    The section scores stored for a student in a course, and the knowledge needed
+    to tell which of them are still current.
+
+    A stored section is current if the course hasn't changed since it was computed
+    and none of the student's module state within the section has been modified,
+    created or deleted since it was saved. When a problem's score changes, only the section containing
+    it needs to be recomputed; when the course changes, all of them do.
+    """
+    def __init__(self, student, course, submissions_scores):
+        self.student = student
+        self.course = course
+        self.course_version = course_structure_version(course)
+
+        # section location -> locations of every block in the section
+        self.section_locations = {}
+        # sections which have scores that change independently of the LMS (e.g. foldit,
+        # or scores from the submissions API); we can't tell when those are stale.
+        self.unpersistable_sections = set()
+        for sections in course.grading_context['graded_sections'].itervalues():
+            for section in sections:
+                section_location = section['section_descriptor'].location
+                self.section_locations[section_location] = set(
+                    descriptor.location for descriptor in _descriptor_descendents(section['section_descriptor'])
+                )
+                if any(
+                        descriptor.always_recalculate_grades or
+                        descriptor.location.to_deprecated_string() in submissions_scores
+                        for descriptor in section['xmoduledescriptors']
+                ):
+                    self.unpersistable_sections.add(section_location)
+
+        # Any state saved from now on may not be in the scores computed by this grading.
+        self.state_read_at = timezone.now()
+        with manual_transaction():
+            self.grades = {
+                grade.usage_key.map_into_course(course.id): grade
+                for grade in StudentSectionGrade.objects.filter(user=student, course_id=course.id)
+            }
+            self.module_modified = {
+                module.module_state_key.map_into_course(course.id): module.modified
+                for module in StudentModule.objects.filter(
+                    student=student, course_id=course.id
+                ).only('module_state_key', 'modified')
+            }
+
+    def can_persist(self, section_location):
+        """
+        Whether scores for the section can be persisted.
+        """
+        return self.course_version is not None and section_location not in self.unpersistable_sections
+
+    def state_count(self, section_location):
+        """
+        Return how many of the student's module states are within the section.
+        """
+        return sum(
+            1 for location in self.section_locations.get(section_location, ()) if location in self.module_modified
+        )
+
+    def has_state(self, section_location):
+        """
+        Return whether the student has any module state within the section.
+        """
+        return self.state_count(section_location) > 0
+
+    def get(self, section_location):
+        """
+        Return the list of Scores stored for the section, or None if there is no
+        current stored value.
+        """
+        grade = self.grades.get(section_location)
+        if not self.can_persist(section_location) or grade is None or grade.course_version != self.course_version:
+            return None
+        # state was deleted (or created and deleted) since the scores were stored
+        if grade.state_count != self.state_count(section_location):
+            return None
+        # DATETIME columns may have whole-second precision, so treat a tie as a change
+        if grade.state_read_at is None:
+            return None
+        stale_after = grade.state_read_at - STATE_COMMIT_GRACE
+        if any(
+                self.module_modified.get(location) >= stale_after
+                for location in self.section_locations.get(section_location, ())
+                if location in self.module_modified
+        ):
+            return None
+        return [Score(*score) for score in json.loads(grade.scores)]
+
+    def set(self, section_location, scores):
+        """
+        Store the list of Scores computed for the section.
+        """
+        if not self.can_persist(section_location):
+            return
+        grade = self.grades.get(section_location)
+        if grade is None:
+            grade = StudentSectionGrade(user=self.student, course_id=self.course.id, usage_key=section_location)
+            self.grades[section_location] = grade
+        grade.course_version = self.course_version
+        grade.scores = json.dumps([list(score) for score in scores])
+        grade.state_count = self.state_count(section_location)
+        grade.state_read_at = self.state_read_at
+        with manual_transaction():
+            grade.save()
+
+
+class MaxScoresIndex(object):
+    """
+    The max scores of the problems of a course, shared by all of its students.
+
+    Getting the max score of a problem a student hasn't been graded on means
+    instantiating the problem.  Unless the max score may vary by student (see
+    XModuleMixin.max_score_varies_by_user), it is only done for the first
+    student who needs it, and the max score is kept, with the version of the
+    problem it was computed for, in a per-course index in the django cache.
+    """
+    def __init__(self, course_key):
+        self.cache_key = u"grades.max_scores.{}".format(course_key)
+        self.max_scores = cache.get(self.cache_key) or {}
+        self.changed = False
+
+    @staticmethod
+    def _version(descriptor):
+        """
+        Return a string identifying the version of `descriptor` whose max score
+        can be indexed, or None if it can't.
+        """
+        if getattr(descriptor, 'max_score_varies_by_user', True):
+            return None
+        runtime = descriptor.runtime
+        if not isinstance(runtime, EditInfoRuntimeMixin):
+            return None
+        edited_on = runtime.get_edited_on(descriptor)
+        return edited_on.isoformat() if edited_on is not None else None
+
+    def get(self, descriptor):
+        """
+        Return the indexed max score of the current version of `descriptor`, or None.
+        """
+        version = self._version(descriptor)
+        if version is None:
+            return None
+        indexed = self.max_scores.get(unicode(descriptor.location))
+        if indexed is None or indexed[0] != version:
+            return None
+        return indexed[1]
+
+    def set(self, descriptor, max_score):
+        """
+        Index the max score of the current version of `descriptor`, if it can be.
+        """
+        version = self._version(descriptor)
+        if version is not None:
+            self.max_scores[unicode(descriptor.location)] = (version, max_score)
+            self.changed = True
+
+    def save(self):
+        """
+        Store the index, if max scores were added to it.
+        """
+        if self.changed:
+            cache.set(self.cache_key, self.max_scores, MAX_SCORES_CACHE_TIMEOUT)
+            self.changed = False
+
+
+def _descriptor_descendents(descriptor):
+    """
+    Yield `descriptor` and all of its descendants, without binding them to a user.
+    """
+    yield descriptor
+    for child in descriptor.get_children():
+        for descendent in _descriptor_descendents(child):
+            yield descendent
+
+
+def _persisted_grades_for(student, course, submissions_scores):
+    """
+    Return the PersistedSectionGrades for the student, or None if grades
+    aren't being persisted.
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES', False) or settings.GENERATE_PROFILE_SCORES:
+        return None
+    if not student.is_authenticated():
+        return None
+    return PersistedSectionGrades(student, course, submissions_scores)
+
+
 @transaction.commit_manually
 def grade(student, request, course, keep_raw_scores=False):
     """
@@ -161,6 +378,23 @@ def _grade(student, request, course, keep_raw_scores):
     submissions_scores = sub_api.get_scores(
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
+    persisted_grades = _persisted_grades_for(student, course, submissions_scores)
+    max_scores = MaxScoresIndex(course.id)
+
+    # A single cache of the student's state for every block in the graded sections. It is
+    # filled in a few chunked queries the first time a section actually needs grading.
+    field_data_cache = FieldDataCache([], course.id, student)
+
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        # Blocks outside of the grading context (e.g. dynamically added children)
+        # still need their state loaded before the module is created.
+        if not field_data_cache.has_descriptor(descriptor):
+            with manual_transaction():
+                field_data_cache.add_descriptors_to_cache([descriptor])
+        # TODO: We need the request to pass into here. If we could forego that, our arguments
+        # would be simpler
+        return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
 
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
@@ -187,32 +421,44 @@ def _grade(student, request, course, keep_raw_scores):
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+            can_persist_section = (
+                persisted_grades is not None and persisted_grades.can_persist(section_descriptor.location)
+            )
 
+            if not should_grade_section:
+                if persisted_grades is not None:
+                    should_grade_section = persisted_grades.has_state(section_descriptor.location)
+                else:
+                    with manual_transaction():
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=[
+                                descriptor.location for descriptor in section['xmoduledescriptors']
+                            ]
+                        ).exists()
+
+            scores = None
+            if should_grade_section and can_persist_section:
+                scores = persisted_grades.get(section_descriptor.location)
+
+            if scores is not None:
+                _, graded_total = graders.aggregate_scores(scores, section_name)
+                if keep_raw_scores:
+                    raw_scores += scores
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
+            elif should_grade_section:
                 scores = []
 
-                def create_module(descriptor):
-                    '''creates an XModule instance given a descriptor'''
-                    # TODO: We need the request to pass into here. If we could forego that, our arguments
-                    # would be simpler
+                if not field_data_cache.has_descriptor(section_descriptor):
                     with manual_transaction():
-                        field_data_cache = FieldDataCache([descriptor], course.id, student)
-                    return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
+                        field_data_cache.add_descriptors_to_cache(grading_context['all_descriptors'])
 
                 for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
 
                     (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores,
+                        field_data_cache=field_data_cache, max_scores=max_scores
                     )
                     if correct is None and total is None:
                         continue
@@ -230,6 +476,9 @@ def _grade(student, request, course, keep_raw_scores):
 
                     scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
+                if can_persist_section:
+                    persisted_grades.set(section_descriptor.location, scores)
+
                 _, graded_total = graders.aggregate_scores(scores, section_name)
                 if keep_raw_scores:
                     raw_scores += scores
@@ -247,6 +496,8 @@ def _grade(student, request, course, keep_raw_scores):
 
         totaled_scores[section_format] = format_scores
 
+    max_scores.save()
+
     # Grading policy might be overriden by a CCX, need to reset it
     course.set_grading_policy(course.grading_policy)
     grade_summary = course.grader.grade(totaled_scores, generate_random_scores=settings.GENERATE_PROFILE_SCORES)
@@ -335,6 +586,8 @@ def _progress_summary(student, request, course):
         course_module = getattr(course_module, '_x_module', course_module)
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
+    persisted_grades = _persisted_grades_for(student, course, submissions_scores)
+    max_scores = MaxScoresIndex(course.id)
 
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
@@ -352,19 +605,30 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
+                scores = None
+
+                if persisted_grades is not None and graded:
+                    scores = persisted_grades.get(section_module.location)
+                    if scores is not None:
+                        scores = [
+                            Score(score.earned, score.possible, graded, score.section)
+                            for score in scores
+                        ]
 
-                module_creator = section_module.xmodule_runtime.get_module
+                if scores is None:
+                    scores = []
+                    module_creator = section_module.xmodule_runtime.get_module
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
+                    for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
+                        course_id = course.id
+                        (correct, total) = get_score(
+                            course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores,
+                            field_data_cache=field_data_cache, max_scores=max_scores
+                        )
+                        if correct is None and total is None:
+                            continue
 
-                    scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
+                        scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -388,10 +652,12 @@ def _progress_summary(student, request, course):
             'sections': sections
         })
 
+    max_scores.save()
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, field_data_cache=None,
+              max_scores=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -405,6 +671,11 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    field_data_cache: A FieldDataCache for the user. If it has loaded the problem,
+           the StudentModule is read from it rather than from the database.
+    max_scores: A MaxScoresIndex of the course. If the user hasn't been graded on the
+           problem, but may load it, its max score is read from it rather than by
+           instantiating the problem.
     """
     scores_cache = scores_cache or {}
 
@@ -431,18 +702,34 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if field_data_cache is not None and field_data_cache.has_descriptor(problem_descriptor):
+        student_module = field_data_cache.find(KeyValueStore.Key(
+            scope=Scope.user_state,
+            user_id=user.id,
+            block_scope_id=problem_descriptor.location,
+            field_name='grade'
+        ))
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+        except StudentModule.DoesNotExist:
+            student_module = None
 
     if student_module is not None and student_module.max_grade is not None:
         correct = student_module.grade if student_module.grade is not None else 0
         total = student_module.max_grade
+    elif max_scores is not None and max_scores.get(problem_descriptor) is not None:
+        # The student hasn't been graded yet, but another student's instance of
+        # this version of the problem gave its max score.  module_creator would
+        # also have checked that the student may load the problem.
+        if not has_access(user, 'load', problem_descriptor, course_id):
+            return (None, None)
+        correct = 0.0
+        total = max_scores.get(problem_descriptor)
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
         # we need to instantiate the problem.
@@ -459,6 +746,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         if total is None:
             return (None, None)
 
+        if max_scores is not None:
+            max_scores.set(problem_descriptor, total)
+
     # Now we re-weight the problem, if specified
     weight = problem_descriptor.weight
     if weight is not None:
@@ -512,7 +802,7 @@ def iterate_grades_for(course_or_id, students):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
+    for student in _with_anonymous_ids(students, course.id):
         with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
             try:
                 request.user = student
@@ -534,3 +824,21 @@ def iterate_grades_for(course_or_id, students):
                     exc.message
                 )
                 yield student, {}, exc.message
+
+
+def _with_anonymous_ids(students, course_key):
+    """
+    Yield the `students`, a batch at a time, once their anonymous ids in the
+    course have been looked up or created together.
+    """
+    batch = []
+    for student in students:
+        batch.append(student)
+        if len(batch) == ANONYMOUS_ID_BATCH_SIZE:
+            anonymous_ids_for_users(batch, course_key)
+            for batched_student in batch:
+                yield batched_student
+            batch = []
+    anonymous_ids_for_users(batch, course_key)
+    for batched_student in batch:
+        yield batched_student
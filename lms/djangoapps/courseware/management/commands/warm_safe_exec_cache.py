@@ -0,0 +1,107 @@
+"""
+A Django command that warms the cache of sandboxed code results for a course.
+
+The script of each problem in the course is executed once for each of the
+seeds that students are most likely to be given, and the results stored in
+the cache returned by util.sandboxing.get_safe_exec_cache(), so that
+rendering those problems doesn't have to start a sandbox.
+
+Problems that are never rerandomized only use seed 1. Other problems are
+executed for seeds 0 to --seeds - 1; per-student randomization only ever
+uses the first 20 of those.
+"""
+
+from optparse import make_option
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from edxmako.shortcuts import render_to_string
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
+from xmodule.capa_base import NUM_RANDOMIZATION_BINS
+from xmodule.capa_base_constants import RANDOMIZATION
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore.django import modulestore, ModuleI18nService
+
+
+class Command(BaseCommand):
+    """
+    Execute the scripts of a course's problems to fill the sandboxed code
+    results cache.
+    """
+    args = "<course_id>"
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--seeds',
+                    action='store',
+                    type='int',
+                    default=NUM_RANDOMIZATION_BINS,
+                    help='How many seeds to execute rerandomized problems for'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("course_id not specified")
+
+        try:
+            course_key = CourseKey.from_string(args[0])
+        except InvalidKeyError:
+            raise CommandError("Invalid course_id")
+
+        store = modulestore()
+        if store.get_course(course_key) is None:
+            raise CommandError("Invalid course_id")
+
+        cache = get_safe_exec_cache()
+        executed = failed = 0
+        for problem in store.get_items(course_key, qualifiers={'category': 'problem'}):
+            if problem.rerandomize == RANDOMIZATION.NEVER:
+                seeds = [1]
+            else:
+                seeds = range(options['seeds'])
+
+            for seed in seeds:
+                try:
+                    self._execute_problem_script(course_key, problem, seed, cache)
+                except Exception as err:  # pylint: disable=broad-except
+                    failed += 1
+                    self.stderr.write(u"{} with seed {}: {}\n".format(problem.location, seed, err))
+                else:
+                    executed += 1
+
+        self.stdout.write(
+            u"Executed {} problem scripts ({} failed). Cache stats: {}\n".format(
+                executed + failed, failed, cache.stats()
+            )
+        )
+
+    def _execute_problem_script(self, course_key, problem, seed, cache):
+        """
+        Build the LoncapaProblem for `problem` with `seed`, which executes
+        its script through `cache`.
+        """
+        capa_system = LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id=None,
+            cache=cache,
+            can_execute_unsafe_code=lambda: can_execute_unsafe_code(course_key),
+            get_python_lib_zip=lambda: get_python_lib_zip(contentstore, course_key),
+            DEBUG=False,
+            filestore=problem.runtime.resources_fs,
+            i18n=ModuleI18nService(),
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=seed,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue=None,
+        )
+        LoncapaProblem(
+            problem_text=problem.data,
+            id=problem.location.html_id(),
+            capa_system=capa_system,
+            seed=seed,
+        )
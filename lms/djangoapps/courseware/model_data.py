@@ -17,6 +17,7 @@ from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.asides import AsideUsageKeyV1
 
 from django.db import DatabaseError
+from dogstats_wrapper import request_metrics
 
 from xblock.runtime import KeyValueStore
 from xblock.exceptions import KeyValueMultiSaveError, InvalidScopeError
@@ -62,6 +63,8 @@ class FieldDataCache(object):
         asides: The list of aside types to load, or None to prefetch no asides.
         '''
         self.cache = {}
+        # usage ids of every descriptor whose fields have been loaded into self.cache
+        self._cached_usage_ids = set()
         self.select_for_update = select_for_update
 
         if asides is None:
@@ -83,6 +86,14 @@ class FieldDataCache(object):
             for scope, fields in self._fields_to_cache(descriptors).items():
                 for field_object in self._retrieve_fields(scope, fields, descriptors):
                     self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+            self._cached_usage_ids.update(descriptor.scope_ids.usage_id for descriptor in descriptors)
+
+    def has_descriptor(self, descriptor):
+        """
+        Return whether the data for `descriptor` has been loaded into this FieldDataCache,
+        so that a missing entry means there is no stored value rather than an unloaded one.
+        """
+        return descriptor.scope_ids.usage_id in self._cached_usage_ids
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -145,13 +156,14 @@ class FieldDataCache(object):
     def _query(self, model_class, **kwargs):
         """
         Queries model_class with **kwargs, optionally adding select_for_update if
-        self.select_for_update is set
+        self.select_for_update is set, and returns the list of results
         """
         query = model_class.objects
         if self.select_for_update:
             query = query.select_for_update()
         query = query.filter(**kwargs)
-        return query
+        with request_metrics.measure('field_data'):
+            return list(query)
 
     def _chunked_query(self, model_class, chunk_field, items, chunk_size=500, **kwargs):
         """
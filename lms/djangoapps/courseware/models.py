@@ -233,6 +233,41 @@ class OfflineComputedGradeLog(models.Model):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
 
 
+class StudentSectionGrade(TimeStampedModel):
+    """
+    The scores a student earned on the problems of one graded section (subsection),
+    as computed by `courseware.grades`. The row is only valid while the course is
+    at `course_version` and none of the student's module state in the section has
+    changed, been added or been deleted since it was read
+    to compute the scores (`state_read_at`).
+    """
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    # the version of the course content the scores were computed against
+    course_version = models.CharField(max_length=255, blank=True)
+
+    # list of [earned, possible, graded, display_name], stored as JSON
+    scores = models.TextField(default='[]')
+
+    # how many of the student's module states were in the section when the scores
+    # were computed; deleting state (e.g. resetting attempts) doesn't touch `modified`
+    state_count = models.IntegerField(default=0)
+
+    # when the student's module state was read to compute the scores; state modified
+    # later isn't reflected in them (`modified` is only set once the scores are saved)
+    state_read_at = models.DateTimeField(null=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    def __unicode__(self):
+        return u"[StudentSectionGrade] {}: {} {} ({})".format(
+            self.user, self.course_id, self.usage_key, self.course_version
+        )
+
+
 class StudentFieldOverride(TimeStampedModel):
     """
     Holds the value of a specific field overriden for a student.  This is used
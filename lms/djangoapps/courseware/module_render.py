@@ -66,7 +66,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.x_module import XModuleDescriptor
 from xblock_django.user_service import DjangoXBlockUserService
 from util.json_request import JsonResponse
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from util import milestones_helpers
 from util.module_utils import yield_dynamic_descriptor_descendents
 from verify_student.services import ReverificationService
@@ -111,6 +111,11 @@ def make_track_function(request):
     return function
 
 
+# How long, in seconds, to cache the table of contents skeleton of a version
+# of a course.  Skeletons of old versions are simply never read again.
+TOC_SKELETON_TIMEOUT = 24 * 60 * 60
+
+
 def toc_for_course(request, course, active_chapter, active_section, field_data_cache):
     '''
     Create a table of contents from the module store
@@ -136,13 +141,15 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
     '''
 
     with modulestore().bulk_operations(course.id):
-        course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
-        if course_module is None:
+        if settings.FIELD_OVERRIDE_PROVIDERS:
+            # Overrides can change any field of any block for this user, so
+            # read them from the user's modules.
+            toc_chapters = _toc_from_modules(request, course, field_data_cache)
+        else:
+            toc_chapters = _toc_from_skeleton(request.user, course)
+        if toc_chapters is None:
             return None
 
-        toc_chapters = list()
-        chapters = course_module.get_display_items()
-
         # See if the course is gated by one or more content milestones
         required_content = milestones_helpers.get_required_content(course, request.user)
 
@@ -150,39 +157,143 @@ def toc_for_course(request, course, active_chapter, active_section, field_data_c
         if not user_must_complete_entrance_exam(request, request.user, course):
             required_content = [content for content in required_content if not content == course.entrance_exam_id]
 
-        for chapter in chapters:
+        toc = []
+        for chapter in toc_chapters:
             # Only show required content, if there is required content
-            # chapter.hide_from_toc is read-only (boo)
-            local_hide_from_toc = False
-            if required_content:
-                if unicode(chapter.location) not in required_content:
-                    local_hide_from_toc = True
-
-            # Skip the current chapter if a hide flag is tripped
-            if chapter.hide_from_toc or local_hide_from_toc:
+            if required_content and chapter['location'] not in required_content:
                 continue
 
-            sections = list()
-            for section in chapter.get_display_items():
-
-                active = (chapter.url_name == active_chapter and
-                          section.url_name == active_section)
-
-                if not section.hide_from_toc:
-                    sections.append({'display_name': section.display_name_with_default,
-                                     'url_name': section.url_name,
-                                     'format': section.format if section.format is not None else '',
-                                     'due': section.due,
-                                     'active': active,
-                                     'graded': section.graded,
-                                     })
-            toc_chapters.append({
-                'display_name': chapter.display_name_with_default,
-                'url_name': chapter.url_name,
+            sections = []
+            for section in chapter['sections']:
+                sections.append({
+                    'display_name': section['display_name'],
+                    'url_name': section['url_name'],
+                    'format': section['format'],
+                    'due': section['due'],
+                    'active': chapter['url_name'] == active_chapter and section['url_name'] == active_section,
+                    'graded': section['graded'],
+                })
+            toc.append({
+                'display_name': chapter['display_name'],
+                'url_name': chapter['url_name'],
                 'sections': sections,
-                'active': chapter.url_name == active_chapter
+                'active': chapter['url_name'] == active_chapter,
             })
-        return toc_chapters
+        return toc
+
+
+def _toc_entry(block):
+    """
+    The table of contents entry of the chapter or section `block`, without
+    its sections.
+    """
+    return {
+        'location': unicode(block.location),
+        'display_name': block.display_name_with_default,
+        'url_name': block.url_name,
+        'format': block.format if block.format is not None else '',
+        'due': block.due,
+        'graded': block.graded,
+    }
+
+
+def _toc_from_modules(request, course, field_data_cache):
+    """
+    The chapters and sections of `course` that the user can see, read from
+    the modules bound to the user, or None if the user can't load the course.
+    """
+    course_module = get_module_for_descriptor(request.user, request, course, field_data_cache, course.id)
+    if course_module is None:
+        return None
+
+    toc_chapters = []
+    for chapter in course_module.get_display_items():
+        if chapter.hide_from_toc:
+            continue
+        entry = _toc_entry(chapter)
+        entry['sections'] = [
+            _toc_entry(section) for section in chapter.get_display_items() if not section.hide_from_toc
+        ]
+        toc_chapters.append(entry)
+    return toc_chapters
+
+
+def _toc_from_skeleton(user, course):
+    """
+    The chapters and sections of `course` that `user` can see, or None if the
+    user can't load the course.  They are read from the course's cached
+    skeleton, and filtered by the user's access to the blocks.
+    """
+    if not has_access(user, 'load', course, course.id):
+        return None
+
+    # Only blocks the user can load are left out of the descriptors'
+    # children, but check them all the same.
+    visible = set()
+    for chapter in course.get_children():
+        if has_access(user, 'load', chapter, course.id):
+            visible.add(unicode(chapter.location))
+            visible.update(
+                unicode(section.location) for section in chapter.get_children()
+                if has_access(user, 'load', section, course.id)
+            )
+
+    toc_chapters = []
+    for chapter in get_toc_skeleton(course):
+        if chapter['location'] in visible:
+            entry = dict(chapter)
+            entry['sections'] = [section for section in chapter['sections'] if section['location'] in visible]
+            toc_chapters.append(entry)
+    return toc_chapters
+
+
+def get_toc_skeleton(course):
+    """
+    Return the parts of the table of contents of `course`, a descriptor, that
+    are the same for every user: the chapters and sections that aren't hidden
+    from the table of contents, as `_toc_entry` dicts, the chapters' with
+    their sections under 'sections'.
+
+    The skeleton is cached for each version of the course, as long as the
+    modulestore keeps track of versions.
+    """
+    version = _course_version(course)
+    cache_key = None
+    if version is not None:
+        cache_key = u'courseware.toc_skeleton.{}.{}'.format(course.id, version)
+        skeleton = cache.get(cache_key)
+        if skeleton is not None:
+            return skeleton
+
+    # `course` may be bound to a user, and then only has the children that
+    # user can see, so read the course afresh.
+    skeleton = []
+    for chapter in modulestore().get_course(course.id, depth=2).get_display_items():
+        if chapter.hide_from_toc:
+            continue
+        entry = _toc_entry(chapter)
+        entry['sections'] = [
+            _toc_entry(section) for section in chapter.get_display_items() if not section.hide_from_toc
+        ]
+        skeleton.append(entry)
+
+    if cache_key is not None:
+        cache.set(cache_key, skeleton, TOC_SKELETON_TIMEOUT)
+    return skeleton
+
+
+def _course_version(course):
+    """
+    Return a string which changes whenever any block of `course` does, or
+    None if its modulestore doesn't record when blocks change.
+    """
+    get_subtree_edited_on = getattr(course.runtime, 'get_subtree_edited_on', None)
+    if get_subtree_edited_on is None:
+        return None
+    edited_on = get_subtree_edited_on(course)
+    if edited_on is None:
+        return None
+    return edited_on.isoformat()
 
 
 def get_module(user, request, usage_key, field_data_cache,
@@ -614,7 +725,7 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -4,6 +4,8 @@ by the individual due dates feature.
 """
 import json
 
+from request_cache.middleware import RequestCache
+
 from .field_overrides import FieldOverrideProvider
 from .models import StudentFieldOverride
 
@@ -17,6 +19,9 @@ class IndividualStudentOverrideProvider(FieldOverrideProvider):
     def get(self, block, name, default):
         return get_override_for_user(self.user, block, name, default)
 
+    def overrides_field(self, block, name):
+        return name in _get_override_index_for_user(self.user, block.runtime.course_id)[1]
+
 
 def get_override_for_user(user, block, name, default=None):
     """
@@ -38,19 +43,48 @@ def _get_overrides_for_user(user, block):
     Gets all of the individual student overrides for given user and block.
     Returns a dictionary of field override values keyed by field name.
     """
-    query = StudentFieldOverride.objects.filter(
-        course_id=block.runtime.course_id,
-        location=block.location,
-        student_id=user.id,
-    )
+    by_location = _get_override_index_for_user(user, block.runtime.course_id)[0]
     overrides = {}
-    for override in query:
-        field = block.fields[override.field]
-        value = field.from_json(json.loads(override.value))
-        overrides[override.field] = value
+    for name, value in by_location.get(_location_key(block), {}).iteritems():
+        field = block.fields[name]
+        overrides[name] = field.from_json(json.loads(value))
     return overrides
 
 
+def _get_override_index_for_user(user, course_id):
+    """
+    Gets all of the individual student overrides for given user in the course,
+    with a single query, cached for the duration of the request.  Returns a
+    tuple of a dictionary of the serialized override values keyed by location
+    and field name, and of the set of the overridden field names.
+    """
+    request_cache = RequestCache.get_request_cache()
+    cache_key = _index_cache_key(user, course_id)
+    index = request_cache.data.get(cache_key)
+    if index is None:
+        by_location = {}
+        query = StudentFieldOverride.objects.filter(course_id=course_id, student_id=user.id)
+        for location, name, value in query.values_list('location', 'field', 'value'):
+            by_location.setdefault(location, {})[name] = value
+        names = set(name for overrides in by_location.itervalues() for name in overrides)
+        index = request_cache.data[cache_key] = (by_location, names)
+    return index
+
+
+def _index_cache_key(user, course_id):
+    """
+    The request cache key of the override index of `user` in the course.
+    """
+    return u"student_field_overrides.index.{}.{}".format(user.id, course_id)
+
+
+def _location_key(block):
+    """
+    The location of `block`, as stored in StudentFieldOverride.location.
+    """
+    return StudentFieldOverride._meta.get_field('location').get_prep_value(block.location)  # pylint: disable=protected-access
+
+
 def override_field_for_user(user, block, name, value):
     """
     Overrides a field for the `user`.  `block` and `name` specify the block
@@ -65,6 +99,7 @@ def override_field_for_user(user, block, name, value):
     field = block.fields[name]
     override.value = json.dumps(field.to_json(value))
     override.save()
+    _clear_cached_overrides(user, block)
 
 
 def clear_override_for_user(user, block, name):
@@ -82,3 +117,13 @@ def clear_override_for_user(user, block, name):
             field=name).delete()
     except StudentFieldOverride.DoesNotExist:
         pass
+    _clear_cached_overrides(user, block)
+
+
+def _clear_cached_overrides(user, block):
+    """
+    Drops the overrides of `user` cached for this request, once they changed.
+    """
+    RequestCache.get_request_cache().data.pop(_index_cache_key(user, block.runtime.course_id), None)
+    if hasattr(block, '_student_overrides'):
+        block._student_overrides.pop(user.id, None)  # pylint: disable=protected-access
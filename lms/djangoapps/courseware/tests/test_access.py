@@ -18,6 +18,7 @@ from xmodule.course_module import (
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from util.milestones_helpers import (
     set_prerequisite_courses,
     fulfill_course_milestone,
@@ -295,6 +296,36 @@ class AccessTestCase(LoginEnrollmentTestCase, ModuleStoreTestCase):
         self.assertTrue(access._has_access_course_desc(staff, 'see_in_catalog', course))
         self.assertTrue(access._has_access_course_desc(staff, 'see_about_page', course))
 
+    @patch.dict("django.conf.settings.FEATURES", {'DISABLE_START_DATES': False})
+    def test_course_overview_load(self):
+        """
+        Test that loading a course is checked the same way from its CourseOverview
+        """
+        tomorrow = datetime.datetime.now(pytz.utc) + datetime.timedelta(days=1)
+        started = CourseFactory.create(org='test_org', number='started', run='test_run')
+        not_started = CourseFactory.create(org='test_org', number='not_started', run='test_run', start=tomorrow)
+        staff_only = CourseFactory.create(org='test_org', number='staff_only', run='test_run', visible_to_staff_only=True)
+
+        for course, student_can_load in ((started, True), (not_started, False), (staff_only, False)):
+            overview = CourseOverview.get_from_id(course.id)
+            staff = StaffFactory.create(course_key=course.id)
+            self.assertEqual(access.has_access(self.student, 'load', overview), student_can_load)
+            self.assertEqual(access.has_access(self.student, 'load', course), student_can_load)
+            self.assertTrue(access.has_access(staff, 'load', overview))
+
+    @patch.dict("django.conf.settings.FEATURES", {'ACCESS_REQUIRE_STAFF_FOR_COURSE': True})
+    def test_course_overview_ispublic(self):
+        """
+        Test that the ispublic setting of a course is stored on its CourseOverview
+        """
+        public = CourseFactory.create(org='test_org', number='public', run='test_run', ispublic=True)
+        private = CourseFactory.create(org='test_org', number='private', run='test_run')
+
+        for course, student_can_see in ((public, True), (private, False)):
+            overview = CourseOverview.get_from_id(course.id)
+            self.assertEqual(access.has_access(self.student, 'see_exists', overview), student_can_see)
+            self.assertEqual(access.has_access(self.student, 'see_exists', course), student_can_see)
+
     @patch.dict("django.conf.settings.FEATURES", {'ENABLE_PREREQUISITE_COURSES': True, 'MILESTONES_APP': True})
     def test_access_on_course_with_pre_requisites(self):
         """
@@ -1,13 +1,16 @@
 """
 Test grade calculation.
 """
+from django.core.cache import cache
 from django.http import Http404
-from mock import patch
+from mock import Mock, patch
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
-from courseware.grades import grade, iterate_grades_for
+from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware.grades import MaxScoresIndex, get_score, grade, iterate_grades_for
 from student.tests.factories import UserFactory
-from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
@@ -119,3 +122,56 @@ class TestGradeIteration(ModuleStoreTestCase):
                 students_to_errors[student] = err_msg
 
         return students_to_gradesets, students_to_errors
+
+
+class TestMaxScoresIndex(ModuleStoreTestCase):
+    """
+    Test that problems are instantiated to get their max score only once.
+    """
+    def setUp(self):
+        super(TestMaxScoresIndex, self).setUp()
+        cache.clear()
+        self.course = CourseFactory.create()
+        self.problem = ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data=StringResponseXMLFactory().build_xml(answer='foo'),
+        )
+        self.students = [UserFactory.create(), UserFactory.create()]
+
+    def _get_score(self, student, problem, max_score=1):
+        """
+        Return the score of `student` on `problem` and whether the problem was
+        instantiated to get it, using a fresh index of the course's max scores.
+        """
+        module_creator = Mock(return_value=Mock(max_score=Mock(return_value=max_score)))
+        max_scores = MaxScoresIndex(self.course.id)
+        score = get_score(self.course.id, student, problem, module_creator, max_scores=max_scores)
+        max_scores.save()
+        return score, module_creator.called
+
+    def test_shared_by_students(self):
+        self.assertEqual(self._get_score(self.students[0], self.problem), ((0.0, 1), True))
+        self.assertEqual(self._get_score(self.students[1], self.problem), ((0.0, 1), False))
+
+    def test_new_version(self):
+        self._get_score(self.students[0], self.problem)
+        self.problem.display_name = 'Edited'
+        problem = modulestore().update_item(self.problem, self.user.id)
+        self.assertEqual(self._get_score(self.students[1], problem, max_score=2), ((0.0, 2), True))
+
+    def test_inaccessible_problem(self):
+        problem = ItemFactory.create(
+            parent_location=self.course.location,
+            category='problem',
+            data=StringResponseXMLFactory().build_xml(answer='foo'),
+            visible_to_staff_only=True,
+        )
+        # e.g. indexed while grading a staff member
+        self._get_score(self.students[0], problem)
+        self.assertEqual(self._get_score(self.students[1], problem), ((None, None), False))
+
+    def test_varies_by_user(self):
+        with patch.object(type(self.problem), 'max_score_varies_by_user', True):
+            self._get_score(self.students[0], self.problem)
+            self.assertEqual(self._get_score(self.students[1], self.problem), ((0.0, 1), True))
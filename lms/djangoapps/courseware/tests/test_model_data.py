@@ -396,3 +396,21 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestHasDescriptor(TestCase):
+    """Tests for FieldDataCache.has_descriptor"""
+    def setUp(self):
+        super(TestHasDescriptor, self).setUp()
+        self.user = UserFactory.create(username='user')
+        self.descriptor = mock_descriptor([mock_field(Scope.user_state, 'a_field')])
+
+    def test_loaded_descriptor(self):
+        field_data_cache = FieldDataCache([self.descriptor], course_id, self.user)
+        self.assertTrue(field_data_cache.has_descriptor(self.descriptor))
+
+    def test_descriptor_added_later(self):
+        field_data_cache = FieldDataCache([], course_id, self.user)
+        self.assertFalse(field_data_cache.has_descriptor(self.descriptor))
+        field_data_cache.add_descriptors_to_cache([self.descriptor])
+        self.assertTrue(field_data_cache.has_descriptor(self.descriptor))
@@ -30,7 +30,7 @@ from courseware.courses import get_course_with_access, course_image_url, get_cou
 from courseware.model_data import FieldDataCache
 from courseware.module_render import hash_resource, get_module_for_descriptor
 from courseware.models import StudentModule
-from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
+from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory, StaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
@@ -452,6 +452,8 @@ class TestTOC(ModuleStoreTestCase):
                 self.field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
                     self.toy_loc, self.request.user, self.toy_course, depth=2
                 )
+        # Compute the table of contents skeleton, as an earlier request would have.
+        render.get_toc_skeleton(self.toy_course)
 
     # Mongo makes 3 queries to load the course to depth 2:
     #     - 1 for the course
@@ -460,11 +462,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 6 queries to render the toc:
+    # Split makes 1 query to render the toc from the cached skeleton:
     #     - it loads the active version at the start of the bulk operation
-    #     - it loads 5 definitions, because it instantiates the a CourseModule and 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 6))
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 1))
     @ddt.unpack
     def test_toc_toy_from_chapter(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -498,11 +498,9 @@ class TestTOC(ModuleStoreTestCase):
     # Split makes 6 queries to load the course to depth 2:
     #     - load the structure
     #     - load 5 definitions
-    # Split makes 2 queries to render the toc:
+    # Split makes 1 query to render the toc from the cached skeleton:
     #     - it loads the active version at the start of the bulk operation
-    #     - it loads 5 definitions, because it instantiates the a CourseModule and 4 VideoModules
-    #       each of which access a Scope.content field in __init__
-    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 6))
+    @ddt.data((ModuleStoreEnum.Type.mongo, 3, 0, 0), (ModuleStoreEnum.Type.split, 6, 0, 1))
     @ddt.unpack
     def test_toc_toy_from_section(self, default_ms, setup_finds, setup_sends, toc_finds):
         with self.store.default_store(default_ms):
@@ -530,6 +528,33 @@ class TestTOC(ModuleStoreTestCase):
             for toc_section in expected:
                 self.assertIn(toc_section, actual)
 
+    def test_toc_skeleton_is_shared(self):
+        """
+        The skeleton is computed once per version of the course, and each user
+        only sees the chapters and sections they can load in it.
+        """
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=course, category='chapter', display_name='Chapter')
+        ItemFactory.create(parent=chapter, category='sequential', display_name='Public')
+        ItemFactory.create(parent=chapter, category='sequential', display_name='Staff Only', visible_to_staff_only=True)
+        course = self.store.get_course(course.id, depth=2)
+
+        skeleton = render.get_toc_skeleton(course)
+        self.assertEqual(
+            [section['display_name'] for section in skeleton[0]['sections']],
+            ['Public', 'Staff Only']
+        )
+        with patch('courseware.module_render.modulestore') as mock_modulestore:
+            self.assertEqual(render.get_toc_skeleton(course), skeleton)
+            self.assertFalse(mock_modulestore.called)
+
+        request = RequestFactory().get('/')
+        for user, expected in ((UserFactory(), ['Public']), (StaffFactory(course_key=course.id), ['Public', 'Staff Only'])):
+            request.user = user
+            field_data_cache = FieldDataCache.cache_for_descriptor_descendents(course.id, user, course, depth=2)
+            toc = render.toc_for_course(request, course, None, None, field_data_cache)
+            self.assertEqual([section['display_name'] for section in toc[0]['sections']], expected)
+
 
 @ddt.ddt
 class TestHtmlModifiers(ModuleStoreTestCase):
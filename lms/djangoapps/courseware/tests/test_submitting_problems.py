@@ -2,6 +2,7 @@
 """
 Integration tests for submitting problem responses and getting grades.
 """
+from datetime import timedelta
 import json
 import os
 from textwrap import dedent
@@ -17,7 +18,8 @@ from capa.tests.response_xml_factory import (
     CodeResponseXMLFactory,
 )
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.model_data import FieldDataCache
+from courseware.models import StudentModule, StudentSectionGrade
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
 from student.tests.factories import UserFactory
@@ -462,6 +464,26 @@ class TestCourseGrader(TestSubmittingProblems):
         self.check_grade_percent(1.0)
         self.assertEqual(self.get_grade_summary()['grade'], 'A')
 
+    def test_grading_reuses_field_data_cache(self):
+        """
+        Check that grading loads the student's state once, rather than once per problem.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+
+        with patch('courseware.grades.StudentModule.objects.get') as mock_get:
+            with patch(
+                'courseware.grades.FieldDataCache.add_descriptors_to_cache',
+                autospec=True,
+                side_effect=FieldDataCache.add_descriptors_to_cache,
+            ) as mock_add_descriptors:
+                self.check_grade_percent(0.67)
+        self.assertFalse(mock_get.called)
+        # the empty cache is created once, then filled once for the whole course
+        loaded_descriptors = [args[1] for args, __ in mock_add_descriptors.call_args_list if args[1]]
+        self.assertEqual(len(loaded_descriptors), 1)
+
     def test_wrong_answers(self):
         """
         Check that answering incorrectly is graded properly.
@@ -593,6 +615,73 @@ class TestCourseGrader(TestSubmittingProblems):
         self.assertEqual(self.score_for_hw('homework3'), [1.0, 1.0])
 
 
+@patch.dict(settings.FEATURES, {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentCourseGrader(TestCourseGrader):
+    """
+    Runs the course grader suite with section scores persisted between gradings.
+    """
+    # the submission is only a moment older than the grading, so don't wait for it to be committed
+    @patch('courseware.grades.STATE_COMMIT_GRACE', timedelta(0))
+    def test_section_scores_are_persisted(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        section_grade = StudentSectionGrade.objects.get(user=self.student_user, usage_key=self.homework.location)
+        self.assertEqual([score[0] for score in json.loads(section_grade.scores)], [1.0, 0.0, 0.0])
+
+        # nothing changed, so neither grading nor the progress page look at the problems again
+        with patch('courseware.grades.get_score') as mock_get_score:
+            self.check_grade_percent(0.33)
+            self.assertEqual(self.score_for_hw('homework'), [0.0, 0.0, 1.0])
+        self.assertFalse(mock_get_score.called)
+
+    def test_changed_score_regrades_section(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.check_grade_percent(0.67)
+
+    def test_course_change_regrades_section(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        section_grade = StudentSectionGrade.objects.get(user=self.student_user, usage_key=self.homework.location)
+        section_grade.course_version = 'an older version'
+        section_grade.save()
+        with patch('courseware.grades.get_score', wraps=grades.get_score) as mock_get_score:
+            self.check_grade_percent(0.33)
+        self.assertTrue(mock_get_score.called)
+
+    def test_state_saved_while_grading_regrades_section(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        # A submission saved after the grader read the state, but before it stored the scores
+        section_grade = StudentSectionGrade.objects.get(user=self.student_user, usage_key=self.homework.location)
+        StudentModule.objects.filter(
+            student=self.student_user, module_state_key=self.problem_location('p1')
+        ).update(modified=section_grade.state_read_at + timedelta(seconds=1))
+        with patch('courseware.grades.get_score', wraps=grades.get_score) as mock_get_score:
+            self.check_grade_percent(0.33)
+        self.assertTrue(mock_get_score.called)
+
+    def test_deleted_state_regrades_section(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.check_grade_percent(0.67)
+
+        # e.g. an instructor resetting the student's attempts; the remaining state is unchanged
+        StudentModule.objects.get(
+            student=self.student_user, module_state_key=self.problem_location('p1')
+        ).delete()
+        self.check_grade_percent(0.33)
+
+
 class ProblemWithUploadedFilesTest(TestSubmittingProblems):
     """Tests of problems with uploaded files."""
 
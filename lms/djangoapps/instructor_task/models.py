@@ -14,6 +14,7 @@ ASSUMPTIONS: modules have unique IDs, even across different module_types
 """
 from cStringIO import StringIO
 from gzip import GzipFile
+from tempfile import NamedTemporaryFile
 from uuid import uuid4
 import csv
 import json
@@ -193,10 +194,16 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. `store_rows()` accepts any iterable of rows, including a
+    generator, and writes them out as they are produced, so callers need not
+    build the whole dataset in memory.
+
+    Files whose names end in `PARTIAL_SUFFIX` are incomplete: intermediate
+    pieces of a report that is still being assembled, or files that are still
+    being written. They are never returned by `links_for()`.
     """
+    PARTIAL_SUFFIX = ".partial"
+
     @classmethod
     def from_config(cls):
         """
@@ -218,6 +225,20 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, csv_file):
+        """
+        Given a file-like object containing utf-8 encoded CSV data, return a
+        list of rows with each cell decoded to unicode.
+        """
+        return [[item.decode('utf-8') for item in row] for row in csv.reader(csv_file)]
+
+    @classmethod
+    def is_partial(cls, filename):
+        """
+        Return True if `filename` names an intermediate piece of a report.
+        """
+        return filename.endswith(cls.PARTIAL_SUFFIX)
+
 
 class S3ReportStore(ReportStore):
     """
@@ -241,6 +262,10 @@ class S3ReportStore(ReportStore):
 
         self.bucket = conn.get_bucket(bucket_name)
 
+    # S3 requires every part of a multipart upload except the last to be at
+    # least 5MB.
+    MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
     @classmethod
     def from_config(cls):
         """
@@ -308,8 +333,11 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write the rows to a buffer as a gzip'd csv file. If it stays
+        smaller than `MULTIPART_PART_SIZE`, `store()` that buffer. Otherwise the
+        buffer is uploaded and emptied each time it reaches that size, as a part
+        of a multipart upload, so memory use does not depend on the number of
+        rows. The file only becomes visible in S3 once the upload completes.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
@@ -317,10 +345,41 @@ class S3ReportStore(ReportStore):
         output_buffer = StringIO()
         gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
         csvwriter = csv.writer(gzip_file)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        gzip_file.close()
-
-        self.store(course_id, filename, output_buffer)
+        multipart_upload = None
+        part_num = 0
+        try:
+            for row in self._get_utf8_encoded_rows(rows):
+                csvwriter.writerow(row)
+                if output_buffer.tell() >= self.MULTIPART_PART_SIZE:
+                    if multipart_upload is None:
+                        multipart_upload = self.bucket.initiate_multipart_upload(
+                            self.key_for(course_id, filename).key,
+                            headers={"Content-Encoding": "gzip", "Content-Type": "text/csv"}
+                        )
+                    part_num += 1
+                    self._upload_part(multipart_upload, output_buffer, part_num)
+            gzip_file.close()
+
+            if multipart_upload is None:
+                self.store(course_id, filename, output_buffer)
+            else:
+                part_num += 1
+                self._upload_part(multipart_upload, output_buffer, part_num)
+                multipart_upload.complete_upload()
+        except Exception:
+            if multipart_upload is not None:
+                multipart_upload.cancel_upload()
+            raise
+
+    def _upload_part(self, multipart_upload, output_buffer, part_num):
+        """
+        Upload the contents of `output_buffer` as part `part_num` of
+        `multipart_upload`, then empty the buffer.
+        """
+        output_buffer.seek(0)
+        multipart_upload.upload_part_from_file(output_buffer, part_num)
+        output_buffer.seek(0)
+        output_buffer.truncate()
 
     def links_for(self, course_id):
         """
@@ -331,8 +390,27 @@ class S3ReportStore(ReportStore):
         return [
             (key.key.split("/")[-1], key.generate_url(expires_in=300))
             for key in sorted(self.bucket.list(prefix=course_dir.key), reverse=True, key=lambda k: k.last_modified)
+            if not self.is_partial(key.key)
         ]
 
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the csv file stored for `course_id` under
+        `filename` by `store_rows()`, with each cell decoded to unicode.
+        Returns None if no such file exists.
+        """
+        key = self.bucket.get_key(self.key_for(course_id, filename).key)
+        if key is None:
+            return None
+        gzip_file = GzipFile(fileobj=StringIO(key.get_contents_as_string()), mode="rb")
+        return self._get_utf8_decoded_rows(gzip_file)
+
+    def delete(self, course_id, filename):
+        """
+        Remove the file stored for `course_id` under `filename`, if any.
+        """
+        self.bucket.delete_key(self.key_for(course_id, filename).key)
+
 
 class LocalFSReportStore(ReportStore):
     """
@@ -379,9 +457,7 @@ class LocalFSReportStore(ReportStore):
         to string using `.getvalue()`).
         """
         full_path = self.path_to(course_id, filename)
-        directory = os.path.dirname(full_path)
-        if not os.path.exists(directory):
-            os.mkdir(directory)
+        self._make_course_dir(full_path)
 
         with open(full_path, "wb") as f:
             f.write(buff.getvalue())
@@ -389,13 +465,30 @@ class LocalFSReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out. Rows are appended to a temporary file as they are
+        produced, and the file is renamed into place once complete, so a
+        partially written file is never visible under `filename`.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-
-        self.store(course_id, filename, output_buffer)
+        full_path = self.path_to(course_id, filename)
+        self._make_course_dir(full_path)
+
+        temp_file = NamedTemporaryFile(dir=os.path.dirname(full_path), suffix=self.PARTIAL_SUFFIX, delete=False)
+        try:
+            with temp_file:
+                csvwriter = csv.writer(temp_file)
+                csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            # NamedTemporaryFile is only readable by its owner.
+            os.chmod(temp_file.name, 0o644)
+            os.rename(temp_file.name, full_path)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+
+    def _make_course_dir(self, full_path):
+        """Create the course directory that will hold `full_path`, if needed."""
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
     def links_for(self, course_id):
         """
@@ -408,10 +501,34 @@ class LocalFSReportStore(ReportStore):
         course_dir = self.path_to(course_id, '')
         if not os.path.exists(course_dir):
             return []
-        files = [(filename, os.path.join(course_dir, filename)) for filename in os.listdir(course_dir)]
+        files = [
+            (filename, os.path.join(course_dir, filename))
+            for filename in os.listdir(course_dir)
+            if not self.is_partial(filename)
+        ]
         files.sort(key=lambda (filename, full_path): os.path.getmtime(full_path), reverse=True)
 
         return [
             (filename, ("file://" + urllib.quote(full_path)))
             for filename, full_path in files
         ]
+
+    def read_rows(self, course_id, filename):
+        """
+        Return the rows of the csv file stored for `course_id` under
+        `filename`, with each cell decoded to unicode. Returns None if no such
+        file exists.
+        """
+        full_path = self.path_to(course_id, filename)
+        if not os.path.exists(full_path):
+            return None
+        with open(full_path, "rb") as csv_file:
+            return self._get_utf8_decoded_rows(csv_file)
+
+    def delete(self, course_id, filename):
+        """
+        Remove the file stored for `course_id` under `filename`, if any.
+        """
+        full_path = self.path_to(course_id, filename)
+        if os.path.exists(full_path):
+            os.remove(full_path)
@@ -35,6 +35,7 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
+    upload_grades_csv_partial,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -143,6 +144,9 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    For large courses the grading is split up among `calculate_grades_csv_partial`
+    subtasks.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
@@ -151,10 +155,24 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, grades_subtask=calculate_grades_csv_partial)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_grades_csv_partial(entry_id, partial_index, student_ids, action_name, subtask_status_dict):
+    """
+    Grade a slice of the students enrolled in a course as part of a
+    `calculate_grades_csv` task.
+
+    `entry_id` is the id value of the InstructorTask entry of the parent task,
+    `partial_index` numbers the slice, `student_ids` are the ids of the users
+    to grade, and `subtask_status_dict` is the initial `SubtaskStatus` of this
+    subtask as a dict.  See `upload_grades_csv_partial`.
+    """
+    return upload_grades_csv_partial(entry_id, partial_index, student_ids, action_name, subtask_status_dict)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
@@ -5,13 +5,16 @@ running state of a course.
 """
 import json
 from datetime import datetime
+from itertools import count
 from time import time
 import unicodecsv
 import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
@@ -31,6 +34,12 @@ from courseware.module_render import get_module_for_descriptor_internal
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
@@ -51,6 +60,10 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# The merge of a sharded grade report happens once; the lock need only outlive
+# the window in which the last subtasks may complete.
+GRADE_REPORT_MERGE_LOCK_EXPIRE = 60 * 60 * 24
+
 
 class BaseInstructorTask(Task):
     """
@@ -536,6 +549,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
                 [row1_colum1, row1_colum2, ...],
                 ...
             ]
+            Any iterable of rows, such as a generator, may be passed; rows
+            are written out as they are produced.
         csv_name: Name of the resulting CSV
         course_id: ID of the course
     """
@@ -551,7 +566,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     )
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name, grades_subtask=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -560,15 +575,21 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If `grades_subtask` is given and more than
+    `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK` students are enrolled, the
+    grading is instead split up among instances of `grades_subtask` (see
+    `upload_grades_csv_partial()`), and the report is assembled once the last
+    of them completes.
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -579,7 +600,53 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    if grades_subtask is not None and total_enrolled_students > settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK:
+        TASK_LOG.info(
+            u'%s, Task type: %s, Splitting grade calculation for total students: %s into subtasks',
+            task_info_string,
+            action_name,
+            total_enrolled_students
+        )
+        return _queue_grade_report_subtasks(
+            grades_subtask, _entry_id, action_name, enrolled_students, total_enrolled_students
+        )
+
     course = get_course_by_id(course_id)
+    current_step = {'step': 'Calculating Grades'}
+    err_rows = [["id", "username", "error_msg"]]
+    rows = _grade_report_rows(
+        course, enrolled_students, task_progress, current_step, task_info_string, action_name, err_rows
+    )
+
+    # Students are graded as their rows are written out, so this both
+    # calculates and uploads the grades.
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # By this point, we've got the error rows we're going to stuff into our CSV file.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(course, students, task_progress, current_step, task_info_string, action_name, err_rows):
+    """
+    Generator that grades each of `students` in `course`, recording the
+    outcome in `task_progress`.
+
+    Yields a header row, unless no student could be graded, followed by a
+    row for each student who was graded.  A row for each student who could
+    not be graded is appended to `err_rows`.
+    """
+    status_interval = 100
+    course_id = course.id
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
 
@@ -590,22 +657,19 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     certificate_whitelist = CertificateWhitelist.objects.filter(course_id=course_id, whitelist=True)
     whitelisted_user_ids = [entry.user_id for entry in certificate_whitelist]
 
-    # Loop over all our students and build our CSV lists in memory
+    # Loop over all our students, producing our CSV rows as we go
     header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
         action_name,
         current_step,
-        total_enrolled_students
+        total_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -620,7 +684,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
                 action_name,
                 current_step,
                 student_counter,
-                total_enrolled_students
+                total_students
             )
 
         if gradeset:
@@ -628,7 +692,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.succeeded += 1
             if not header:
                 header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
+                yield (
                     ["id", "email", "username", "grade"] + header + cohorts_header +
                     group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
                 )
@@ -669,7 +733,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
+            yield (
                 [student.id, student.email, student.username, gradeset['percent']] +
                 row_percents + cohorts_group_name + group_configs_group_names +
                 [enrollment_mode] + [verification_status] + certificate_info
@@ -685,24 +749,216 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         action_name,
         current_step,
         student_counter,
-        total_enrolled_students
+        total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
 
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+def _grade_report_partial_filename(course_id, entry_id, csv_name, partial_index):
+    """
+    Return the `ReportStore` filename under which the subtask numbered
+    `partial_index` of InstructorTask `entry_id` stores its piece of the
+    `csv_name` report.
+    """
+    return u"{course_prefix}_{csv_name}_{entry_id}_{partial_index:05d}.csv{suffix}".format(
+        course_prefix=course_filename_prefix_generator(course_id),
+        csv_name=csv_name,
+        entry_id=entry_id,
+        partial_index=partial_index,
+        suffix=ReportStore.PARTIAL_SUFFIX,
+    )
 
-    # If there are any error rows (don't count the header), write them out as well
+
+def _queue_grade_report_subtasks(grades_subtask, entry_id, action_name, enrolled_students, total_enrolled_students):
+    """
+    Split the grading of `enrolled_students` into chunks of at most
+    `settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK` students, and queue an
+    instance of `grades_subtask` for each chunk.
+
+    Returns the task progress as stored in the InstructorTask object.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As with bulk email, a lost connection to the broker may cause this task to
+    # be run again.  If subtasks have already been queued, don't queue another set.
+    if len(entry.subtasks) > 0:
+        TASK_LOG.warning(u"Task %s has already queued grade report subtasks!  InstructorTask = %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
+    partial_indices = count()
+
+    def _create_grades_subtask(to_list, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return grades_subtask.subtask(
+            (
+                entry_id,
+                next(partial_indices),
+                [item['pk'] for item in to_list],
+                action_name,
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grades_subtask,
+        [enrolled_students],
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+        total_enrolled_students,
+    )
+
+
+def upload_grades_csv_partial(entry_id, partial_index, student_ids, action_name, subtask_status_dict):
+    """
+    Grade the students in `student_ids` for the course of InstructorTask
+    `entry_id`, and store the resulting grade and error rows in the
+    `ReportStore` as the pieces numbered `partial_index` of the report.
+
+    Progress is recorded on the parent InstructorTask.  Whichever subtask
+    completes last merges all of the pieces into the final `grade_report`
+    (and `grade_report_err`) CSVs.
+
+    Returns the final status of this subtask as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    num_students = len(student_ids)
+
+    # Reject duplicate or already-completed subtasks; see check_subtask_is_valid().
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Subtask: {partial_index}'
+    task_info_string = fmt.format(
+        task_id=current_task_id,
+        entry_id=entry_id,
+        course_id=course_id,
+        partial_index=partial_index
+    )
+    TASK_LOG.info(u'%s, Task type: %s, Grading %s students', task_info_string, action_name, num_students)
+
+    task_progress = TaskProgress(action_name, num_students, time())
+    try:
+        course = get_course_by_id(course_id)
+        students = User.objects.filter(pk__in=student_ids)
+        current_step = {'step': 'Calculating Grades'}
+        err_rows = [["id", "username", "error_msg"]]
+        rows = _grade_report_rows(
+            course, students, task_progress, current_step, task_info_string, action_name, err_rows
+        )
+
+        report_store = ReportStore.from_config()
+        report_store.store_rows(
+            course_id, _grade_report_partial_filename(course_id, entry_id, 'grade_report', partial_index), rows
+        )
+        report_store.store_rows(
+            course_id, _grade_report_partial_filename(course_id, entry_id, 'grade_report_err', partial_index), err_rows
+        )
+    except Exception:
+        # Since we don't know how far the subtask got, count all of its students as failed.
+        TASK_LOG.exception(u'%s, Task type: %s, Grade calculation failed unexpectedly', task_info_string, action_name)
+        subtask_status.increment(failed=num_students, state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        merge_grade_report_partials_if_complete(entry_id)
+        raise
+
+    subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    merge_grade_report_partials_if_complete(entry_id)
+
+    TASK_LOG.info(u'%s, Task type: %s, Returning status %s', task_info_string, action_name, subtask_status)
+    return subtask_status.to_dict()
+
+
+def merge_grade_report_partials_if_complete(entry_id):
+    """
+    If all of the grade report subtasks of InstructorTask `entry_id` have
+    completed, merge their pieces into the final report.  A cache lock
+    ensures that only one worker performs the merge.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_dict = json.loads(entry.subtasks)
+    if subtask_dict['succeeded'] + subtask_dict['failed'] < subtask_dict['total']:
+        return
+
+    # cache.add fails if the key already exists
+    if not cache.add("grade-report-merge-{}".format(entry_id), 'true', GRADE_REPORT_MERGE_LOCK_EXPIRE):
+        TASK_LOG.info(u"Grade report for InstructorTask %s is already being merged", entry_id)
+        return
+
+    merge_grade_report_partials(entry, subtask_dict['total'])
+
+
+def merge_grade_report_partials(entry, num_partials):
+    """
+    Concatenate the `num_partials` pieces of the grade report stored by the
+    subtasks of InstructorTask `entry`, upload the result as the
+    `grade_report` and `grade_report_err` CSVs, and remove the pieces.
+    Pieces are read one at a time while the report is written out.
+    """
+    course_id = entry.course_id
+    report_store = ReportStore.from_config()
+    timestamp = entry.created or datetime.now(UTC)
+
+    err_rows = [["id", "username", "error_msg"]]
+    rows = _merged_grade_report_rows(report_store, entry, num_partials, err_rows)
+    upload_csv_to_report_store(rows, 'grade_report', course_id, timestamp)
     if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, timestamp)
 
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
+    for partial_index in range(num_partials):
+        for csv_name in ('grade_report', 'grade_report_err'):
+            report_store.delete(
+                course_id, _grade_report_partial_filename(course_id, entry.id, csv_name, partial_index)
+            )
+    TASK_LOG.info(u"InstructorTask %s: merged %s grade report pieces", entry.id, num_partials)
+
+
+def _merged_grade_report_rows(report_store, entry, num_partials, err_rows):
+    """
+    Generator that yields the rows of the `num_partials` pieces of the grade
+    report of InstructorTask `entry`, in order, and appends the rows of the
+    pieces of the error report to `err_rows`.
+
+    Every piece carries its own header.  The first one becomes the header of
+    the report, and the columns of any piece whose header differs are
+    rearranged to match it; a grade column that a piece lacks is reported
+    as 0.0, as it is for a student whose gradeset lacks it.
+    """
+    course_id = entry.course_id
+    header = None
+    for partial_index in range(num_partials):
+        grade_filename = _grade_report_partial_filename(course_id, entry.id, 'grade_report', partial_index)
+        err_filename = _grade_report_partial_filename(course_id, entry.id, 'grade_report_err', partial_index)
+
+        partial_rows = report_store.read_rows(course_id, grade_filename)
+        if partial_rows is None:
+            # The subtask failed before storing its piece; its students are
+            # already counted as failed in the task progress.
+            TASK_LOG.warning(u"InstructorTask %s: grade report piece %s is missing", entry.id, grade_filename)
+        elif partial_rows:
+            partial_header, partial_data = partial_rows[0], partial_rows[1:]
+            if header is None:
+                header = partial_header
+                yield header
+            if partial_header == header:
+                for row in partial_data:
+                    yield row
+            else:
+                columns = [
+                    partial_header.index(column) if column in partial_header else None
+                    for column in header
+                ]
+                for row in partial_data:
+                    yield [row[column] if column is not None else 0.0 for column in columns]
+
+        partial_err_rows = report_store.read_rows(course_id, err_filename)
+        if partial_err_rows:
+            err_rows.extend(partial_err_rows[1:])
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
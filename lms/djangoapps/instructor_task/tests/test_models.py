@@ -3,7 +3,9 @@ Tests for instructor_task/models.py.
 """
 
 from cStringIO import StringIO
+from gzip import GzipFile
 import mock
+import os
 import time
 from datetime import datetime
 from unittest import TestCase
@@ -43,6 +45,27 @@ class MockBucket(object):
         """ Expected method on a Bucket object. """
         return self.keys
 
+    def initiate_multipart_upload(self, key_name, headers):  # pylint: disable=unused-argument
+        """ Expected method on a Bucket object. """
+        self.multipart_upload = MockMultiPartUpload(key_name)  # pylint: disable=attribute-defined-outside-init
+        return self.multipart_upload
+
+
+class MockMultiPartUpload(object):
+    """ Mocking a boto S3 MultiPartUpload object. """
+    def __init__(self, key_name):
+        self.key_name = key_name
+        self.parts = []
+        self.completed = False
+
+    def upload_part_from_file(self, fp, part_num):
+        """ Expected method on a MultiPartUpload object. """
+        self.parts.append((part_num, fp.read()))
+
+    def complete_upload(self):
+        """ Expected method on a MultiPartUpload object. """
+        self.completed = True
+
 
 class MockS3Connection(object):
     """ Mocking a boto S3 Connection """
@@ -93,6 +116,44 @@ class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase
         """ Create and return a LocalFSReportStore. """
         return LocalFSReportStore.from_config()
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows may be produced by a generator, and that they are
+        written to a temporary file that is renamed into place.
+        """
+        report_store = self.create_report_store()
+
+        def rows():
+            """ Check that nothing is visible until all rows are written. """
+            yield [u'id', u'name']
+            self.assertEqual(report_store.links_for(self.course_id), [])
+            yield [1, u'ni\xf1o']
+
+        report_store.store_rows(self.course_id, 'report.csv', rows())
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        report_dir = os.path.dirname(report_store.path_to(self.course_id, 'report.csv'))
+        self.assertEqual(os.listdir(report_dir), ['report.csv'])
+        self.assertEqual(
+            report_store.read_rows(self.course_id, 'report.csv'),
+            [[u'id', u'name'], [u'1', u'ni\xf1o']]
+        )
+
+    def test_store_rows_failure(self):
+        """
+        Test that no file is left behind if producing the rows fails.
+        """
+        report_store = self.create_report_store()
+
+        def rows():
+            """ Fail partway through. """
+            yield [u'id']
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            report_store.store_rows(self.course_id, 'report.csv', rows())
+        self.assertEqual(os.listdir(os.path.dirname(report_store.path_to(self.course_id, 'report.csv'))), [])
+
 
 @mock.patch('instructor_task.models.S3Connection', new=MockS3Connection)
 @mock.patch('instructor_task.models.Key', new=MockKey)
@@ -105,3 +166,29 @@ class S3ReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     def create_report_store(self):
         """ Create and return a S3ReportStore. """
         return S3ReportStore.from_config()
+
+    @mock.patch('instructor_task.models.S3ReportStore.MULTIPART_PART_SIZE', new=100)
+    def test_store_rows_multipart(self):
+        """
+        Test that large reports are uploaded in parts as they are written.
+        """
+        report_store = self.create_report_store()
+        # Random data, so that enough survives compression to fill several parts.
+        rows = [[u'id', u'name']] + [[i, os.urandom(20).encode('hex')] for i in range(2000)]
+
+        report_store.store_rows(self.course_id, 'report.csv', iter(rows))
+
+        multipart_upload = report_store.bucket.multipart_upload
+        self.assertTrue(multipart_upload.completed)
+        self.assertGreater(len(multipart_upload.parts), 1)
+        self.assertEqual(
+            [part_num for part_num, _ in multipart_upload.parts],
+            range(1, len(multipart_upload.parts) + 1)
+        )
+        contents = ''.join(data for _, data in multipart_upload.parts)
+        self.assertEqual(
+            GzipFile(fileobj=StringIO(contents)).read(),
+            ''.join('{},{}\r\n'.format(*row) for row in rows)
+        )
+        # The report was not also stored with a single upload.
+        self.assertEqual(report_store.bucket.keys, [])
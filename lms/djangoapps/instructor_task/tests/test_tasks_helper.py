@@ -6,7 +6,12 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 Tests that CSV grade report generation works with unicode emails.
 
 """
+import json
+from uuid import uuid4
+
+from celery.states import SUCCESS
 import ddt
+from django.test.utils import override_settings
 from mock import Mock, patch
 import tempfile
 import unicodecsv
@@ -14,8 +19,10 @@ import unicodecsv
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
 from course_modes.models import CourseMode
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
+from instructor_task.tasks import calculate_grades_csv_partial
 from instructor_task.tasks_helper import cohort_students_and_upload, upload_grades_csv, upload_students_csv
+from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase, TestReportMixin, InstructorTaskModuleTestCase
 from openedx.core.djangoapps.course_groups.models import CourseUserGroupPartitionGroup
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
@@ -260,6 +267,39 @@ class TestInstructorGradeReport(TestReportMixin, InstructorTaskCourseTestCase):
         result = upload_grades_csv(None, None, self.course.id, None, 'graded')
         self.assertDictContainsSubset({'attempted': 1, 'succeeded': 1, 'failed': 0}, result)
 
+    @patch('instructor_task.tasks_helper._get_current_task')
+    @override_settings(GRADES_DOWNLOAD_STUDENTS_PER_TASK=2)
+    def test_sharded_grade_report(self, _mock_current_task):
+        """
+        Test that grading is split among subtasks and that their pieces are
+        merged into a single report.
+        """
+        students = [self.create_student(u'student{}'.format(i), u'student{}@example.com'.format(i)) for i in range(5)]
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+        upload_grades_csv(None, entry.id, self.course.id, None, 'graded', grades_subtask=calculate_grades_csv_partial)
+
+        entry = InstructorTask.objects.get(pk=entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 3)
+        self.assertDictContainsSubset(
+            {'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output)
+        )
+        # Only the merged report is visible, and the pieces are gone.
+        links = ReportStore.from_config().links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        self.verify_rows_in_csv(
+            [{'id': unicode(student.id), 'username': student.username} for student in students],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+
 
 @ddt.ddt
 class TestStudentReport(TestReportMixin, InstructorTaskCourseTestCase):
@@ -383,6 +383,9 @@ FEATURES = {
 
     # Course discovery feature
     'ENABLE_COURSE_DISCOVERY': False,
+
+    # Store per-section scores and only recompute the sections whose state or content changed
+    'ENABLE_PERSISTENT_GRADES': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -726,6 +729,25 @@ MODULESTORE = {
     }
 }
 
+# Number of split modulestore structures kept in each process's structure cache (0 disables it).
+# Structures are immutable, so they are also shared through the 'course_structure_cache' django cache
+# if one is configured.
+SPLIT_STRUCTURE_CACHE_SIZE = 1000
+
+# Caching of the assets served by contentserver.middleware.StaticContentServer.
+STATIC_CONTENT_CACHE = {
+    # Assets smaller than this many bytes are cached whole in the default cache.
+    'MAX_IN_MEMORY_SIZE': 1024 * 1024,
+    # Larger ones, up to this size, are cached in chunks of CHUNK_SIZE bytes in the
+    # 'static_asset_chunks' django cache, if one is configured.
+    'MAX_CHUNKED_SIZE': 100 * 1024 * 1024,
+    'CHUNK_SIZE': 512 * 1024,
+    # A directory in which to keep local copies of the chunked assets, or None for none,
+    # and the most bytes it may hold.
+    'DISK_DIRECTORY': None,
+    'DISK_MAX_SIZE': 1024 * 1024 * 1024,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -741,6 +763,29 @@ CODE_JAIL = {
     },
 }
 
+# Caching of the results of sandboxed code; see util.sandboxing.get_safe_exec_cache.
+SAFE_EXEC_CACHE = {
+    # Name of the django cache shared by all processes, or None for none.
+    'SHARED_CACHE': 'default',
+    # Seconds results live in the shared cache.  None means the cache's default.
+    'TIMEOUT': None,
+    # How many results each process keeps itself, and for how many seconds.
+    'LOCAL_MAX_ENTRIES': 1000,
+    'LOCAL_TIMEOUT': 5 * 60,
+    # Results whose globals take more than this many bytes as JSON aren't cached.
+    'MAX_RESULT_SIZE': 64 * 1024,
+}
+
+# Sandboxed Pythons each process keeps running, with numpy and the like already
+# imported, to execute problem code in; see capa.safe_exec.worker_pool.
+SAFE_EXEC_WORKER_POOL = {
+    # How many workers each process may start.  0 starts a new sandbox for every execution.
+    'SIZE': 0,
+    # Workers are replaced after executing this many pieces of code.  Each piece runs in a
+    # process forked from the worker for it; see capa.safe_exec.worker_pool for the isolation.
+    'MAX_REQUESTS': 100,
+}
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -751,6 +796,20 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+########################## Per-request metrics ################################
+
+# Counting of the mongo, SQL, cache and codejail calls made by each request;
+# see monitoring.middleware.RequestMetricsMiddleware.
+REQUEST_METRICS = {
+    'ENABLED': False,
+    # Also count the calls by the code that made them, to find N+1 patterns.
+    'TRACK_CALL_SITES': False,
+    # Log a line of counts and times for each request.
+    'LOG': True,
+    # Send the counts and times to statsd, tagged by view.
+    'STATSD': False,
+}
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1048,6 +1107,8 @@ TEMPLATE_LOADERS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    # Goes first, so that it measures everything the request does; see REQUEST_METRICS.
+    'monitoring.middleware.RequestMetricsMiddleware',
     'request_cache.middleware.RequestCache',
     'microsite_configuration.middleware.MicrositeMiddleware',
     'django_comment_client.middleware.AjaxExceptionMiddleware',
@@ -1058,6 +1119,7 @@ MIDDLEWARE_CLASSES = (
     #'django.contrib.auth.middleware.AuthenticationMiddleware',
     'cache_toolbox.middleware.CacheBackedAuthenticationMiddleware',
     'student.middleware.UserStandingMiddleware',
+    'student.middleware.EnrollmentsCacheMiddleware',
     'contentserver.middleware.StaticContentServer',
     'crum.CurrentRequestUserMiddleware',
 
@@ -1530,6 +1592,15 @@ CELERY_QUEUES = {
     HIGH_MEM_QUEUE: {},
 }
 
+# Course publish handlers (course structure, course overview, search index...)
+# run this many seconds after the first publish of a course, once for all the
+# publishes made meanwhile; see openedx.core.djangoapps.content.publish_handlers.
+COURSE_PUBLISH_HANDLERS = {
+    'DELAY': 30,
+    # How long a handler may hold the lock of a course, in seconds.
+    'LOCK_TIMEOUT': 15 * 60,
+}
+
 # let logging work as configured:
 CELERYD_HIJACK_ROOT_LOGGER = False
 
@@ -1744,6 +1815,7 @@ INSTALLED_APPS = (
     'lms.djangoapps.lms_xblock',
 
     'openedx.core.djangoapps.content.course_structures',
+    'openedx.core.djangoapps.content.course_overviews',
     'course_structure_api',
 
     # Mailchimp Syncing
@@ -1920,6 +1992,10 @@ CERT_NAME_LONG = "Certificate of Achievement"
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Grade reports for courses with more students than this are split up among
+# subtasks, each grading at most this many students.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 1000
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -2226,6 +2302,11 @@ API_DATE_FORMAT = '%Y-%m-%d'
 # Enrollment API Cache Timeout
 ENROLLMENT_COURSE_DETAILS_CACHE_TIMEOUT = 60
 
+# How long the enrollments of a user are cached, in seconds; 0 to only cache them per request.
+# They are cached in the 'course_enrollments' django cache, if one is configured. Studio changes
+# enrollments too, so it must be configured the same way (location and key prefix) for Studio.
+COURSE_ENROLLMENTS_CACHE_TIMEOUT = 60
+
 # for Student Notes we would like to avoid too frequent token refreshes (default is 30 seconds)
 if FEATURES['ENABLE_EDXNOTES']:
     OAUTH_ID_TOKEN_EXPIRATION = 60 * 60
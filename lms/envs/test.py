@@ -176,6 +176,9 @@ DATABASES = {
 
 }
 
+# Keep mongo query counts in tests independent of test ordering
+SPLIT_STRUCTURE_CACHE_SIZE = 0
+
 CACHES = {
     # This is the cache used for most things.
     # In staging/prod envs, the sessions also live here.
@@ -207,9 +210,25 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     },
+    'static_asset_chunks': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'static_asset_chunks',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
+    'course_enrollments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course_enrollments',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
 
 }
 
+# Only use the default cache, which tests can clear, for sandboxed code results
+SAFE_EXEC_CACHE['LOCAL_MAX_ENTRIES'] = 0
+
+# Tests reuse user ids, so don't share enrollments between them
+COURSE_ENROLLMENTS_CACHE_TIMEOUT = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
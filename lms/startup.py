@@ -38,6 +38,9 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    if settings.SAFE_EXEC_WORKER_POOL['SIZE']:
+        enable_safe_exec_worker_pool()
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
@@ -133,6 +136,18 @@ def enable_microsites():
         settings.STATICFILES_DIRS.insert(0, microsites_root)
 
 
+def enable_safe_exec_worker_pool():
+    """
+    Execute problem code in pools of pre-started sandboxed Pythons, which are
+    started in each process the first time they are needed.
+    """
+    from capa.safe_exec import configure_worker_pool
+    configure_worker_pool(
+        settings.SAFE_EXEC_WORKER_POOL['SIZE'],
+        max_requests=settings.SAFE_EXEC_WORKER_POOL['MAX_REQUESTS'],
+    )
+
+
 def enable_third_party_auth():
     """
     Enable the use of third_party_auth, which allows users to sign in to edX
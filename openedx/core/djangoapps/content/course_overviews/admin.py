@@ -0,0 +1,12 @@
+from ratelimitbackend import admin
+
+from .models import CourseOverview
+
+
+class CourseOverviewAdmin(admin.ModelAdmin):
+    search_fields = ('id', 'display_name')
+    list_display = ('id', 'display_name', 'start', 'end', 'modified')
+    ordering = ('id', '-modified')
+
+
+admin.site.register(CourseOverview, CourseOverviewAdmin)
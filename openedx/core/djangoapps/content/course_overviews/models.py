@@ -0,0 +1,342 @@
+"""
+Denormalized summaries of courses, for pages that list many courses.
+
+Loading a CourseDescriptor means loading the course's structure from the
+modulestore.  The catalog and the student dashboard only need a handful of
+course-level settings, so they read them from a CourseOverview row instead.
+Rows are refreshed whenever a course is published (see signals.py), and
+created on demand for courses that don't have one yet.
+"""
+from datetime import datetime
+import json
+import logging
+from math import exp
+
+import dateutil.parser
+from django.core.cache import cache
+from django.db import models, IntegrityError
+from django.utils.timezone import UTC
+from django.utils.translation import ugettext
+from model_utils.models import TimeStampedModel
+
+from util.date_utils import strftime_localized
+from xmodule.contentstore.content import StaticContent
+from xmodule.course_module import CourseFields
+from xmodule.error_module import ErrorDescriptor
+from xmodule.fields import Date
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule_django.models import CourseKeyField, UsageKeyField
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# How often get_all_courses creates the missing overviews of the courses in
+# the modulestore, in seconds.
+BACKFILL_INTERVAL = 60 * 60
+BACKFILL_CACHE_KEY = 'course_overviews.backfilled'
+
+
+class CourseOverview(TimeStampedModel):
+    """
+    The course-level settings of a course that listing it needs.
+
+    A CourseOverview stands in for the CourseDescriptor in the catalog, on the
+    dashboard and in course-level has_access checks, so it provides the same
+    attributes and methods those use.
+    """
+    id = CourseKeyField(max_length=255, primary_key=True, db_index=True, verbose_name='Course ID')
+    location = UsageKeyField(max_length=255)
+    org = models.CharField(max_length=255, db_index=True)
+
+    # Names
+    display_name = models.TextField(null=True)
+    display_name_with_default = models.TextField()
+    display_number_with_default = models.TextField()
+    display_org_with_default = models.TextField()
+
+    # Dates
+    start = models.DateTimeField(null=True)
+    end = models.DateTimeField(null=True)
+    advertised_start = models.TextField(null=True)
+    announcement = models.DateTimeField(null=True)
+
+    # URLs
+    course_image_url = models.TextField()
+    social_sharing_url = models.TextField(null=True)
+    end_of_course_survey_url = models.TextField(null=True)
+
+    # Certificates
+    certificates_display_behavior = models.TextField(null=True)
+    certificates_show_before_end = models.BooleanField(default=False)
+    cert_name_short = models.TextField()
+    cert_name_long = models.TextField()
+    lowest_passing_grade = models.FloatField(null=True)
+
+    # Access
+    visible_to_staff_only = models.BooleanField(default=False)
+    days_early_for_beta = models.FloatField(null=True)
+    mobile_available = models.BooleanField(default=False)
+    catalog_visibility = models.TextField(null=True)
+    ispublic = models.NullBooleanField()
+    pre_requisite_courses_json = models.TextField(default='[]')
+
+    # Enrollment
+    enrollment_start = models.DateTimeField(null=True)
+    enrollment_end = models.DateTimeField(null=True)
+    enrollment_domain = models.TextField(null=True)
+    invitation_only = models.BooleanField(default=False)
+
+    @classmethod
+    def _create_from_course(cls, course):
+        """
+        Return an unsaved CourseOverview of `course`, a CourseDescriptor.
+        """
+        return cls(
+            id=course.id,
+            location=course.location,
+            org=course.location.org,
+
+            display_name=course.display_name,
+            display_name_with_default=course.display_name_with_default,
+            display_number_with_default=course.display_number_with_default,
+            display_org_with_default=course.display_org_with_default,
+
+            start=course.start,
+            end=course.end,
+            advertised_start=course.advertised_start,
+            announcement=course.announcement,
+
+            course_image_url=_course_image_url(course),
+            social_sharing_url=course.social_sharing_url,
+            end_of_course_survey_url=course.end_of_course_survey_url,
+
+            certificates_display_behavior=course.certificates_display_behavior,
+            certificates_show_before_end=course.certificates_show_before_end,
+            cert_name_short=course.cert_name_short,
+            cert_name_long=course.cert_name_long,
+            lowest_passing_grade=course.lowest_passing_grade,
+
+            visible_to_staff_only=course.visible_to_staff_only,
+            days_early_for_beta=course.days_early_for_beta,
+            mobile_available=course.mobile_available,
+            catalog_visibility=course.catalog_visibility,
+            ispublic=course.ispublic,
+            pre_requisite_courses_json=json.dumps(course.pre_requisite_courses),
+
+            enrollment_start=course.enrollment_start,
+            enrollment_end=course.enrollment_end,
+            enrollment_domain=course.enrollment_domain,
+            invitation_only=course.invitation_only,
+        )
+
+    @classmethod
+    def load_from_module_store(cls, course_id):
+        """
+        Load the published version of the course with `course_id` from the
+        modulestore and save its CourseOverview, replacing any existing one.
+
+        Returns the CourseOverview, or None if the course doesn't exist or
+        couldn't be loaded.
+        """
+        store = modulestore()
+        with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_id):
+            course = store.get_course(course_id)
+            if course is None or isinstance(course, ErrorDescriptor):
+                return None
+            return cls._save_overview(course)
+
+    @classmethod
+    def _save_overview(cls, course):
+        """
+        Save the CourseOverview of `course`, a CourseDescriptor, over any
+        existing one, and return it.
+        """
+        overview = cls._create_from_course(course)
+        try:
+            overview.save()
+        except IntegrityError:
+            # Another process saved it at the same time; ours is as good.
+            pass
+        return overview
+
+    @classmethod
+    def get_from_id(cls, course_id):
+        """
+        Return the CourseOverview of the course with `course_id`, loading it
+        from the modulestore if it isn't stored yet, or None if there is no
+        such course.
+        """
+        try:
+            return cls.objects.get(id=course_id)
+        except cls.DoesNotExist:
+            return cls.load_from_module_store(course_id)
+
+    @classmethod
+    def get_for_ids(cls, course_ids):
+        """
+        Return a dict mapping each of `course_ids` to its CourseOverview,
+        loading any that aren't stored yet.  Courses that don't exist are
+        left out.
+        """
+        overviews = {overview.id: overview for overview in cls.objects.filter(id__in=course_ids)}
+        for course_id in course_ids:
+            if course_id not in overviews:
+                overview = cls.load_from_module_store(course_id)
+                if overview is not None:
+                    overviews[course_id] = overview
+        return overviews
+
+    @classmethod
+    def get_all_courses(cls, org=None):
+        """
+        Return the CourseOverviews of all the courses, of the courses of `org`
+        only if it is given.
+
+        Courses get an overview when they are published or first listed on a
+        dashboard.  Once every BACKFILL_INTERVAL seconds, this also creates the
+        overviews of the other courses in the modulestore (e.g. courses which
+        haven't been published since this table was created), and refreshes
+        those of XML courses, which are never published.
+        """
+        overviews = dict((overview.id, overview) for overview in cls.objects.all())
+        # cache.add fails if the key already exists, so only one process backfills.
+        if cache.add(BACKFILL_CACHE_KEY, True, BACKFILL_INTERVAL):
+            overviews.update(cls._backfill(overviews))
+        return [overview for overview in overviews.itervalues() if org is None or overview.org == org]
+
+    @classmethod
+    def _backfill(cls, overviews):
+        """
+        Save the overviews of the courses in the modulestore which are missing
+        from `overviews`, a dict of the stored overviews by course id, or which
+        are XML courses.  Returns a dict of the saved overviews by course id.
+        """
+        store = modulestore()
+        saved = {}
+        for course in store.get_courses():
+            if isinstance(course, ErrorDescriptor):
+                continue
+            if course.id in overviews and store.get_modulestore_type(course.id) != ModuleStoreEnum.Type.xml:
+                continue
+            saved[course.id] = cls._save_overview(course)
+        return saved
+
+    @property
+    def number(self):
+        return self.location.course
+
+    @property
+    def pre_requisite_courses(self):
+        return json.loads(self.pre_requisite_courses_json)
+
+    def has_ended(self):
+        """
+        Returns True if the current time is after the course end date, or
+        False if there is no end date.
+        """
+        if self.end is None:
+            return False
+        return datetime.now(UTC()) > self.end
+
+    def has_started(self):
+        return datetime.now(UTC()) > self.start
+
+    def may_certify(self):
+        """
+        Return True if it is acceptable to show the student a certificate download link
+        """
+        show_early = (
+            self.certificates_display_behavior in ('early_with_info', 'early_no_info') or
+            self.certificates_show_before_end
+        )
+        return show_early or self.has_ended()
+
+    @property
+    def start_date_is_still_default(self):
+        """
+        Checks if the start date set for the course is still default, i.e. .start has not been modified,
+        and .advertised_start has not been set.
+        """
+        return self.advertised_start is None and self.start == CourseFields.start.default
+
+    def start_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the text of the course's start date and time in UTC, as
+        CourseDescriptor.start_datetime_text does.
+        """
+        if isinstance(self.advertised_start, basestring):
+            try:
+                when = Date().from_json(self.advertised_start)
+            except ValueError:
+                when = None
+            if when is None:
+                return self.advertised_start.title()
+        elif self.start_date_is_still_default:
+            # Translators: TBD stands for 'To Be Determined' and is used when a course
+            # does not yet have an announced start date.
+            return ugettext('TBD')
+        else:
+            when = self.start
+
+        text = strftime_localized(when, format_string)
+        return text + u" UTC" if format_string == "DATE_TIME" else text
+
+    def end_datetime_text(self, format_string="SHORT_DATE"):
+        """
+        Returns the end date or date_time for the course formatted as a string,
+        or an empty string if the course has no end date.
+        """
+        if self.end is None:
+            return ''
+        text = strftime_localized(self.end, format_string)
+        return text if format_string == "SHORT_DATE" else text + u" UTC"
+
+    @property
+    def sorting_score(self):
+        """
+        The same "newness" score as CourseDescriptor.sorting_score: the lower,
+        the newer the course.
+        """
+        now = datetime.now(UTC())
+        scale = 300.0  # about a year
+        if self.announcement:
+            days = (now - self.announcement).days
+            return -exp(-days / scale)
+
+        try:
+            start = dateutil.parser.parse(self.advertised_start)
+            if start.tzinfo is None:
+                start = start.replace(tzinfo=UTC())
+        except (ValueError, AttributeError):
+            start = self.start
+        days = (now - start).days
+        return exp(days / scale)
+
+    def __unicode__(self):
+        return unicode(self.id)
+
+
+def _course_image_url(course):
+    """
+    The URL of the image of `course`, a CourseDescriptor, as
+    courseware.courses.course_image_url computes it.  That can't be imported
+    here because overviews are also saved by the CMS.
+    """
+    if course.static_asset_path or modulestore().get_modulestore_type(course.id) == ModuleStoreEnum.Type.xml:
+        url = '/static/' + (course.static_asset_path or getattr(course, 'data_dir', ''))
+        if course.course_image != course.fields['course_image'].default:
+            url += '/' + course.course_image
+        else:
+            url += '/images/course_image.jpg'
+    elif course.course_image == '':
+        url = ''
+    else:
+        loc = StaticContent.compute_location(course.id, course.course_image)
+        url = StaticContent.serialize_asset_key_with_slash(loc)
+    return url
+
+
+# Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
+# at the end of this file to avoid circular dependencies.
+import signals  # pylint: disable=unused-import
@@ -0,0 +1,34 @@
+"""
+Signal receivers which keep the CourseOverviews up to date with the modulestore.
+"""
+from django.dispatch.dispatcher import receiver
+
+from xmodule.modulestore.django import SignalHandler
+
+from openedx.core.djangoapps.content.publish_handlers import schedule_publish_handler
+
+
+@receiver(SignalHandler.course_published)
+def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Schedule the refresh of the overview of a course which was published.
+
+    The stored overview is kept until the task overwrites it, so that the
+    course stays listed in the catalog meanwhile.
+    """
+    # Import here to avoid a circular import.
+    from .tasks import update_course_overview
+
+    # The overview is reloaded right away, once for all the publishes made while it is.
+    schedule_publish_handler(update_course_overview, course_key)
+
+
+@receiver(SignalHandler.course_deleted)
+def listen_for_course_delete(sender, course_key, **kwargs):  # pylint: disable=unused-argument
+    """
+    Delete the overview of a course which was deleted.
+    """
+    # Import here to avoid a circular import.
+    from .models import CourseOverview
+
+    CourseOverview.objects.filter(id=course_key).delete()
@@ -0,0 +1,30 @@
+"""
+Celery tasks which refresh CourseOverviews.
+"""
+import logging
+
+from opaque_keys.edx.keys import CourseKey
+
+from openedx.core.djangoapps.content.publish_handlers import publish_handler_task
+
+
+log = logging.getLogger('edx.celery.task')
+
+
+# The overview is cheap to build and is what lists the course, so refresh it right away.
+@publish_handler_task(name=u'openedx.core.djangoapps.content.course_overviews.tasks.update_course_overview', delay=0)
+def update_course_overview(course_key):
+    """
+    Reloads the overview of the specified course from the modulestore, over
+    the stored one.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseOverview
+
+    course_key = CourseKey.from_string(course_key)
+
+    try:
+        CourseOverview.load_from_module_store(course_key)
+    except Exception as ex:
+        log.exception('An error occurred while generating course overview: %s', ex.message)
+        raise
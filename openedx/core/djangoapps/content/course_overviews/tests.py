@@ -0,0 +1,97 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils.timezone import UTC
+from mock import patch
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+
+class CourseOverviewTests(ModuleStoreTestCase):
+    def setUp(self):
+        super(CourseOverviewTests, self).setUp()
+        self.course = CourseFactory.create(
+            org='OverviewX',
+            display_name='Overview Course',
+            start=datetime.datetime(2014, 1, 1, tzinfo=UTC()),
+            end=datetime.datetime(2015, 1, 1, tzinfo=UTC()),
+            mobile_available=True,
+            pre_requisite_courses=['a/b/c'],
+        )
+
+    def test_matches_course(self):
+        CourseOverview.objects.all().delete()
+        overview = CourseOverview.get_from_id(self.course.id)
+
+        for attr in ('id', 'location', 'number', 'display_name', 'display_name_with_default',
+                     'display_number_with_default', 'display_org_with_default', 'start', 'end',
+                     'mobile_available', 'catalog_visibility', 'ispublic', 'cert_name_short', 'pre_requisite_courses',
+                     'lowest_passing_grade', 'start_date_is_still_default', 'sorting_score'):
+            self.assertEqual(getattr(overview, attr), getattr(self.course, attr), attr)
+        for method in ('has_started', 'has_ended', 'may_certify'):
+            self.assertEqual(getattr(overview, method)(), getattr(self.course, method)(), method)
+
+        # It was saved, and is read back the same.
+        overview = CourseOverview.objects.get(id=self.course.id)
+        self.assertEqual(overview.display_name, 'Overview Course')
+        self.assertEqual(overview.pre_requisite_courses, ['a/b/c'])
+
+    def test_stored_overview_is_used(self):
+        CourseOverview.get_from_id(self.course.id)
+        with patch('openedx.core.djangoapps.content.course_overviews.models.modulestore') as mock_modulestore:
+            overview = CourseOverview.get_from_id(self.course.id)
+            self.assertFalse(mock_modulestore.called)
+        self.assertEqual(overview.id, self.course.id)
+
+    def test_missing_course(self):
+        course_key = self.store.make_course_key('No', 'Such', 'Course')
+        self.assertIsNone(CourseOverview.get_from_id(course_key))
+        self.assertEqual(CourseOverview.get_for_ids([course_key, self.course.id]).keys(), [self.course.id])
+
+    def test_publish_refreshes_overview(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.course.display_name = 'Renamed Course'
+        self.store.update_item(self.course, ModuleStoreEnum.UserID.test)
+        self.store.publish(self.course.location, ModuleStoreEnum.UserID.test)
+
+        self.assertEqual(CourseOverview.objects.get(id=self.course.id).display_name, 'Renamed Course')
+
+    @patch('openedx.core.djangoapps.content.course_overviews.tasks.update_course_overview.apply_async')
+    def test_publish_keeps_overview_until_refreshed(self, mock_apply_async):
+        CourseOverview.get_from_id(self.course.id)
+        self.store.publish(self.course.location, ModuleStoreEnum.UserID.test)
+
+        self.assertTrue(mock_apply_async.called)
+        self.assertTrue(CourseOverview.objects.filter(id=self.course.id).exists())
+
+    def test_delete_removes_overview(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.store.delete_course(self.course.id, ModuleStoreEnum.UserID.test)
+
+        self.assertFalse(CourseOverview.objects.filter(id=self.course.id).exists())
+
+    def test_get_all_courses(self):
+        other_course = CourseFactory.create(org='OtherX')
+        CourseOverview.get_for_ids([self.course.id, other_course.id])
+        cache.clear()
+
+        self.assertEqual(
+            set(overview.id for overview in CourseOverview.get_all_courses()),
+            {self.course.id, other_course.id}
+        )
+        self.assertEqual([overview.id for overview in CourseOverview.get_all_courses(org='OtherX')], [other_course.id])
+
+    def test_get_all_courses_backfills(self):
+        CourseOverview.objects.all().delete()
+        cache.clear()
+        self.assertEqual([overview.id for overview in CourseOverview.get_all_courses()], [self.course.id])
+        self.assertTrue(CourseOverview.objects.filter(id=self.course.id).exists())
+
+        # The modulestore is only listed once in a while.
+        CourseOverview.objects.all().delete()
+        with patch('openedx.core.djangoapps.content.course_overviews.models.modulestore') as mock_modulestore:
+            self.assertEqual(CourseOverview.get_all_courses(), [])
+            self.assertFalse(mock_modulestore.called)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding model 'CourseStructureBlock'
+        db.create_table('course_structures_coursestructureblock', (
+            ('id', self.gf('django.db.models.fields.AutoField')(primary_key=True)),
+            ('structure', self.gf('django.db.models.fields.related.ForeignKey')(related_name='blocks', to=orm['course_structures.CourseStructure'])),
+            ('usage_key', self.gf('xmodule_django.models.UsageKeyField')(max_length=255)),
+            ('block_type', self.gf('django.db.models.fields.CharField')(max_length=255, db_index=True)),
+            ('display_name', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('graded', self.gf('django.db.models.fields.BooleanField')(default=False)),
+            ('format', self.gf('django.db.models.fields.TextField')(null=True)),
+            ('children_json', self.gf('django.db.models.fields.TextField')(default='[]')),
+            ('position', self.gf('django.db.models.fields.PositiveIntegerField')(db_index=True)),
+            ('last_position', self.gf('django.db.models.fields.PositiveIntegerField')()),
+            ('subtree_edited_on', self.gf('django.db.models.fields.CharField')(max_length=64, null=True)),
+        ))
+        db.send_create_signal('course_structures', ['CourseStructureBlock'])
+
+        # Adding unique constraint on 'CourseStructureBlock', fields ['structure', 'usage_key']
+        db.create_unique('course_structures_coursestructureblock', ['structure_id', 'usage_key'])
+
+        # The stored structures have no blocks; they are regenerated on the next publish or request, or by the
+        # generate_course_structure command.
+        if not db.dry_run:
+            orm['course_structures.CourseStructure'].objects.all().delete()
+
+        # Deleting field 'CourseStructure.structure_json'
+        db.delete_column('course_structures_coursestructure', 'structure_json')
+
+
+    def backwards(self, orm):
+        # Removing unique constraint on 'CourseStructureBlock', fields ['structure', 'usage_key']
+        db.delete_unique('course_structures_coursestructureblock', ['structure_id', 'usage_key'])
+
+        # Deleting model 'CourseStructureBlock'
+        db.delete_table('course_structures_coursestructureblock')
+
+        # Adding field 'CourseStructure.structure_json'
+        db.add_column('course_structures_coursestructure', 'structure_json',
+                      self.gf('django.db.models.fields.TextField')(null=True, blank=True),
+                      keep_default=False)
+
+
+    models = {
+        'course_structures.coursestructure': {
+            'Meta': {'object_name': 'CourseStructure'},
+            'course_id': ('xmodule_django.models.CourseKeyField', [], {'unique': 'True', 'max_length': '255', 'db_index': 'True'}),
+            'created': ('model_utils.fields.AutoCreatedField', [], {'default': 'datetime.datetime.now'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'modified': ('model_utils.fields.AutoLastModifiedField', [], {'default': 'datetime.datetime.now'})
+        },
+        'course_structures.coursestructureblock': {
+            'Meta': {'unique_together': "(('structure', 'usage_key'),)", 'object_name': 'CourseStructureBlock'},
+            'block_type': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'}),
+            'children_json': ('django.db.models.fields.TextField', [], {'default': "'[]'"}),
+            'display_name': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'format': ('django.db.models.fields.TextField', [], {'null': 'True'}),
+            'graded': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'last_position': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'position': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'structure': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'blocks'", 'to': "orm['course_structures.CourseStructure']"}),
+            'subtree_edited_on': ('django.db.models.fields.CharField', [], {'max_length': '64', 'null': 'True'}),
+            'usage_key': ('xmodule_django.models.UsageKeyField', [], {'max_length': '255'})
+        }
+    }
+
+    complete_apps = ['course_structures']
@@ -1,30 +1,123 @@
 import json
 import logging
 
+from django.db import models
 from model_utils.models import TimeStampedModel
 
-from util.models import CompressedTextField
-from xmodule_django.models import CourseKeyField
+from xmodule_django.models import CourseKeyField, UsageKeyField
 
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
 class CourseStructure(TimeStampedModel):
-    course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
+    """
+    The block graph of a course, as one CourseStructureBlock row per block.
 
-    # Right now the only thing we do with the structure doc is store it and
-    # send it on request. If we need to store a more complex data model later,
-    # we can do so and build a migration. The only problem with a normalized
-    # data model for this is that it will likely involve hundreds of rows, and
-    # we'd have to be careful about caching.
-    structure_json = CompressedTextField(verbose_name='Structure JSON', blank=True, null=True)
+    The blocks are numbered in depth-first order, and each one records the
+    last number in its subtree, so that a block's subtree, its ancestors and
+    all the blocks of a type are each a single indexed query.
+    """
+    course_id = CourseKeyField(max_length=255, db_index=True, unique=True, verbose_name='Course ID')
 
     @property
     def structure(self):
-        if self.structure_json:
-            return json.loads(self.structure_json)
-        return None
+        """
+        The whole course as a dict: the usage key of the root block under
+        'root', and the dicts of all the blocks, by usage key, under 'blocks'.
+        Returns None if there are no blocks.
+        """
+        blocks = list(self.blocks.order_by('position'))
+        if not blocks:
+            return None
+        return {
+            'root': unicode(blocks[0].usage_key),
+            'blocks': {unicode(block.usage_key): block.to_dict() for block in blocks},
+        }
+
+    def get_block(self, usage_key):
+        """
+        Return the CourseStructureBlock of `usage_key`.
+
+        Raises CourseStructureBlock.DoesNotExist if the course has no such block.
+        """
+        return self.blocks.get(usage_key=usage_key)
+
+    def get_subtree(self, usage_key):
+        """
+        Return the CourseStructureBlocks of `usage_key` and of all its
+        descendants, in depth-first order.
+        """
+        block = self.get_block(usage_key)
+        return list(
+            self.blocks.filter(position__gte=block.position, position__lte=block.last_position).order_by('position')
+        )
+
+    def get_ancestors(self, usage_key):
+        """
+        Return the CourseStructureBlocks of the ancestors of `usage_key`,
+        starting from the root.
+        """
+        block = self.get_block(usage_key)
+        return list(
+            self.blocks.filter(position__lt=block.position, last_position__gte=block.position).order_by('position')
+        )
+
+    def get_blocks_of_type(self, block_type):
+        """
+        Return the CourseStructureBlocks of the blocks of `block_type`, in
+        depth-first order.
+        """
+        return list(self.blocks.filter(block_type=block_type).order_by('position'))
+
+
+class CourseStructureBlock(models.Model):
+    """
+    One block of a CourseStructure.
+    """
+    structure = models.ForeignKey(CourseStructure, related_name='blocks')
+    usage_key = UsageKeyField(max_length=255)
+    block_type = models.CharField(max_length=255, db_index=True)
+    display_name = models.TextField(null=True)
+    graded = models.BooleanField(default=False)
+    format = models.TextField(null=True)
+    children_json = models.TextField(default='[]')
+
+    # The number of the block in depth-first order, and the last number of
+    # its subtree.
+    position = models.PositiveIntegerField(db_index=True)
+    last_position = models.PositiveIntegerField()
+
+    # When the block's subtree was last edited, if the modulestore knows.
+    # An unchanged subtree doesn't need to be read again.
+    subtree_edited_on = models.CharField(max_length=64, null=True)
+
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('structure', 'usage_key'),)
+
+    @property
+    def children(self):
+        """
+        The usage keys of the block's children, as strings.
+        """
+        return json.loads(self.children_json)
+
+    def to_dict(self):
+        """
+        The block as CourseStructure.structure lists it.
+        """
+        return {
+            'usage_key': unicode(self.usage_key),
+            'block_type': self.block_type,
+            'display_name': self.display_name,
+            'graded': self.graded,
+            'format': self.format,
+            'children': self.children,
+        }
+
+    def __unicode__(self):
+        return unicode(self.usage_key)
+
 
 # Signals must be imported in a file that is automatically loaded at app startup (e.g. models.py). We import them
 # at the end of this file to avoid circular dependencies.
@@ -1,79 +1,156 @@
 import json
 import logging
 
-from celery.task import task
+from django.db import transaction
 from opaque_keys.edx.keys import CourseKey
 from xmodule.modulestore.django import modulestore
 
+from openedx.core.djangoapps.content.publish_handlers import publish_handler_task
+
 
 log = logging.getLogger('edx.celery.task')
 
 
-def _generate_course_structure(course_key):
+def _subtree_edited_on(block):
     """
-    Generates a course structure dictionary for the specified course.
+    Returns when the subtree of `block` was last edited, as a string, or None if its modulestore doesn't know.
     """
-    course = modulestore().get_course(course_key, depth=None)
-    blocks_stack = [course]
-    blocks_dict = {}
-    while blocks_stack:
-        curr_block = blocks_stack.pop()
-        children = curr_block.get_children() if curr_block.has_children else []
+    get_subtree_edited_on = getattr(block.runtime, 'get_subtree_edited_on', None)
+    edited_on = get_subtree_edited_on(block) if get_subtree_edited_on is not None else None
+    return edited_on.isoformat() if edited_on is not None else None
+
+
+def _generate_course_blocks(course_key, stored_blocks=()):
+    """
+    Generates the unsaved CourseStructureBlocks of the specified course, in depth-first order.
+
+    `stored_blocks` are the course's currently stored CourseStructureBlocks, in depth-first order. The subtrees that
+    haven't been edited since they were stored are taken from them, renumbered, rather than read from the
+    modulestore, and blocks that are read again keep the primary key of their stored row.
+    """
+    # Import here to avoid circular import.
+    from .models import CourseStructureBlock
+
+    stored_blocks = list(stored_blocks)
+    if any(stored.position != position for position, stored in enumerate(stored_blocks)):
+        log.warning('The stored structure of course %s is inconsistent. Regenerating all of it.', course_key)
+        stored_blocks = []
+    stored_by_key = {unicode(stored.usage_key): stored for stored in stored_blocks}
+
+    # Only the edited subtrees will be read, so don't load the whole course unless there's nothing stored.
+    course = modulestore().get_course(course_key, depth=0 if stored_blocks else None)
+    blocks = []
+    seen = set()
+
+    def add_stored_subtree(stored):
+        offset = len(blocks) - stored.position
+        for descendant in stored_blocks[stored.position:stored.last_position + 1]:
+            descendant.position += offset
+            descendant.last_position += offset
+            seen.add(unicode(descendant.usage_key))
+            blocks.append(descendant)
+
+    def add_block(curr_block):
         key = unicode(curr_block.scope_ids.usage_id)
-        block = {
-            "usage_key": key,
-            "block_type": curr_block.category,
-            "display_name": curr_block.display_name,
-            "children": [unicode(child.scope_ids.usage_id) for child in children]
-        }
+        if key in seen:
+            return
+        seen.add(key)
+
+        stored = stored_by_key.get(key)
+        subtree_edited_on = _subtree_edited_on(curr_block)
+        if stored is not None and subtree_edited_on is not None and stored.subtree_edited_on == subtree_edited_on:
+            add_stored_subtree(stored)
+            return
+
+        children = curr_block.get_children() if curr_block.has_children else []
+        block = CourseStructureBlock(
+            usage_key=curr_block.scope_ids.usage_id,
+            block_type=curr_block.category,
+            display_name=curr_block.display_name,
+            children_json=json.dumps([unicode(child.scope_ids.usage_id) for child in children]),
+            position=len(blocks),
+            subtree_edited_on=subtree_edited_on,
+        )
+        if stored is not None:
+            block.pk = stored.pk
 
         # Retrieve these attributes separately so that we can fail gracefully if the block doesn't have the attribute.
         attrs = (('graded', False), ('format', None))
         for attr, default in attrs:
             if hasattr(curr_block, attr):
-                block[attr] = getattr(curr_block, attr, default)
+                setattr(block, attr, getattr(curr_block, attr, default))
             else:
                 log.warning('Failed to retrieve %s attribute of block %s. Defaulting to %s.', attr, key, default)
-                block[attr] = default
+                setattr(block, attr, default)
+
+        blocks.append(block)
+        for child in children:
+            add_block(child)
+        block.last_position = len(blocks) - 1
 
-        blocks_dict[key] = block
+    add_block(course)
+    return blocks
 
-        # Add this blocks children to the stack so that we can traverse them as well.
-        blocks_stack.extend(children)
+
+def _generate_course_structure(course_key):
+    """
+    Generates a course structure dictionary for the specified course.
+    """
+    blocks = _generate_course_blocks(course_key)
     return {
-        "root": unicode(course.scope_ids.usage_id),
-        "blocks": blocks_dict
+        "root": unicode(blocks[0].usage_key),
+        "blocks": {unicode(block.usage_key): block.to_dict() for block in blocks}
     }
 
 
-@task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
+def _block_row(block):
+    """
+    The stored values of a CourseStructureBlock, to tell whether it has to be saved again.
+    """
+    return (
+        unicode(block.usage_key), block.block_type, block.display_name, block.graded, block.format,
+        block.children_json, block.position, block.last_position, block.subtree_edited_on,
+    )
+
+
+@publish_handler_task(name=u'openedx.core.djangoapps.content.course_structures.tasks.update_course_structure')
 def update_course_structure(course_key):
     """
     Regenerates and updates the course structure (in the database) for the specified course.
+
+    Only the subtrees that were edited since the structure was last generated are read from the modulestore, and
+    only the blocks that changed are written.
     """
     # Import here to avoid circular import.
-    from .models import CourseStructure
-
-    # Ideally we'd like to accept a CourseLocator; however, CourseLocator is not JSON-serializable (by default) so
-    # Celery's delayed tasks fail to start. For this reason, callers should pass the course key as a Unicode string.
-    if not isinstance(course_key, basestring):
-        raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+    from .models import CourseStructure, CourseStructureBlock
 
     course_key = CourseKey.from_string(course_key)
 
     try:
-        structure = _generate_course_structure(course_key)
+        stored_blocks = list(CourseStructure.objects.get(course_id=course_key).blocks.order_by('position'))
+    except CourseStructure.DoesNotExist:
+        stored_blocks = []
+    stored_rows = {stored.pk: _block_row(stored) for stored in stored_blocks}
+
+    try:
+        blocks = _generate_course_blocks(course_key, stored_blocks)
     except Exception as ex:
         log.exception('An error occurred while generating course structure: %s', ex.message)
         raise
 
-    structure_json = json.dumps(structure)
-
-    cs, created = CourseStructure.objects.get_or_create(
-        course_id=course_key,
-        defaults={'structure_json': structure_json}
-    )
-
-    if not created:
-        cs.structure_json = structure_json
+    with transaction.commit_on_success():
+        cs, __ = CourseStructure.objects.get_or_create(course_id=course_key)
+        kept = set(block.pk for block in blocks if block.pk is not None)
+        cs.blocks.exclude(pk__in=kept).delete()
+
+        new_blocks = []
+        for block in blocks:
+            block.structure = cs
+            if block.pk is None:
+                new_blocks.append(block)
+            elif _block_row(block) != stored_rows[block.pk]:
+                block.save()
+        CourseStructureBlock.objects.bulk_create(new_blocks)
+
+        # Record when the structure was regenerated.
         cs.save()
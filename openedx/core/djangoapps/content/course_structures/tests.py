@@ -1,9 +1,9 @@
-import json
+from mock import patch
 
 from xmodule.modulestore.django import SignalHandler
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
-from openedx.core.djangoapps.content.course_structures.models import CourseStructure
+from openedx.core.djangoapps.content.course_structures.models import CourseStructure, CourseStructureBlock
 from openedx.core.djangoapps.content.course_structures.signals import listen_for_course_publish
 from openedx.core.djangoapps.content.course_structures.tasks import _generate_course_structure, update_course_structure
 
@@ -54,42 +54,42 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         actual = _generate_course_structure(self.course.id)
         self.assertDictEqual(actual, expected)
 
-    def test_structure_json(self):
+    def test_structure(self):
         """
-        Although stored as compressed data, CourseStructure.structure_json should always return the uncompressed string.
+        CourseStructure.structure should return the course structure, built from the stored blocks.
         """
-        course_id = 'a/b/c'
-        structure = {
-            'root': course_id,
-            'blocks': {
-                course_id: {
-                    'id': course_id
-                }
-            }
-        }
-        structure_json = json.dumps(structure)
-        cs = CourseStructure.objects.create(course_id=self.course.id, structure_json=structure_json)
-        self.assertEqual(cs.structure_json, structure_json)
-
-        # Reload the data to ensure the init signal is fired to decompress the data.
+        update_course_structure(unicode(self.course.id))
         cs = CourseStructure.objects.get(course_id=self.course.id)
-        self.assertEqual(cs.structure_json, structure_json)
+        self.assertDictEqual(cs.structure, _generate_course_structure(self.course.id))
 
-    def test_structure(self):
+        cs.blocks.all().delete()
+        self.assertIsNone(cs.structure)
+
+    def test_block_queries(self):
         """
-        CourseStructure.structure should return the uncompressed, JSON-parsed course structure.
+        Subtrees, ancestors and the blocks of a type should be read from the stored blocks.
         """
-        structure = {
-            'root': 'a/b/c',
-            'blocks': {
-                'a/b/c': {
-                    'id': 'a/b/c'
-                }
-            }
-        }
-        structure_json = json.dumps(structure)
-        cs = CourseStructure.objects.create(course_id=self.course.id, structure_json=structure_json)
-        self.assertDictEqual(cs.structure, structure)
+        sequential = ItemFactory.create(parent=self.section, category='sequential')
+        vertical = ItemFactory.create(parent=sequential, category='vertical')
+        other_section = ItemFactory.create(parent=self.course, category='chapter')
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+
+        def keys(blocks):
+            return [block.usage_key for block in blocks]
+
+        self.assertEqual(
+            keys(cs.get_subtree(self.section.location)),
+            [self.section.location, sequential.location, vertical.location]
+        )
+        self.assertEqual(keys(cs.get_subtree(other_section.location)), [other_section.location])
+        self.assertEqual(
+            keys(cs.get_ancestors(vertical.location)),
+            [self.course.location, self.section.location, sequential.location]
+        )
+        self.assertEqual(keys(cs.get_ancestors(self.course.location)), [])
+        self.assertEqual(keys(cs.get_blocks_of_type('chapter')), [self.section.location, other_section.location])
+        self.assertEqual(cs.get_block(sequential.location).children, [unicode(vertical.location)])
 
     def test_block_with_missing_fields(self):
         """
@@ -128,3 +128,27 @@ class CourseStructureTaskTests(ModuleStoreTestCase):
         cs = CourseStructure.objects.get(course_id=course_id)
         self.assertEqual(cs.course_id, course_id)
         self.assertEqual(cs.structure, structure)
+
+    def test_update_only_changed_blocks(self):
+        """
+        Updating the course structure should only write the blocks that changed, keeping the rows of the others.
+        """
+        update_course_structure(unicode(self.course.id))
+        cs = CourseStructure.objects.get(course_id=self.course.id)
+        pks = {unicode(block.usage_key): block.pk for block in cs.blocks.all()}
+
+        # Nothing changed, so nothing is written.
+        with patch.object(CourseStructureBlock, 'save') as mock_save:
+            update_course_structure(unicode(self.course.id))
+            self.assertFalse(mock_save.called)
+
+        other_section = ItemFactory.create(parent=self.course, category='chapter', display_name='Other Section')
+        self.section.display_name = 'Renamed Section'
+        self.store.update_item(self.section, self.user.id)
+        update_course_structure(unicode(self.course.id))
+
+        self.assertEqual(cs.structure, _generate_course_structure(self.course.id))
+        self.assertEqual(cs.get_block(self.section.location).display_name, 'Renamed Section')
+        self.assertEqual(cs.get_block(self.section.location).pk, pks[unicode(self.section.location)])
+        self.assertEqual(cs.get_block(self.course.location).pk, pks[unicode(self.course.location)])
+        self.assertEqual(cs.get_subtree(other_section.location)[0].position, 2)
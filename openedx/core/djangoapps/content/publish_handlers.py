@@ -0,0 +1,155 @@
+"""
+Celery tasks which handle course publishes, coalesced per course.
+
+An author publishing a unit after another in Studio sends a course_published
+signal for each of them, and each handler (course structure, course overview,
+search index...) used to rebuild its view of the whole course every time.
+
+The signal receivers call `schedule_publish_handler` instead of calling the
+handler task directly.  The first publish of a course schedules the handler to
+run settings.COURSE_PUBLISH_HANDLERS['DELAY'] seconds later, or after its own
+delay if it declares one; the publishes made before it runs are folded into
+that run.  Handlers run under a lock per
+handler and course, so that two workers never rebuild the same thing at once:
+a run which finds the lock taken is folded into the next run instead.  Each
+run's time, and how long it waited since the first publish it handles, are
+logged and sent to statsd.
+
+To declare a handler::
+
+    @publish_handler_task(name=u'path.to.tasks.update_my_thing')
+    def update_my_thing(course_key):
+        # course_key is the course's key, as a unicode string.
+
+Handlers which are cheap, and whose results users wait for (e.g. the course
+overview which lists the course), can be declared with `delay=0`.
+"""
+from functools import wraps
+import logging
+import time
+
+from celery.task import task
+from django.conf import settings
+from django.core.cache import cache
+
+import dogstats_wrapper as dog_stats_api
+
+
+log = logging.getLogger('edx.celery.task')
+
+DEFAULT_DELAY = 30
+DEFAULT_LOCK_TIMEOUT = 15 * 60
+
+
+def _config(name, default):
+    """
+    Return the setting `name` of settings.COURSE_PUBLISH_HANDLERS.
+    """
+    return getattr(settings, 'COURSE_PUBLISH_HANDLERS', {}).get(name, default)
+
+
+def _pending_key(handler, course_key):
+    """
+    The cache key marking that a run of `handler` for `course_key` is scheduled.
+    """
+    return u'course-publish-pending-{}-{}'.format(handler.name, course_key)
+
+
+def _lock_key(handler, course_key):
+    """
+    The cache key of the lock held by the run of `handler` for `course_key`.
+    """
+    return u'course-publish-lock-{}-{}'.format(handler.name, course_key)
+
+
+def schedule_publish_handler(handler, course_key, *args):
+    """
+    Schedule a run of the publish handler task `handler` for `course_key`, with
+    the extra `args`, unless one is already scheduled.
+
+    Returns whether a run was scheduled.
+    """
+    delay = handler.publish_delay
+    if delay is None:
+        delay = _config('DELAY', DEFAULT_DELAY)
+    return _schedule(handler, course_key, args, delay)
+
+
+def _schedule(handler, course_key, args, delay, reschedule=False):
+    """
+    Schedule a run of `handler` for `course_key`, with the extra `args`, in
+    `delay` seconds, unless one is already scheduled.
+
+    If `reschedule` is true, the caller is the scheduled run, which couldn't
+    run yet: it is scheduled again regardless of the marker, which it owns.
+    """
+    course_key = unicode(course_key)
+    tags = [u'handler:{}'.format(handler.name)]
+
+    # cache.add fails if the key already exists.  The marker expires in case
+    # the scheduled run is lost.
+    timeout = delay + _config('LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+    pending_key = _pending_key(handler, course_key)
+    if reschedule:
+        # Keep the time of the first publish, for the delay metric, but renew the marker
+        # so that it outlives the new run.
+        cache.set(pending_key, cache.get(pending_key) or time.time(), timeout)
+    elif not cache.add(pending_key, time.time(), timeout):
+        dog_stats_api.increment('edxapp.course_publish.coalesced', tags=tags)
+        log.debug(u'A run of %s for %s is already scheduled', handler.name, course_key)
+        return False
+
+    dog_stats_api.increment('edxapp.course_publish.scheduled', tags=tags)
+    handler.apply_async([course_key] + list(args), countdown=delay)
+    return True
+
+
+def publish_handler_task(name, delay=None):
+    """
+    Decorator which makes a celery task named `name` of the function, run
+    under the lock of its course.  The function's first argument is the
+    course's key, as a unicode string.
+
+    The task runs `delay` seconds after the first publish it handles, or
+    settings.COURSE_PUBLISH_HANDLERS['DELAY'] seconds if `delay` is None.
+    """
+    def decorator(func):  # pylint: disable=missing-docstring
+        @task(name=name)
+        @wraps(func)
+        def handler(course_key, *args):  # pylint: disable=missing-docstring
+            # Ideally we'd like to accept a CourseLocator; however, CourseLocator is not JSON-serializable (by
+            # default) so Celery's delayed tasks fail to start.
+            if not isinstance(course_key, basestring):
+                raise ValueError('course_key must be a string. {} is not acceptable.'.format(type(course_key)))
+
+            lock_key = _lock_key(handler, course_key)
+            if not cache.add(lock_key, 'true', _config('LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)):
+                log.info(u'%s is already running for %s; running it again later', name, course_key)
+                # Wait the usual delay even if the handler has none, rather than spin on the lock.
+                _schedule(handler, course_key, args, _config('DELAY', DEFAULT_DELAY), reschedule=True)
+                return
+
+            tags = [u'handler:{}'.format(name)]
+            try:
+                # Publishes from now on need another run, so drop the marker of this one.
+                pending_key = _pending_key(handler, course_key)
+                scheduled_at = cache.get(pending_key)
+                cache.delete(pending_key)
+                start_time = time.time()
+                if scheduled_at is not None:
+                    dog_stats_api.histogram(
+                        'edxapp.course_publish.handler.delay', start_time - scheduled_at, tags=tags
+                    )
+
+                func(course_key, *args)
+            finally:
+                # According to Celery task cookbook, "Memcache delete is very slow, but we have
+                # to use it to take advantage of using add() for atomic locking."
+                cache.delete(lock_key)
+
+            duration = time.time() - start_time
+            dog_stats_api.histogram('edxapp.course_publish.handler.time', duration, tags=tags)
+            log.info(u'Ran %s for %s in %.3f seconds', name, course_key, duration)
+        handler.publish_delay = delay
+        return handler
+    return decorator
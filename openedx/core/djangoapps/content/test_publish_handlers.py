@@ -0,0 +1,109 @@
+"""
+Tests of the coalesced course publish handlers.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from mock import patch
+
+from openedx.core.djangoapps.content.publish_handlers import (
+    _lock_key,
+    publish_handler_task,
+    schedule_publish_handler,
+)
+
+COURSE_KEY = u'course-v1:org+course+run'
+HANDLED = []
+
+
+@publish_handler_task(name=u'openedx.core.djangoapps.content.test_publish_handlers.record_publish')
+def record_publish(course_key, *args):
+    """
+    A publish handler which records its calls, and fails when asked to.
+    """
+    if 'fail' in args:
+        raise ValueError()
+    HANDLED.append((course_key,) + args)
+
+
+@publish_handler_task(name=u'openedx.core.djangoapps.content.test_publish_handlers.record_publish_now', delay=0)
+def record_publish_now(course_key, *args):
+    """
+    A publish handler which runs without the usual delay.
+    """
+    HANDLED.append((course_key,) + args)
+
+
+class PublishHandlersTest(TestCase):
+    """
+    Tests of schedule_publish_handler and publish_handler_task.
+    """
+    def setUp(self):
+        super(PublishHandlersTest, self).setUp()
+        cache.clear()
+        del HANDLED[:]
+        patcher = patch.object(record_publish, 'apply_async')
+        self.apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_coalesced(self):
+        self.assertTrue(schedule_publish_handler(record_publish, COURSE_KEY, 'a'))
+        self.assertFalse(schedule_publish_handler(record_publish, COURSE_KEY, 'a'))
+        self.apply_async.assert_called_once_with([COURSE_KEY, 'a'], countdown=30)
+
+        # Other courses are handled separately.
+        self.assertTrue(schedule_publish_handler(record_publish, u'course-v1:org+other+run'))
+
+    def test_scheduled_again_once_run(self):
+        schedule_publish_handler(record_publish, COURSE_KEY)
+        record_publish(COURSE_KEY)
+        self.assertEqual(HANDLED, [(COURSE_KEY,)])
+
+        self.assertTrue(schedule_publish_handler(record_publish, COURSE_KEY))
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    def test_locked(self):
+        cache.add(_lock_key(record_publish, COURSE_KEY), 'true')
+        record_publish(COURSE_KEY)
+        self.assertEqual(HANDLED, [])
+        self.apply_async.assert_called_once_with([COURSE_KEY], countdown=30)
+
+        # The run waiting for the lock handles the publishes made meanwhile.
+        self.assertFalse(schedule_publish_handler(record_publish, COURSE_KEY))
+
+    def test_locked_with_pending_run(self):
+        # A publish made while a run holds the lock schedules another run, which
+        # finds the lock still taken and must try again.
+        self.assertTrue(schedule_publish_handler(record_publish, COURSE_KEY))
+        cache.add(_lock_key(record_publish, COURSE_KEY), 'true')
+        record_publish(COURSE_KEY)
+        self.assertEqual(HANDLED, [])
+        self.assertEqual(self.apply_async.call_count, 2)
+        self.apply_async.assert_called_with([COURSE_KEY], countdown=30)
+
+        # Publishes made meanwhile are still folded into the rescheduled run, which handles them.
+        self.assertFalse(schedule_publish_handler(record_publish, COURSE_KEY))
+        cache.delete(_lock_key(record_publish, COURSE_KEY))
+        record_publish(COURSE_KEY)
+        self.assertEqual(HANDLED, [(COURSE_KEY,)])
+        self.assertTrue(schedule_publish_handler(record_publish, COURSE_KEY))
+
+    def test_handler_delay(self):
+        with patch.object(record_publish_now, 'apply_async') as apply_async:
+            self.assertTrue(schedule_publish_handler(record_publish_now, COURSE_KEY))
+            apply_async.assert_called_once_with([COURSE_KEY], countdown=0)
+
+            # A run waiting for the lock waits the usual delay.
+            record_publish_now(COURSE_KEY)
+            cache.add(_lock_key(record_publish_now, COURSE_KEY), 'true')
+            record_publish_now(COURSE_KEY)
+            apply_async.assert_called_with([COURSE_KEY], countdown=30)
+
+    def test_unlocked_after_failure(self):
+        with self.assertRaises(ValueError):
+            record_publish(COURSE_KEY, 'fail')
+        record_publish(COURSE_KEY)
+        self.assertEqual(HANDLED, [(COURSE_KEY,)])
+
+    def test_course_key_is_a_string(self):
+        with self.assertRaises(ValueError):
+            record_publish(object())